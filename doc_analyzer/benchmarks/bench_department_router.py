@@ -0,0 +1,118 @@
+"""
+Benchmark do `DepartmentRouter` contra o laço antigo de `_is_specialized_department_case`.
+
+Uso (a partir de `doc_analyzer/`):
+    python -m benchmarks.bench_department_router [--texts 2000] [--words 20]
+
+Gera tipos penais sintéticos, confere que os caminhos concordam (exceto nos
+intervalos de artigos como "312-339", que o laço antigo não reconhece) e
+mostra textos por segundo. O laço antigo para no primeiro departamento; a
+segunda linha mede o mesmo laço coletando todos, como o roteador faz.
+"""
+import argparse
+import random
+import re
+import time
+
+import yaml
+
+from src.rules_engine.department_router import DepartmentRouter
+
+RULES_PATH = "config/rules/dispatch_rules.yaml"
+
+WORDS = ("crime de conduta praticada contra vítima conforme consta dos autos "
+         "mediante fraude em face de terceiros com dolo").split()
+
+SNIPPETS = [
+    "racismo", "intolerância religiosa", "homicídio qualificado", "estelionato",
+    "lavagem de dinheiro", "organização criminosa", "Lei 12.850", "Lei 8.078",
+    "art {artigo} do CP", "artigo {artigo} Código Penal", "furto simples", "ameaça",
+]
+
+def legacy_is_specialized(departments, tipo_penal: str) -> bool:
+    """Cópia do laço usado antes do `DepartmentRouter`."""
+    tipo_penal = tipo_penal.lower()
+    for dep in departments:
+        if 'crimes' in dep and any(crime in tipo_penal for crime in dep['crimes']):
+            return True
+        if 'leis' in dep and any(lei.lower() in tipo_penal for lei in dep['leis']):
+            return True
+        if 'artigos_cp' in dep:
+            for artigo in dep['artigos_cp']:
+                if re.search(f"art(?:igo)?\\s*{artigo}\\s*(?:do)?\\s*(?:CP|Código\\s*Penal)", tipo_penal, re.IGNORECASE):
+                    return True
+    return False
+
+def legacy_all_departments(departments, tipo_penal: str) -> list:
+    """O mesmo laço, sem parar no primeiro departamento (o que `departamentos_candidatos` exige)."""
+    tipo_penal = tipo_penal.lower()
+    found = []
+    for dep in departments:
+        if 'crimes' in dep and any(crime in tipo_penal for crime in dep['crimes']):
+            found.append(dep['nome'])
+        elif 'leis' in dep and any(lei.lower() in tipo_penal for lei in dep['leis']):
+            found.append(dep['nome'])
+        elif 'artigos_cp' in dep and any(
+                re.search(f"art(?:igo)?\\s*{artigo}\\s*(?:do)?\\s*(?:CP|Código\\s*Penal)", tipo_penal, re.IGNORECASE)
+                for artigo in dep['artigos_cp']):
+            found.append(dep['nome'])
+    return found
+
+def synthetic_text(rng: random.Random, words: int, ranged: bool) -> str:
+    """Gera um tipo penal com alguns trechos relevantes entre palavras comuns."""
+    parts = [rng.choice(WORDS) for _ in range(words)]
+    articles = [155, 171, 268, 273, 278, 121]
+    if ranged:
+        articles += [313, 317, 333]
+    for snippet in rng.sample(SNIPPETS, rng.randint(0, 2)):
+        parts.insert(rng.randint(0, len(parts)), snippet.format(artigo=rng.choice(articles)))
+    return " ".join(parts)
+
+def run(texts: int, words: int, seed: int):
+    with open(RULES_PATH, 'r', encoding='utf-8') as file:
+        departments = yaml.safe_load(file)['regras_analise']['departamentos_especializados']
+
+    rng = random.Random(seed)
+    samples = [synthetic_text(rng, words, ranged=False) for _ in range(texts)]
+    router = DepartmentRouter(departments)
+
+    start = time.perf_counter()
+    legacy = [legacy_is_specialized(departments, text) for text in samples]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy_all = [legacy_all_departments(departments, text) for text in samples]
+    legacy_all_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    routed = [router.route(text) for text in samples]
+    router_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, routed) if a != bool(b))
+    mismatches += sum(1 for a, b in zip(legacy_all, routed) if a != [r['departamento'] for r in b])
+
+    # Intervalos de artigos: só o roteador os reconhece
+    ranged = [f"peculato, art {artigo} do CP" for artigo in (313, 317, 333)]
+    ranged_found = sum(1 for text in ranged if router.route(text))
+
+    print(f"{texts} textos x ~{words} palavras")
+    print(f"  laço antigo (para no 1º):      {texts / legacy_seconds:10.1f} textos/s")
+    print(f"  laço antigo (todos):           {texts / legacy_all_seconds:10.1f} textos/s")
+    print(f"  DepartmentRouter (evidências): {texts / router_seconds:10.1f} textos/s")
+    print(f"  ganho: {legacy_seconds / router_seconds:.2f}x (1º), {legacy_all_seconds / router_seconds:.2f}x (todos), "
+          f"divergências: {mismatches}, "
+          f"intervalos reconhecidos: {ranged_found}/{len(ranged)}")
+
+    if mismatches or ranged_found != len(ranged):
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do DepartmentRouter")
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.texts, args.words, args.seed)
+
+if __name__ == "__main__":
+    main()
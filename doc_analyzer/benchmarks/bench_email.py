@@ -0,0 +1,130 @@
+"""
+Benchmark do envio de emails em lote contra um servidor SMTP local (aiosmtpd).
+
+Uso (a partir de `doc_analyzer/`, com `pip install aiosmtpd`):
+    python -m benchmarks.bench_email [--messages 500] [--connections 1 4] [--latency 5]
+
+Gera requisições sintéticas para os departamentos, com o template de
+`config/templates`, e compara:
+    - uma conexão por mensagem (abrir, enviar e fechar a cada email)
+    - `SMTPSender` com cada número de conexões persistentes de `--connections`
+    - `EmailManager.dispatch` gravando os rascunhos em uma pasta temporária e enviando
+`--latency` (ms) atrasa a saudação (EHLO) e cada mensagem no servidor, como
+um servidor remoto. Termina com código 1 se o servidor não receber todas as
+mensagens de algum caminho ou se faltar algum rascunho.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import smtplib
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.bench_pipeline import synthetic_cases
+from src.email_sender.email_manager import DEPARTMENT_EMAILS, EmailManager
+from src.email_sender.smtp_sender import SMTPSender, SMTPServer
+
+HOST = "127.0.0.1"
+
+class CountingHandler:
+    """Handler do aiosmtpd que só conta as mensagens (com atraso opcional)."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+        self._lock = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        await asyncio.sleep(self.latency)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        with self._lock:
+            self.received += len(envelope.rcpt_tos)
+        return '250 OK'
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind((HOST, 0))
+        return probe.getsockname()[1]
+
+def one_connection_per_message(emails, port: int):
+    for _, email in emails:
+        with smtplib.SMTP(HOST, port) as connection:
+            connection.send_message(email)
+
+def run(messages: int, connections_list, latency: float, seed: int):
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        raise SystemExit("aiosmtpd não instalado: pip install aiosmtpd")
+
+    logging.disable(logging.WARNING)
+    manager = EmailManager()
+    template = next(iter(manager.templates), None)
+    if template is None:
+        raise SystemExit("Nenhum template de email em config/templates")
+
+    rng = random.Random(seed)
+    departments = sorted(DEPARTMENT_EMAILS)
+    requests = [(template, case, rng.choice(departments)) for case in synthetic_cases(messages, seed)]
+    emails = list(manager.create_emails(requests))
+
+    handler = CountingHandler(latency / 1000)
+    port = free_port()
+    controller = Controller(handler, hostname=HOST, port=port)
+    controller.start()
+    sender_for = lambda connections: SMTPSender(SMTPServer(HOST, port), connections=connections)
+
+    paths = [("uma conexão por mensagem", lambda: one_connection_per_message(emails, port))]
+    for connections in connections_list:
+        paths.append((f"SMTPSender, {connections} conexão(ões)",
+                      lambda connections=connections: sender_for(connections).send_many(emails)))
+
+    ok = True
+    print(f"{len(emails)} mensagens, latência simulada de {latency:g} ms")
+    try:
+        for name, function in paths:
+            handler.received = 0
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            print(f"  {name:34} {elapsed:8.2f} s ({len(emails) / elapsed:7.1f} msg/s)")
+            if handler.received != len(emails):
+                ok = False
+                print(f"    servidor recebeu {handler.received} de {len(emails)}")
+
+        with tempfile.TemporaryDirectory() as directory:
+            handler.received = 0
+            connections = max(connections_list)
+            start = time.perf_counter()
+            report = manager.dispatch(requests, directory, sender_for(connections))
+            elapsed = time.perf_counter() - start
+            drafts = len(list(Path(directory).glob('*.eml')))
+            print(f"  {'dispatch (rascunhos + envio)':34} {elapsed:8.2f} s "
+                  f"({report.sent} enviados, {drafts} arquivos de rascunho)")
+            if handler.received != len(emails) or report.failures or drafts != len(emails):
+                ok = False
+    finally:
+        controller.stop()
+
+    if not ok:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do envio de emails em lote")
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--latency', type=float, default=5, help="Atraso do servidor por comando, em ms")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.messages, args.connections, args.latency, args.seed)
+
+if __name__ == "__main__":
+    main()
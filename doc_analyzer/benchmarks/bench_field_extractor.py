@@ -0,0 +1,109 @@
+"""
+Benchmark do `FieldExtractor` contra o caminho antigo (`PDFReader.extract_fields`).
+
+Uso (a partir de `doc_analyzer/`):
+    python -m benchmarks.bench_field_extractor [--docs 200] [--pages 20]
+
+Gera textos sintéticos de Notícias de Fato, confere que os dois caminhos
+retornam exatamente os mesmos campos e mostra documentos por segundo.
+"""
+import argparse
+import random
+import time
+
+import yaml
+
+from src.pdf_processor.field_extractor import FieldExtractor
+from src.pdf_processor.page_index import PageIndexedText
+from src.pdf_processor.pdf_reader import PDFReader
+from src.rules_engine.registry import BASIC_INFO_FIELDS
+
+RULES_PATH = "config/rules/dispatch_rules.yaml"
+
+FILLER = ("Trata-se de expediente encaminhado para análise, com documentos anexos e "
+          "manifestações das partes interessadas, conforme consta dos autos. ")
+
+SNIPPETS = [
+    "Notícia de Fato nº {n}.{m}-{d}",
+    "NF nº {n}-{m}",
+    "Origem: Promotoria de Justiça Criminal da Capital",
+    "Representante: Associação de Moradores do Bairro {m}",
+    "Investigado: Fulano de Tal {m}",
+    "Em face de: Empresa Exemplo {m} Ltda",
+    "Vítima: Beltrano da Silva {d}",
+    "B.O. nº {n}/2023",
+    "RDO nº {m}/2023",
+    "Local dos Fatos: Rua das Flores, {m}",
+    "ocorrido na Avenida Paulista, {m}",
+    "art. {artigo} do CP",
+    "Lei nº 8.078/1990",
+    "Crime de estelionato contra consumidor",
+    "MANIFESTO-ME pela instauração de inquérito policial",
+]
+
+def build_fields_config(rules):
+    """Configuração usada por `process_document` antes do `FieldExtractor`."""
+    return {
+        field: [pattern for item in rules['scraping_items']
+                if item['nome'] == field
+                for pattern in item['padroes']]
+        for field in BASIC_INFO_FIELDS
+    }
+
+def synthetic_document(rng: random.Random, pages: int) -> PageIndexedText:
+    """Gera um documento com trechos relevantes espalhados entre as páginas."""
+    texts = []
+    for _ in range(pages):
+        parts = [FILLER * rng.randint(5, 15)]
+        for snippet in rng.sample(SNIPPETS, rng.randint(0, 3)):
+            parts.append(snippet.format(n=rng.randint(1000, 9999), m=rng.randint(1, 999),
+                                        d=rng.randint(1, 9), artigo=rng.choice([155, 171, 268, 313])))
+            parts.append(FILLER * rng.randint(1, 5))
+        texts.append(" ".join(parts))
+    return PageIndexedText(texts)
+
+def run(docs: int, pages: int, seed: int):
+    with open(RULES_PATH, 'r', encoding='utf-8') as file:
+        rules = yaml.safe_load(file)
+
+    rng = random.Random(seed)
+    documents = [synthetic_document(rng, pages) for _ in range(docs)]
+    for document in documents:
+        document.text  # materializa o texto fora da medição
+
+    reader = PDFReader()
+
+    # Caminho antigo: reconstrói a configuração e recompila os padrões a cada documento
+    start = time.perf_counter()
+    legacy = []
+    for document in documents:
+        reader.document = document
+        legacy.append(reader.extract_fields(build_fields_config(rules)))
+    legacy_seconds = time.perf_counter() - start
+
+    # Caminho novo: extrator construído uma vez
+    extractor = FieldExtractor(rules['scraping_items'], BASIC_INFO_FIELDS)
+    start = time.perf_counter()
+    compiled = [extractor.extract(document.text) for document in documents]
+    compiled_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+
+    print(f"{docs} documentos x {pages} páginas")
+    print(f"  extract_fields (antigo): {docs / legacy_seconds:10.1f} doc/s")
+    print(f"  FieldExtractor:          {docs / compiled_seconds:10.1f} doc/s")
+    print(f"  ganho: {legacy_seconds / compiled_seconds:.2f}x, divergências: {mismatches}")
+
+    if mismatches:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do FieldExtractor")
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.docs, args.pages, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark da análise de documentos longos: uma única chamada contra map-reduce.
+
+Uso (a partir de `doc_analyzer/`):
+    python -m benchmarks.bench_map_reduce [--pages 500] [--latency 50] [--prompt-rate 100000]
+                                          [--output-tokens 200] [--output-rate 1000]
+
+Gera um PDF sintético longo (mesmo gerador do `bench_pipeline`) e roda
+`MistralAnalyzer._analyze_with_rules` com um cliente simulado, sem rede nem
+chave da API, cuja latência segue a de um LLM: `--latency` (ms) fixos por
+chamada, mais a leitura do prompt a `--prompt-rate` tokens/s e a geração de
+`--output-tokens` tokens (limitados por `settings.max_tokens`) a
+`--output-rate` tokens/s. Compara:
+    - uma única chamada com o documento inteiro (`context_tokens` acima do documento)
+    - map-reduce com os `context_tokens`, `chunk_tokens` e `map_concurrency` do YAML
+Termina com código 1 se o map-reduce não for mais rápido que a chamada
+única, se passar de `map_concurrency` chamadas simultâneas ou se os trechos
+não cobrirem o documento inteiro.
+"""
+import argparse
+import asyncio
+import logging
+import math
+import re
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional
+
+from mistralai.models.chat_completion import ChatMessage
+
+from benchmarks.bench_pipeline import RULES_PATH, synthetic_pdf
+from src.ai_analyzer.chunking import estimate_tokens
+from src.ai_analyzer.mistral_client import MistralAnalyzer
+from src.pdf_processor.page_index import PageIndexedText
+from src.pdf_processor.pdf_reader import PDFReader
+from src.rules_engine.registry import RulesRegistry
+
+# Intervalo de cada trecho no prompt do map ("páginas 1 a 40")
+_CHUNK_RANGE = re.compile(r'^Trecho \(páginas (\d+) a (\d+)\)')
+
+class LatencyClient:
+    """Cliente simulado do Mistral: responde após um atraso proporcional aos tokens."""
+
+    def __init__(self, latency: float, prompt_rate: float, output_tokens: int, output_rate: float):
+        self.latency = latency
+        self.prompt_rate = prompt_rate
+        self.output_tokens = output_tokens
+        self.output_rate = output_rate
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.ranges = []
+
+    async def chat(self, model: str, messages: List[ChatMessage], temperature: Optional[float] = None,
+                   max_tokens: Optional[int] = None, timeout: Optional[float] = None):
+        prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+        completion_tokens = min(self.output_tokens, max_tokens or self.output_tokens)
+        match = _CHUNK_RANGE.match(messages[-1].content)
+        if match:
+            self.ranges.append((int(match.group(1)), int(match.group(2))))
+
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency + prompt_tokens / self.prompt_rate
+                                + completion_tokens / self.output_rate)
+        finally:
+            self.in_flight -= 1
+
+        # Resposta com o tamanho em tokens pedido, para o reduce receber resumos realistas
+        content = "resumo " * math.ceil(completion_tokens * 3.5 / 7)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        )
+
+def covers(ranges, total: int) -> bool:
+    """Se os intervalos do map, em ordem, cobrem de 1 a `total` sem buracos nem sobreposição."""
+    expected = 1
+    for start, end in sorted(ranges):
+        if start != expected:
+            return False
+        expected = end + 1
+    return expected == total + 1
+
+def run(pages: int, latency: float, prompt_rate: float, output_tokens: int, output_rate: float, seed: int):
+    logging.disable(logging.WARNING)
+    registry = RulesRegistry(RULES_PATH)
+    settings = registry.get().data.setdefault('settings', {})
+    context_tokens = settings.get('context_tokens', 24000)
+    concurrency = max(1, int(settings.get('map_concurrency', 4)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / f"nf_{pages}.pdf"
+        synthetic_pdf(path, pages, seed)
+        reader = PDFReader()
+        reader.load_pdf(str(path))
+        text = reader.get_text()
+        reader.load_pages([])
+
+    tokens = estimate_tokens(text)
+    # Mesma divisão usada por `_analyze_with_rules` antes de agrupar os trechos
+    parts = len(text.split(PageIndexedText.SEPARATOR))
+    if tokens <= context_tokens:
+        raise SystemExit(f"Documento de {tokens} tokens cabe no contexto ({context_tokens}); aumente --pages")
+
+    # Só as regras e o cliente são usados: dispensa a chave da API e a base de conhecimento
+    client = LatencyClient(latency / 1000, prompt_rate, output_tokens, output_rate)
+    analyzer = MistralAnalyzer.__new__(MistralAnalyzer)
+    analyzer.registry = registry
+    analyzer.response_cache = None
+    analyzer.client = client
+
+    def measure(single: bool):
+        # O documento vai inteiro em uma chamada quando o contexto o comporta
+        settings['context_tokens'] = tokens * 2 if single else context_tokens
+        client.reset()
+        start = time.perf_counter()
+        asyncio.run(analyzer._analyze_with_rules(text, {}))
+        return time.perf_counter() - start
+
+    chunk_tokens = analyzer._chunk_tokens(text.split(PageIndexedText.SEPARATOR), settings.get('max_tokens'))
+    print(f"{pages} páginas, {tokens} tokens estimados; contexto de {context_tokens} tokens, "
+          f"trechos de até {chunk_tokens}, {concurrency} chamadas simultâneas")
+    ok = True
+    times = {}
+    try:
+        for name, single in (("chamada única", True), ("map-reduce", False)):
+            elapsed = times[single] = measure(single)
+            print(f"  {name:14} {elapsed:8.2f} s  {client.calls:4} chamada(s), "
+                  f"até {client.max_in_flight} simultânea(s)")
+            if not single:
+                if client.max_in_flight > concurrency:
+                    ok = False
+                    print(f"    passou de map_concurrency ({concurrency})")
+                if not covers(client.ranges, parts):
+                    ok = False
+                    print("    os trechos não cobrem o documento inteiro")
+    finally:
+        settings['context_tokens'] = context_tokens
+
+    print(f"  map-reduce {times[True] / times[False]:.2f}x mais rápido que a chamada única")
+    if times[False] >= times[True]:
+        ok = False
+        print("    map-reduce não é mais rápido que a chamada única")
+    if not ok:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da análise de documentos longos")
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=50, help="Latência fixa por chamada, em ms")
+    parser.add_argument('--prompt-rate', type=float, default=100000, help="Tokens de prompt lidos por segundo")
+    parser.add_argument('--output-tokens', type=int, default=200, help="Tokens gerados por resposta")
+    parser.add_argument('--output-rate', type=float, default=1000, help="Tokens gerados por segundo")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.pages, args.latency, args.prompt_rate, args.output_tokens, args.output_rate, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Benchmark das etapas do pipeline, com baseline em JSON e código de saída em regressões.
+
+Uso (a partir de `doc_analyzer/`):
+    python -m benchmarks.bench_pipeline [--sizes 1 50 500] [--repeat 10] [--processes 3] [--threshold 0.25]
+    python -m benchmarks.bench_pipeline --save      # grava os tempos atuais como baseline
+
+Gera PDFs sintéticos de Notícias de Fato com o PyMuPDF (mesmos trechos do
+`bench_field_extractor`, semente fixa) e mede cada etapa separadamente:
+    - load_pdf:             `PDFReader.load_pdf` (por tamanho de PDF)
+    - extract_fields:       `PDFReader.extract_fields` com os padrões de `scraping_items`
+    - extract_with:         `PDFReader.extract_with` (FieldExtractor, usado pelo pipeline)
+    - routing:              `_is_specialized_department_case` e `_is_outside_capital`
+    - check_specialized_department: `RuleProcessor.check_specialized_department`
+    - create_email:         `EmailManager.create_email`
+As etapas sem PDF rodam sobre `--cases` análises sintéticas.
+
+Cada etapa é repetida `--repeat` vezes em cada um de `--processes`
+processos novos: o mesmo código varia de um processo para outro (memória,
+caches do MuPDF), não só de uma repetição para outra. Vale o menor tempo
+entre todos; a dispersão é a mediana das medianas dos processos menos
+esse mínimo. Sem `--save`, o menor tempo de cada processo é comparado com
+o do baseline (a mediana dos menores tempos dos seus processos, em
+`benchmarks/baseline.json`, um por máquina, fora do git), e o benchmark
+termina com código 1 se alguma etapa ficar mais lenta na maioria dos
+processos além da maior entre três folgas: `--threshold` (25%) do tempo do
+baseline, `NOISE_FACTOR` vezes a dispersão medida (mediana menos mínimo,
+no baseline ou agora), limitada a `NOISE_CAP` vezes o `--threshold`, e
+`MIN_REGRESSION_SECONDS`. Sem baseline, o primeiro resultado é gravado
+como baseline.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import fitz  # PyMuPDF
+
+from benchmarks.bench_field_extractor import FILLER, SNIPPETS, build_fields_config
+from src.ai_analyzer.mistral_client import MistralAnalyzer
+from src.email_sender.email_manager import EmailManager
+from src.pdf_processor.pdf_reader import PDFReader
+from src.rules_engine.registry import RulesRegistry
+from src.rules_engine.rule_processor import RuleProcessor
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+RULES_PATH = "config/rules/dispatch_rules.yaml"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# Diferenças abaixo disso são ruído de medição, qualquer que seja a porcentagem
+MIN_REGRESSION_SECONDS = 0.0005
+
+# Quantas vezes a dispersão das medições (mediana - mínimo) uma diferença precisa superar
+NOISE_FACTOR = 2
+
+# Teto da folga pela dispersão, em múltiplos de `--threshold`: com 25%, uma
+# etapa 1,5x mais lenta é acusada mesmo quando as medições oscilam muito
+NOISE_CAP = 1.5
+
+TIPOS_PENAIS = [
+    "estelionato, art 171 do CP", "racismo", "intolerância religiosa", "Lei 12.850 organização criminosa",
+    "furto simples", "lavagem de dinheiro", "homicídio qualificado", "ameaça", "Pedofilia",
+    "Fraudes contra Instituições Financeiras", "art 313 do CP", "Violação de Dispositivos Eletrônicos",
+]
+
+LOCAIS = [
+    "São Paulo - Capital", "Rua das Flores, 10, São Paulo", "Campinas", "Santos", "Guarulhos",
+    "interior do estado", "Avenida Paulista, São Paulo", "Ribeirão Preto", "região metropolitana",
+]
+
+def synthetic_pdf(path: Path, pages: int, seed: int):
+    """PDF com texto de Notícia de Fato e trechos relevantes espalhados entre as páginas."""
+    rng = random.Random(seed + pages)
+    document = fitz.open()
+    for _ in range(pages):
+        parts = [FILLER * rng.randint(3, 8)]
+        for snippet in rng.sample(SNIPPETS, rng.randint(0, 3)):
+            parts.append(snippet.format(n=rng.randint(1000, 9999), m=rng.randint(1, 999),
+                                        d=rng.randint(1, 9), artigo=rng.choice([155, 171, 268, 313])))
+            parts.append(FILLER * rng.randint(1, 3))
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 545, 800), "\n".join(parts), fontsize=9)
+    document.save(path)
+    document.close()
+
+def synthetic_cases(count: int, seed: int) -> List[Dict]:
+    """Análises com tipo penal, local e autoria, como as que saem do LLM."""
+    rng = random.Random(seed)
+    return [{
+        'tipo_penal': ", ".join(rng.sample(TIPOS_PENAIS, rng.randint(1, 2))),
+        'local_fatos': rng.choice(LOCAIS),
+        'autoria_conhecida': rng.random() < 0.5,
+        'numero_nf': f"{rng.randint(1000, 9999)}.{rng.randint(1, 999)}",
+        'promotoria': "Promotoria de Justiça Criminal da Capital",
+        'data_fatos': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2023",
+        'enquadramento_legal': rng.choice(TIPOS_PENAIS),
+        'promotor': "Fulano de Tal",
+    } for _ in range(count)]
+
+def measure(function: Callable, repeat: int) -> Dict:
+    """Roda `function` `repeat` vezes (mais uma de aquecimento) e resume os tempos."""
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'repeat': repeat}
+
+def run_stages(sizes: List[int], cases: int, repeat: int, seed: int) -> Dict[str, Dict]:
+    registry = RulesRegistry(RULES_PATH)
+    rules = registry.get()
+    fields_config = build_fields_config(rules.data)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = Path(directory) / f"nf_{size}.pdf"
+            synthetic_pdf(path, size, seed)
+
+            reader = PDFReader()
+            results[f"load_pdf[{size}]"] = measure(lambda: reader.load_pdf(str(path)), repeat)
+            reader.load_pdf(str(path))
+            reader.get_text()  # materializa o texto fora da medição
+            results[f"extract_fields[{size}]"] = measure(lambda: reader.extract_fields(fields_config), repeat)
+            results[f"extract_with[{size}]"] = measure(lambda: reader.extract_with(rules.field_extractor), repeat)
+            # Fecha o PDF antes de apagar a pasta temporária
+            reader.load_pages([])
+
+    analyses = synthetic_cases(cases, seed)
+
+    # Só as regras são usadas por estes métodos: dispensa a chave da API e a base de conhecimento
+    analyzer = MistralAnalyzer.__new__(MistralAnalyzer)
+    analyzer.registry = registry
+
+    def routing():
+        for analysis in analyses:
+            analyzer._is_specialized_department_case(analysis)
+            analyzer._is_outside_capital(analysis)
+
+    processor = RuleProcessor(registry)
+
+    def check_departments():
+        for analysis in analyses:
+            processor.check_specialized_department(analysis['tipo_penal'], analysis['local_fatos'],
+                                                   analysis['autoria_conhecida'])
+
+    email_manager = EmailManager()
+    template = next(iter(email_manager.templates), None)
+    if template is None:
+        raise SystemExit("Nenhum template de email em config/templates")
+
+    def create_emails():
+        for analysis in analyses:
+            email_manager.create_email(template, analysis, 'DEIC')
+
+    results[f"routing[{cases}]"] = measure(routing, repeat)
+    results[f"check_specialized_department[{cases}]"] = measure(check_departments, repeat)
+    results[f"create_email[{cases}]"] = measure(create_emails, repeat)
+    return results
+
+def run_in_processes(sizes: List[int], cases: int, repeat: int, seed: int, processes: int) -> Dict[str, Dict]:
+    """Mede as etapas em `processes` processos novos e junta os tempos de cada etapa."""
+    runs = []
+    for _ in range(processes):
+        process = subprocess.run([sys.executable, '-m', 'benchmarks.bench_pipeline', '--child',
+                                  '--sizes', *map(str, sizes), '--cases', str(cases),
+                                  '--repeat', str(repeat), '--seed', str(seed)],
+                                 cwd=PROJECT_DIR, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise SystemExit(f"Erro ao medir as etapas: {process.stderr.strip()}")
+        runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    return {stage: {
+        'median_s': statistics.median(run[stage]['median_s'] for run in runs),
+        'min_s': min(run[stage]['min_s'] for run in runs),
+        'process_min_s': [run[stage]['min_s'] for run in runs],
+        'repeat': repeat * processes
+    } for stage in runs[0]}
+
+def spread(result: Dict) -> float:
+    """Dispersão de uma medição: quanto a mediana fica acima do menor tempo."""
+    return result['median_s'] - result['min_s']
+
+def process_minima(result: Dict) -> List[float]:
+    """Menor tempo de cada processo (só o mínimo geral em medições de um processo)."""
+    return result.get('process_min_s') or [result['min_s']]
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Etapas mais lentas que o baseline, na maioria dos processos, além do limite e do ruído."""
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline.get(stage)
+        if not reference:
+            continue
+        before = statistics.median(process_minima(reference))
+        noise = min(NOISE_FACTOR * max(spread(reference), spread(result)), NOISE_CAP * threshold * before)
+        allowed = max(before * threshold, noise, MIN_REGRESSION_SECONDS)
+        minima = process_minima(result)
+        if sum(after - before > allowed for after in minima) > len(minima) / 2:
+            regressions.append(stage)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do pipeline do doc_analyzer")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 50, 500], help="Páginas dos PDFs sintéticos")
+    parser.add_argument('--cases', type=int, default=2000, help="Análises para roteamento e emails")
+    parser.add_argument('--repeat', type=int, default=10, help="Repetições de cada etapa por processo")
+    parser.add_argument('--processes', type=int, default=3,
+                        help="Processos novos em que as etapas são medidas (1 = só o processo atual)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Lentidão tolerada em relação ao baseline (0.25 = 25%%)")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--save', action='store_true', help="Grava os tempos atuais como baseline")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # Os avisos de padrões inválidos do YAML se repetiriam a cada chamada medida
+    logging.disable(logging.WARNING)
+    if args.child:
+        print(json.dumps(run_stages(args.sizes, args.cases, args.repeat, args.seed)))
+        return
+    if args.processes > 1:
+        results = run_in_processes(args.sizes, args.cases, args.repeat, args.seed, args.processes)
+    else:
+        results = run_stages(args.sizes, args.cases, args.repeat, args.seed)
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists() and not args.save:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8')).get('stages', {})
+
+    print(f"{'etapa':40} {'mínimo':>10} {'mediana':>10} {'baseline':>10} {'variação':>9}")
+    for stage, result in results.items():
+        reference = baseline.get(stage)
+        line = f"{stage:40} {result['min_s'] * 1000:8.2f}ms {result['median_s'] * 1000:8.2f}ms"
+        if reference:
+            change = result['min_s'] / reference['min_s'] - 1 if reference['min_s'] else 0.0
+            line += f" {reference['min_s'] * 1000:8.2f}ms {change:+8.0%}"
+        print(line)
+
+    if args.save or not baseline:
+        baseline_path.write_text(json.dumps({
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'stages': results
+        }, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"Baseline gravado em {baseline_path}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Regressão acima de {args.threshold:.0%}: {', '.join(regressions)}")
+        raise SystemExit(1)
+    print(f"Nenhuma etapa mais de {args.threshold:.0%} mais lenta que o baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark da inicialização da interface: importações (`-X importtime`) e tempo até a janela aparecer.
+
+Uso (a partir de `doc_analyzer/`):
+    python -m benchmarks.bench_startup [--repeat 3] [--top 10]
+
+Compara a inicialização antiga (analisador criado antes da janela) com a
+atual (janela primeiro, analisador em segundo plano):
+    - importações na thread principal antes da janela, com `python -X importtime`
+      (antes: interface + `mistral_client`; agora: `src.main`), e os módulos mais
+      pesados do que passou para segundo plano
+    - tempo até o primeiro desenho da janela (evento `<Expose>`) e até o
+      analisador ficar pronto, medidos do início do processo, em processos novos
+
+O tempo até a janela exige o customtkinter e uma tela (no Linux, `DISPLAY`);
+sem eles, só as importações são medidas. Sem `MISTRAL_API_KEY`, é usada uma
+chave fictícia (nenhuma chamada à API é feita).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Importações feitas antes da janela, na versão antiga e na atual do `src.main`
+EAGER_IMPORTS = "import dotenv, src.ui.main_window, src.ai_analyzer.mistral_client"
+LAZY_IMPORTS = "import src.main"
+BACKGROUND_MODULE = "src.ai_analyzer.mistral_client"
+
+# Limite de espera pelo analisador em cada processo medido
+CHILD_TIMEOUT_S = 60
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault('MISTRAL_API_KEY', 'benchmark')
+    env['PYTHONPATH'] = str(PROJECT_DIR) + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+def importtime(statement: str) -> Tuple[Optional[float], List[Tuple[float, str]], str]:
+    """Tempo total de importação (s) e (tempo acumulado, módulo) de cada importação."""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                             cwd=PROJECT_DIR, env=child_env(), capture_output=True, text=True)
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # O recuo do nome (depois de um espaço) indica importações aninhadas
+        modules.append((int(cumulative) / 1e6, name[1:]))
+    if process.returncode != 0:
+        return None, modules, process.stderr.strip().splitlines()[-1]
+    # Módulos de primeiro nível (sem recuo) somam o tempo total
+    total = sum(seconds for seconds, name in modules if not name.startswith(' '))
+    return total, modules, ""
+
+def first_paint(mode: str) -> Optional[Dict]:
+    """Roda a janela em um processo novo e devolve os tempos medidos por ele (None se não há tela)."""
+    process = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', mode,
+                              '--started', repr(time.time())],
+                             cwd=PROJECT_DIR, env=child_env(), capture_output=True, text=True)
+    for line in process.stdout.splitlines():
+        if line.startswith('{'):
+            return json.loads(line)
+    return None
+
+def child(mode: str, started: float):
+    """Processo medido: cria a janela como o `src.main` antigo ('eager') ou o atual ('lazy')."""
+    import logging
+    logging.disable(logging.WARNING)
+
+    if mode == 'eager':
+        from src.ai_analyzer.mistral_client import MistralAnalyzer
+        from src.ui.main_window import MainWindow
+        app = MainWindow(MistralAnalyzer())
+    else:
+        from src.main import load_analyzer
+        from src.ui.main_window import MainWindow
+        app = MainWindow(load_analyzer)
+
+    times = {}
+
+    def painted(_event):
+        times.setdefault('paint_s', time.time() - started)
+
+    def check_ready():
+        if app.analyzer is not None and 'paint_s' in times:
+            times['ready_s'] = time.time() - started
+            print(json.dumps(times), flush=True)
+            app.destroy()
+        elif time.time() - started > CHILD_TIMEOUT_S:
+            # Analisador não carregou (ex.: erro nas regras): sai sem resultado
+            app.destroy()
+        else:
+            app.after(5, check_ready)
+
+    app.bind('<Expose>', painted, add='+')
+    app.after(5, check_ready)
+    app.mainloop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização da interface")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help="Módulos mais pesados a listar")
+    parser.add_argument('--child', choices=['eager', 'lazy'], help=argparse.SUPPRESS)
+    parser.add_argument('--started', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.started)
+        return
+
+    print("Importações antes da janela (thread principal), mediana de "
+          f"{args.repeat} execuções com -X importtime:")
+    for label, statement in [("antes", EAGER_IMPORTS), ("agora", LAZY_IMPORTS)]:
+        results = [importtime(statement) for _ in range(args.repeat)]
+        if results[0][0] is None:
+            print(f"  {label:6} não medido ({results[0][2]})")
+            continue
+        print(f"  {label:6} {statement:60} {statistics.median(r[0] for r in results) * 1000:8.1f} ms")
+
+    total, modules, _ = importtime(f"import {BACKGROUND_MODULE}")
+    if total is not None:
+        cumulative = {name.strip(): seconds for seconds, name in modules}
+        print(f"\nCarregado agora em segundo plano ({BACKGROUND_MODULE}: "
+              f"{cumulative[BACKGROUND_MODULE] * 1000:.1f} ms), módulos mais pesados:")
+        heaviest = [(seconds, name.strip()) for seconds, name in modules if name.strip() != BACKGROUND_MODULE]
+        for seconds, name in sorted(heaviest, reverse=True)[:args.top]:
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    print("\nTempo desde o início do processo (mediana):")
+    for label, mode in [("antes", 'eager'), ("agora", 'lazy')]:
+        runs = [first_paint(mode) for _ in range(args.repeat)]
+        runs = [run for run in runs if run]
+        if not runs:
+            print(f"  {label:6} não medido (sem tela ou sem o customtkinter)")
+            continue
+        paint = statistics.median(run['paint_s'] for run in runs)
+        ready = statistics.median(run['ready_s'] for run in runs)
+        print(f"  {label:6} janela desenhada em {paint * 1000:7.0f} ms, analisador pronto em {ready * 1000:7.0f} ms")
+
+if __name__ == "__main__":
+    main()
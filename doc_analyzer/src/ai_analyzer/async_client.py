@@ -0,0 +1,377 @@
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional, TypeVar
+
+import aiohttp
+from mistralai.exceptions import MistralAPIException, MistralConnectionException
+from mistralai.models.chat_completion import ChatCompletionResponse, ChatMessage
+
+from src.ai_analyzer.chunking import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+DEFAULT_ENDPOINT = "https://api.mistral.ai"
+
+# Respostas que valem uma nova tentativa
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class RateLimiter:
+    """Balde de fichas para requisições por minuto e tokens por minuto.
+
+    É protegido por um `threading.Lock`, podendo ser compartilhado por
+    vários event loops (ex.: uma thread por documento no processamento em
+    lote). Um limite igual a 0 ou None fica desligado.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute or 0
+        self.tokens_per_minute = tokens_per_minute or 0
+        self._requests = float(self.requests_per_minute)
+        self._tokens = float(self.tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Consome as fichas se houver saldo; senão, retorna quantos segundos esperar."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+            # Uma chamada maior que o balde inteiro espera apenas o balde encher
+            tokens = min(tokens, self.tokens_per_minute)
+
+            wait = 0.0
+            if self.requests_per_minute and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+            if self.tokens_per_minute and self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+            if wait:
+                return wait
+
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+            return 0.0
+
+    async def acquire(self, tokens: int = 0):
+        """Aguarda até haver saldo para uma requisição de `tokens` tokens."""
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+class AsyncMistralClient:
+    """Cliente assíncrono da API de chat do Mistral, usando aiohttp diretamente.
+
+    - Um único event loop, em uma thread própria, com uma única sessão HTTP
+      (conexões reaproveitadas entre as chamadas); o código síncrono entra
+      por `run`, de qualquer thread
+    - Limite de chamadas simultâneas (`max_in_flight`), um `asyncio.Semaphore`
+      nesse event loop
+    - Limitador de requisições e tokens por minuto (`RateLimiter`)
+    - Novas tentativas com espera exponencial e jitter em 429/5xx e falhas
+      de conexão, respeitando o cabeçalho Retry-After
+    - Prazo total por chamada (`timeout`), incluindo as novas tentativas
+
+    O `endpoint` é configurável para permitir testes com um servidor local.
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 endpoint: str = DEFAULT_ENDPOINT,
+                 max_in_flight: int = 4,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 timeout: float = 120,
+                 request_timeout: float = 60,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 30.0):
+        self.api_key = api_key
+        self.endpoint = endpoint.rstrip('/')
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.request_timeout = request_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_in_flight = max(1, max_in_flight)
+
+        # Event loop, vagas e sessão HTTP, criados na primeira chamada e mantidos até `shutdown`
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.BoundedSemaphore] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._http: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_settings(cls, api_key: str, settings: Optional[Dict]) -> 'AsyncMistralClient':
+        """Cria o cliente a partir de `settings.api` do YAML."""
+        config = (settings or {}).get('api') or {}
+        return cls(
+            api_key=api_key,
+            endpoint=config.get('endpoint', DEFAULT_ENDPOINT),
+            max_in_flight=int(config.get('max_in_flight', 4)),
+            requests_per_minute=config.get('requests_per_minute'),
+            tokens_per_minute=config.get('tokens_per_minute'),
+            max_retries=int(config.get('max_retries', 5)),
+            timeout=float(config.get('timeout_s', 120)),
+            request_timeout=float(config.get('request_timeout_s', 60)),
+            backoff_base=float(config.get('backoff_base_s', 1.0)),
+            backoff_max=float(config.get('backoff_max_s', 30.0))
+        )
+
+    def _session(self) -> aiohttp.ClientSession:
+        """Sessão HTTP do cliente, criada na primeira chamada (sempre no event loop do cliente)."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "Accept": "application/json"
+                }
+            )
+        return self._http
+
+    async def close(self):
+        """Fecha a sessão HTTP (uma nova é aberta na próxima chamada)."""
+        if self._http is not None:
+            session, self._http = self._http, None
+            await session.close()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop do cliente, rodando em uma thread de fundo iniciada na primeira chamada."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._slots = asyncio.BoundedSemaphore(self.max_in_flight)
+                thread = threading.Thread(target=loop.run_forever, name="mistral-client", daemon=True)
+                thread.start()
+                self._loop, self._loop_thread = loop, thread
+                atexit.register(self.shutdown)
+            return self._loop
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Executa uma corrotina no event loop do cliente e aguarda o resultado.
+
+        Ponto de entrada do código síncrono (interface, lote, `MistralAnalyzer`),
+        que pode ser chamado de várias threads ao mesmo tempo. A corrotina
+        herda as variáveis de contexto de quem chama (ex.: o span atual).
+        A tarefa pode ser cancelada pelo event loop (`asyncio.current_task()`);
+        nesse caso, `run` levanta `asyncio.CancelledError`.
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._loop_thread:
+            # Esperar aqui travaria o próprio event loop
+            if asyncio.iscoroutine(coroutine):
+                coroutine.close()
+            raise RuntimeError("run() chamado de dentro do event loop do cliente; use await")
+
+        result: concurrent.futures.Future = concurrent.futures.Future()
+
+        def done(task: asyncio.Task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        def start():
+            # Criada dentro do contexto copiado de quem chama
+            try:
+                loop.create_task(coroutine).add_done_callback(done)
+            except Exception as e:
+                # Ex.: não é uma corrotina; sem isso, quem chama esperaria para sempre
+                result.set_exception(e)
+
+        loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+        try:
+            return result.result()
+        except concurrent.futures.CancelledError:
+            raise asyncio.CancelledError()
+
+    def shutdown(self):
+        """Fecha a sessão HTTP e encerra o event loop do cliente."""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Erro ao fechar a sessão HTTP: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+    async def _acquire_slot(self):
+        """Aguarda uma vaga no limite de chamadas simultâneas."""
+        await self._slots.acquire()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Espera antes da próxima tentativa: exponencial com jitter, ou o Retry-After do servidor."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def chat(self,
+                   model: str,
+                   messages: List[ChatMessage],
+                   temperature: Optional[float] = None,
+                   max_tokens: Optional[int] = None,
+                   timeout: Optional[float] = None) -> ChatCompletionResponse:
+        """Envia uma requisição de chat e retorna a resposta completa.
+
+        Args:
+            timeout: Prazo total da chamada em segundos; usa o padrão do cliente se omitido
+
+        Raises:
+            asyncio.TimeoutError: Se o prazo acabar antes de uma resposta
+            MistralAPIException: Se a API recusar a requisição ou as tentativas se esgotarem
+        """
+        request = self._request_body(model, messages, temperature, max_tokens)
+        return await asyncio.wait_for(self._complete(request, self._estimate(messages, max_tokens)),
+                                      timeout or self.timeout)
+
+    async def stream_chat(self,
+                          model: str,
+                          messages: List[ChatMessage],
+                          temperature: Optional[float] = None,
+                          max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Envia uma requisição de chat e gera o texto da resposta à medida que chega (SSE).
+
+        As novas tentativas só acontecem antes do primeiro trecho; o prazo
+        total vale até o início da resposta e, depois, cada leitura tem o
+        prazo de uma requisição.
+        """
+        request = self._request_body(model, messages, temperature, max_tokens, stream=True)
+        timeout = aiohttp.ClientTimeout(sock_connect=self.request_timeout, sock_read=self.request_timeout)
+        response = await asyncio.wait_for(self._open(request, self._estimate(messages, max_tokens), timeout),
+                                          self.timeout)
+        try:
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[len(b"data:"):].strip()
+                if data == b"[DONE]":
+                    break
+                delta = json.loads(data)['choices'][0]['delta'].get('content')
+                if delta:
+                    yield delta
+        finally:
+            response.release()
+            self._slots.release()
+
+    @staticmethod
+    def _request_body(model: str,
+                      messages: List[ChatMessage],
+                      temperature: Optional[float] = None,
+                      max_tokens: Optional[int] = None,
+                      stream: bool = False) -> Dict[str, Any]:
+        """Corpo JSON de `/v1/chat/completions` (montado aqui, sem depender de métodos internos do mistralai)."""
+        request: Dict[str, Any] = {
+            "model": model,
+            "messages": [{"role": message.role, "content": message.content} for message in messages],
+            "safe_prompt": True
+        }
+        if temperature is not None:
+            request["temperature"] = temperature
+        if max_tokens is not None:
+            request["max_tokens"] = max_tokens
+        if stream:
+            request["stream"] = True
+        return request
+
+    @staticmethod
+    def _estimate(messages: List[ChatMessage], max_tokens: Optional[int]) -> int:
+        """Tokens estimados da chamada (mensagens mais resposta), para o limitador."""
+        return sum(estimate_tokens(message.content) for message in messages) + (max_tokens or 0)
+
+    async def _complete(self, request: Dict[str, Any], tokens: int) -> ChatCompletionResponse:
+        """Envia uma requisição sem streaming e lê a resposta inteira."""
+        response = await self._open(request, tokens, aiohttp.ClientTimeout(total=self.request_timeout))
+        try:
+            try:
+                data = await response.json(content_type=None)
+            except ValueError:
+                raise MistralAPIException.from_aio_response(
+                    response, message=f"Resposta inválida: {await response.text()}")
+            if data.get('object') == 'error':
+                raise MistralAPIException.from_aio_response(response, message=f"Erro da API: {data}")
+            return ChatCompletionResponse(**data)
+        finally:
+            response.release()
+            self._slots.release()
+
+    async def _open(self, request: Dict[str, Any], tokens: int, timeout: aiohttp.ClientTimeout) -> aiohttp.ClientResponse:
+        """Envia a requisição, com novas tentativas, e retorna a resposta bem-sucedida.
+
+        A resposta volta ocupando uma vaga do limite de chamadas simultâneas;
+        quem chama deve liberar a resposta e a vaga (`self._slots.release()`).
+        """
+        url = f"{self.endpoint}/v1/chat/completions"
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            await self.rate_limiter.acquire(tokens)
+            await self._acquire_slot()
+            try:
+                response = await self._session().post(url, json=request, timeout=timeout)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # Só o prazo da requisição; o prazo total é tratado por quem chama
+                self._slots.release()
+                if last_attempt:
+                    raise MistralConnectionException(f"Falha de conexão com a API do Mistral: {str(e)}")
+                delay = self._backoff(attempt)
+                logger.warning(f"Falha de conexão com a API do Mistral ({type(e).__name__}); "
+                               f"nova tentativa em {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._slots.release()
+                raise
+
+            if response.status < 400:
+                return response
+
+            # Erro: libera a vaga antes de decidir se tenta de novo
+            try:
+                body = await response.text()
+            except Exception:
+                body = ""
+            finally:
+                response.release()
+                self._slots.release()
+
+            if response.status not in RETRY_STATUS_CODES or last_attempt:
+                raise MistralAPIException.from_aio_response(
+                    response, message=f"Erro da API (status {response.status}): {body}")
+
+            delay = self._backoff(attempt, response.headers.get('Retry-After'))
+            logger.warning(f"API do Mistral respondeu {response.status}; nova tentativa em {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        raise MistralConnectionException("Tentativas esgotadas")
@@ -0,0 +1,95 @@
+import math
+import re
+from typing import Dict, List, Sequence
+
+# Média aproximada de caracteres por token em textos jurídicos em português;
+# o valor é conservador para não estourar o contexto do modelo
+CHARS_PER_TOKEN = 3.5
+
+# Pontos de quebra preferidos ao dividir uma página grande
+_SENTENCE_END = re.compile(r'(?<=[.;:!?])\s+')
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa local do número de tokens de um texto (sem chamar a API)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Divide um texto maior que o orçamento em partes, preferindo fins de frase."""
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    parts = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        # Frases gigantes (sem pontuação) são cortadas no tamanho máximo
+        while len(sentence) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        parts.append(current)
+    return parts
+
+def chunk_pages(pages: Sequence[str], max_tokens: int) -> List[Dict]:
+    """Agrupa páginas consecutivas em blocos de até `max_tokens` tokens estimados.
+
+    Returns:
+        Lista de blocos com o texto, o intervalo de páginas (base 1, inclusivo)
+        e a estimativa de tokens
+    """
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    first_page = 1
+
+    def flush(last_page: int):
+        nonlocal current, current_tokens
+        if current:
+            text = "\n".join(current)
+            chunks.append({'text': text, 'pages': (first_page, last_page), 'tokens': estimate_tokens(text)})
+        current = []
+        current_tokens = 0
+
+    for number, page in enumerate(pages, start=1):
+        if not page:
+            continue
+        tokens = estimate_tokens(page)
+
+        if tokens > max_tokens:
+            # Página maior que o bloco: fecha o bloco atual e divide a página
+            flush(number - 1)
+            for part in _split_oversized(page, max_tokens):
+                chunks.append({'text': part, 'pages': (number, number), 'tokens': estimate_tokens(part)})
+            first_page = number + 1
+            continue
+
+        if current and current_tokens + tokens > max_tokens:
+            flush(number - 1)
+        if not current:
+            first_page = number
+        current.append(page)
+        current_tokens += tokens
+
+    flush(len(pages))
+    return chunks
+
+def chunk_budget(pages: Sequence[str], workers: int, min_tokens: int, max_tokens: int) -> int:
+    """Tamanho dos blocos para que `chunk_pages` gere no máximo `workers` blocos.
+
+    Cada bloco, menos o último, passa de `tamanho - maior página` tokens;
+    somando a maior página à divisão por igual, o map roda em uma só leva de
+    chamadas paralelas. O resultado fica entre `min_tokens` (blocos menores
+    só multiplicam as chamadas) e `max_tokens` (o que cabe no contexto).
+    """
+    tokens = [estimate_tokens(page) for page in pages if page]
+    if not tokens:
+        return max(1, min(min_tokens, max_tokens))
+    # Conta também as quebras de linha que `chunk_pages` põe entre as páginas
+    share = math.ceil((sum(tokens) + len(tokens)) / max(1, workers)) + max(tokens)
+    return max(1, min(max(share, min_tokens), max_tokens))
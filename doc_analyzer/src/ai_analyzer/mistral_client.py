@@ -1,26 +1,131 @@
 import os
+import asyncio
+import hashlib
 import logging
-from mistralai.client import MistralClient
+import threading
+from collections import OrderedDict
 from mistralai.models.chat_completion import ChatMessage
-from typing import Dict, List, Optional
-import yaml
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
 import re
 from datetime import datetime
+from src.ai_analyzer.async_client import AsyncMistralClient
+from src.ai_analyzer.chunking import chunk_budget, chunk_pages, estimate_tokens
+from src.ai_analyzer.response_cache import LLMResponseCache
 from src.knowledge_base.legal_knowledge import LegalKnowledgeBase
+from src.pdf_processor.extraction_cache import ExtractionCache
+from src.pdf_processor.field_extractor import FieldExtractor
+from src.pdf_processor.ocr_fallback import OCRFallback
+from src.pdf_processor.page_index import PageIndexedText
 from src.pdf_processor.pdf_reader import PDFReader
+from src.rules_engine.registry import CompiledRules, RulesRegistry, get_registry
+from src.utils.telemetry import configure_telemetry, span
+
+if TYPE_CHECKING:
+    # Usa o numpy: importado só na primeira pergunta ou em `warm_up`
+    from src.ai_analyzer.passage_index import PassageIndex
 
 logger = logging.getLogger(__name__)
 
+# Quantidade de índices de trechos mantidos em memória (um por documento)
+PASSAGE_INDEX_CACHE_SIZE = 8
+
+# Pontos cobertos pela análise estruturada (também pedidos a cada trecho no map-reduce)
+ANALYSIS_POINTS = """1. Assunto principal da Notícia de Fato
+            2. Origem da notícia/denúncia
+            3. Sujeitos ativo e passivo
+            4. Local e data dos fatos (especialmente do BO)
+            5. Legislação aplicável e tipo penal
+            6. Última manifestação do Promotor e seu desfecho
+            7. Necessidade de encaminhamento a departamento especializado"""
+
+# Instruções de cada trecho no map-reduce
+MAP_PROMPT = """Você é um assistente especializado em análise de documentos jurídicos.
+            Você receberá o trecho {number} de {total} ({unit} {start} a {end}) de um documento maior.
+            Extraia do trecho apenas as informações relevantes para os pontos abaixo, de forma concisa,
+            indicando a página de cada informação. Ignore os pontos não tratados no trecho.
+            {points}"""
+
+def extract_document(file_path: str,
+                     extractor: FieldExtractor,
+                     pdf_reader: Optional[PDFReader] = None,
+                     cache: Optional[ExtractionCache] = None,
+                     rules_version: str = "",
+                     ocr: Optional[OCRFallback] = None) -> Dict:
+    """Carrega um PDF e extrai texto, campos básicos e metadados.
+    
+    Não depende do cliente Mistral, podendo rodar em processos separados.
+    Com `cache`, um PDF já extraído com a mesma versão das regras não é reaberto
+    (nem passa de novo pelo OCR); extrações com páginas digitalizadas que
+    ficaram sem texto não são guardadas, para que o PDF seja lido de novo
+    quando o OCR estiver disponível. `ocr` vale para o leitor criado aqui, quando
+    `pdf_reader` não é informado.
+    """
+    reader = pdf_reader or PDFReader(ocr)
+    
+    with span("extraction_cache") as stage:
+        key = cache.key_for(file_path, rules_version) if cache else None
+        cached = cache.get(key) if cache else None
+        stage.set(cache_hit=bool(cached))
+    if cached:
+        reader.load_pages(cached['pages'], cached['metadata'])
+        reader.ocr_pages = cached.get('ocr_pages', [])
+        logger.info(f"Extração obtida do cache: {file_path}")
+        return {
+            "text": reader.get_text(),
+            "basic_info": cached['basic_info'],
+            "metadata": cached['metadata'],
+            "ocr_pages": reader.ocr_pages,
+            "cache_hit": True
+        }
+    
+    with span("load_pdf") as stage:
+        if not reader.load_pdf(file_path):
+            raise ValueError("Erro ao carregar o arquivo PDF")
+        stage.set(pages=reader.document.page_count, characters=len(reader.document),
+                  ocr_pages=len(reader.ocr_pages))
+    
+    with span("extract_fields") as stage:
+        basic_info = reader.extract_with(extractor)
+        stage.set(fields=len(basic_info))
+    metadata = reader.get_metadata()
+    
+    if cache and reader.unread_pages:
+        logger.info(f"Extração não guardada no cache: {len(reader.unread_pages)} página(s) "
+                    f"digitalizada(s) sem texto em {file_path}")
+    elif cache:
+        cache.put(key, {
+            "pages": reader.get_pages(),
+            "offsets": reader.get_page_offsets(),
+            "basic_info": basic_info,
+            "metadata": metadata,
+            "ocr_pages": reader.ocr_pages
+        })
+    
+    return {
+        "text": reader.get_text(),
+        "basic_info": basic_info,
+        "metadata": metadata,
+        "ocr_pages": reader.ocr_pages,
+        "cache_hit": False
+    }
+
 class MistralAnalyzer:
-    def __init__(self):
+    def __init__(self, registry: Optional[RulesRegistry] = None):
+        """
+        Args:
+            registry: Registro das regras; usa o registro compartilhado se omitido
+        """
+        self.registry = registry
         self.api_key = os.getenv("MISTRAL_API_KEY")
         if not self.api_key:
             raise ValueError("MISTRAL_API_KEY não encontrada nas variáveis de ambiente")
         
-        self.client = MistralClient(api_key=self.api_key)
         self.knowledge_base = LegalKnowledgeBase()
         self.pdf_reader = PDFReader()
+        self._passage_indexes: OrderedDict = OrderedDict()
+        self._passage_lock = threading.Lock()
         self.load_rules()
+        self.client = AsyncMistralClient.from_settings(self.api_key, self.rules.get('settings'))
         self.initialize_knowledge()
     
     def initialize_knowledge(self):
@@ -28,67 +133,100 @@ class MistralAnalyzer:
         logger.info("Inicializando base de conhecimento...")
         self.knowledge_base.initialize()
     
+    def warm_up(self):
+        """Carrega o que só é usado mais adiante (o índice de trechos das perguntas e o numpy).
+        
+        Para ser chamado em segundo plano logo depois de criar o analisador.
+        """
+        import src.ai_analyzer.passage_index  # noqa: F401
+    
     def load_rules(self):
-        """Carrega as regras do arquivo YAML."""
-        rules_path = os.path.join("config", "rules", "dispatch_rules.yaml")
+        """Obtém as regras do registro e cria os caches configurados nelas.
+        
+        As regras são recarregadas pelo registro quando o YAML muda; as
+        configurações dos caches e do cliente da API valem até reiniciar.
+        """
         try:
-            with open(rules_path, 'r', encoding='utf-8') as file:
-                self.rules = yaml.safe_load(file)
-            logger.info("Regras carregadas com sucesso")
+            if self.registry is None:
+                self.registry = get_registry()
+            settings = self.compiled_rules.settings
+            self.extraction_cache = ExtractionCache.from_settings(settings)
+            self.response_cache = LLMResponseCache.from_settings(settings)
+            self.pdf_reader.ocr = OCRFallback.from_settings(settings)
+            self.telemetry = configure_telemetry(settings)
         except Exception as e:
             logger.error(f"Erro ao carregar regras: {str(e)}")
             raise
     
-    def process_document(self, file_path: str) -> Dict:
-        """Processa o documento PDF e retorna a análise estruturada."""
-        # Carrega e processa o PDF
-        if not self.pdf_reader.load_pdf(file_path):
-            raise ValueError("Erro ao carregar o arquivo PDF")
-        
-        text = self.pdf_reader.get_text()
-        
-        # Extrai campos usando os padrões definidos nas regras
-        fields_config = {
-            'numero_noticia_fato': [pattern for item in self.rules['scraping_items'] 
-                                  if item['nome'] == 'numero_noticia_fato' 
-                                  for pattern in item['padroes']],
-            'orgao_origem': [pattern for item in self.rules['scraping_items'] 
-                           if item['nome'] == 'orgao_origem' 
-                           for pattern in item['padroes']],
-            'sujeito_ativo': [pattern for item in self.rules['scraping_items'] 
-                            if item['nome'] == 'sujeito_ativo' 
-                            for pattern in item['padroes']],
-            'sujeito_passivo': [pattern for item in self.rules['scraping_items'] 
-                              if item['nome'] == 'sujeito_passivo' 
-                              for pattern in item['padroes']],
-            'boletim_ocorrencia': [pattern for item in self.rules['scraping_items'] 
-                                 if item['nome'] == 'boletim_ocorrencia' 
-                                 for pattern in item['padroes']],
-            'local_fatos': [pattern for item in self.rules['scraping_items']
-                          if item['nome'] == 'local_fatos'
-                          for pattern in item['padroes']],
-            'tipo_penal': [pattern for item in self.rules['scraping_items']
-                         if item['nome'] == 'tipo_penal'
-                         for pattern in item['padroes']]
-        }
-        
-        basic_info = self.pdf_reader.extract_fields(fields_config)
-        
-        # Enriquece a análise com conhecimento jurídico
-        enriched_info = self._enrich_with_legal_knowledge(basic_info)
-        
-        # Análise específica baseada nas regras
-        analysis_result = self._analyze_with_rules(text, enriched_info)
-        
-        # Determina o método de conclusão (portal ou email)
-        conclusion = self._determine_conclusion_method(analysis_result)
+    @property
+    def compiled_rules(self) -> CompiledRules:
+        """Versão atual das regras compiladas."""
+        return self.registry.get()
+    
+    @property
+    def rules(self) -> Dict:
+        """Conteúdo atual do `dispatch_rules.yaml`."""
+        return self.compiled_rules.data
+    
+    @property
+    def rules_version(self) -> str:
+        """Versão das regras, usada para invalidar o cache de extração."""
+        return self.compiled_rules.version
+    
+    @property
+    def field_extractor(self) -> FieldExtractor:
+        """Extrator de `basic_info` compilado a partir da versão atual das regras."""
+        return self.compiled_rules.field_extractor
+    
+    def process_document(self, file_path: str, force_refresh: bool = False) -> Dict:
+        """Processa o documento PDF e retorna a análise estruturada.
+        
+        Args:
+            file_path: Caminho do PDF
+            force_refresh: Ignora o cache de respostas do LLM e refaz a análise
+        """
+        with span("process_document", file=os.path.basename(file_path)):
+            extracted = self.extract_document(file_path, self.pdf_reader)
+            return self.analyze_extracted(extracted, force_refresh)
+    
+    def extract_document(self, file_path: str, pdf_reader: Optional[PDFReader] = None) -> Dict:
+        """Carrega o PDF e extrai o texto e os campos básicos (etapa sem LLM)."""
+        rules = self.compiled_rules
+        with span("extract_document", file=os.path.basename(file_path)) as stage:
+            extracted = extract_document(file_path, rules.field_extractor, pdf_reader,
+                                         self.extraction_cache, rules.version, self.pdf_reader.ocr)
+            stage.set(cache_hit=extracted['cache_hit'], characters=len(extracted['text']))
+            return extracted
+    
+    def analyze_extracted(self, extracted: Dict, force_refresh: bool = False) -> Dict:
+        """Completa a análise de um documento já extraído por `extract_document`."""
+        return self.client.run(self.aanalyze_extracted(extracted, force_refresh))
+    
+    async def aanalyze_extracted(self, extracted: Dict, force_refresh: bool = False) -> Dict:
+        """Versão assíncrona de `analyze_extracted`, que pode ser cancelada durante as chamadas ao LLM."""
+        text = extracted['text']
+        
+        with span("analyze", characters=len(text)):
+            # Enriquece a análise com conhecimento jurídico
+            with span("enrich_knowledge"):
+                enriched_info = self._enrich_with_legal_knowledge(extracted['basic_info'])
+            
+            # Análise específica baseada nas regras
+            with span("analysis", tokens_estimated=estimate_tokens(text)):
+                analysis_result = await self._analyze_with_rules(text, enriched_info, force_refresh)
+            
+            # Determina o método de conclusão (portal ou email)
+            with span("conclusion") as stage:
+                conclusion = self._determine_conclusion_method(analysis_result)
+                stage.set(method=conclusion['method'])
         
         return {
             "text": text,
             "basic_info": enriched_info,
             "analysis": analysis_result,
             "conclusion": conclusion,
-            "metadata": self.pdf_reader.get_metadata()
+            "metadata": extracted['metadata'],
+            "ocr_pages": extracted.get('ocr_pages', [])
         }
     
     def _enrich_with_legal_knowledge(self, basic_info: Dict) -> Dict:
@@ -109,7 +247,45 @@ class MistralAnalyzer:
         
         return enriched
     
-    def _analyze_with_rules(self, text: str, basic_info: Dict) -> Dict:
+    def _chat(self, messages: List[ChatMessage], force_refresh: bool = False,
+              max_tokens: Optional[int] = None) -> str:
+        """Versão síncrona de `_achat`, para chamadas avulsas."""
+        return self.client.run(self._achat(messages, force_refresh, max_tokens))
+    
+    async def _achat(self, messages: List[ChatMessage], force_refresh: bool = False,
+                     max_tokens: Optional[int] = None) -> str:
+        """Envia as mensagens ao Mistral, reaproveitando respostas do cache quando possível."""
+        settings = self.rules.get('settings', {})
+        model = settings.get('model', 'mistral-medium')
+        temperature = settings.get('temperature')
+        
+        with span("llm", model=model, characters=sum(len(m.content) for m in messages)) as stage:
+            key = None
+            if self.response_cache:
+                key = LLMResponseCache.make_key(model, temperature, max_tokens, messages)
+                cached = self.response_cache.get(key, bypass=force_refresh)
+                if cached is not None:
+                    logger.info("Resposta do LLM obtida do cache")
+                    stage.set(cache_hit=True)
+                    return cached
+            
+            response = await self.client.chat(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            content = response.choices[0].message.content
+            stage.set(cache_hit=False)
+            if response.usage:
+                stage.set(prompt_tokens=response.usage.prompt_tokens,
+                          completion_tokens=response.usage.completion_tokens)
+            
+            if self.response_cache:
+                self.response_cache.put(key, content)
+            return content
+    
+    async def _analyze_with_rules(self, text: str, basic_info: Dict, force_refresh: bool = False) -> Dict:
         """Analisa o documento aplicando as regras específicas."""
         # Prepara o prompt com o conhecimento jurídico relevante
         knowledge_context = self._get_relevant_knowledge(basic_info)
@@ -117,33 +293,38 @@ class MistralAnalyzer:
         # Analisa o desfecho da manifestação do Promotor
         desfecho = self._analyze_promotor_decision(text, basic_info)
         
-        messages = [
-            ChatMessage(role="system", content=f"""Você é um assistente especializado em análise de documentos jurídicos.
+        system_prompt = f"""Você é um assistente especializado em análise de documentos jurídicos.
             Use o seguinte conhecimento jurídico e policial para sua análise:
             {knowledge_context}
             
             Foque sua análise nos seguintes pontos cruciais:
-            1. Assunto principal da Notícia de Fato
-            2. Origem da notícia/denúncia
-            3. Sujeitos ativo e passivo
-            4. Local e data dos fatos (especialmente do BO)
-            5. Legislação aplicável e tipo penal
-            6. Última manifestação do Promotor e seu desfecho
-            7. Necessidade de encaminhamento a departamento especializado
+            {ANALYSIS_POINTS}
             
             {desfecho['context'] if desfecho else ''}
             
-            Forneça uma análise estruturada e objetiva."""),
-            ChatMessage(role="user", content=f"Documento:\n\n{text}")
-        ]
-
-        response = self.client.chat(
-            model="mistral-medium",
-            messages=messages
-        )
-
+            Forneça uma análise estruturada e objetiva."""
+        
+        settings = self.rules.get('settings', {})
+        max_tokens = settings.get('max_tokens')
+        context_tokens = settings.get('context_tokens', 24000)
+        
+        # Documentos que cabem no contexto vão em uma única chamada;
+        # os demais são analisados por trechos (map) e consolidados (reduce)
+        if estimate_tokens(system_prompt) + estimate_tokens(text) <= context_tokens:
+            messages = [
+                ChatMessage(role="system", content=system_prompt),
+                ChatMessage(role="user", content=f"Documento:\n\n{text}")
+            ]
+            content = await self._achat(messages, force_refresh, max_tokens)
+        else:
+            pages = text.split(PageIndexedText.SEPARATOR)
+            chunks = chunk_pages(pages, self._chunk_tokens(pages, max_tokens))
+            logger.info(f"Documento longo ({estimate_tokens(text)} tokens estimados): "
+                        f"análise em {len(chunks)} trechos")
+            content = await self._map_reduce(system_prompt, chunks, force_refresh, max_tokens)
+        
         # Processa a resposta do modelo
-        analysis = self._process_llm_response(response.choices[0].message.content)
+        analysis = self._process_llm_response(content)
         
         # Adiciona o desfecho analisado
         if desfecho:
@@ -151,6 +332,71 @@ class MistralAnalyzer:
         
         return analysis
     
+    def _chunk_tokens(self, pages: List[str], max_tokens: Optional[int] = None) -> int:
+        """Tamanho dos trechos do map-reduce, em tokens estimados.
+        
+        Os trechos são dimensionados para que o map rode em uma só leva de
+        `map_concurrency` chamadas, com ao menos `chunk_tokens` tokens e sem
+        passar do que cabe no contexto ao lado das instruções e da resposta.
+        """
+        settings = self.rules.get('settings', {})
+        workers = max(1, int(settings.get('map_concurrency', 4)))
+        limit = (settings.get('context_tokens', 24000) - estimate_tokens(MAP_PROMPT + ANALYSIS_POINTS)
+                 - (max_tokens or 0))
+        return chunk_budget(pages, workers, settings.get('chunk_tokens', 6000), limit)
+    
+    async def _map_chunks(self, chunks: List[Dict], force_refresh: bool = False,
+                          max_tokens: Optional[int] = None, unit: str = "páginas") -> List[str]:
+        """Analisa cada trecho em paralelo e retorna os resumos parciais, em ordem.
+        
+        `unit` nomeia o que o intervalo de cada trecho conta: páginas do
+        documento ou, nas reduções intermediárias, resumos parciais.
+        """
+        total = len(chunks)
+        workers = max(1, int(self.rules.get('settings', {}).get('map_concurrency', 4)))
+        semaphore = asyncio.Semaphore(workers)
+        
+        async def analyze_chunk(number: int, chunk: Dict) -> str:
+            start, end = chunk['pages']
+            messages = [
+                ChatMessage(role="system", content=MAP_PROMPT.format(number=number, total=total, unit=unit,
+                                                                     start=start, end=end, points=ANALYSIS_POINTS)),
+                ChatMessage(role="user", content=f"Trecho ({unit} {start} a {end}):\n\n{chunk['text']}")
+            ]
+            async with semaphore:
+                summary = await self._achat(messages, force_refresh, max_tokens)
+            return f"[{unit.capitalize()} {start} a {end}]\n{summary}"
+        
+        return list(await asyncio.gather(*(analyze_chunk(number, chunk)
+                                           for number, chunk in enumerate(chunks, start=1))))
+    
+    async def _map_reduce(self, system_prompt: str, chunks: List[Dict], force_refresh: bool = False,
+                          max_tokens: Optional[int] = None) -> str:
+        """Analisa os trechos (map) e consolida os resumos parciais na análise final (reduce).
+        
+        Se os resumos ainda não couberem no contexto, são agrupados e
+        resumidos novamente até caberem.
+        """
+        settings = self.rules.get('settings', {})
+        context_tokens = settings.get('context_tokens', 24000)
+        
+        partials = await self._map_chunks(chunks, force_refresh, max_tokens)
+        while len(partials) > 1 and \
+                estimate_tokens(system_prompt) + sum(estimate_tokens(p) for p in partials) > context_tokens:
+            groups = chunk_pages(partials, self._chunk_tokens(partials, max_tokens))
+            if len(groups) >= len(partials):
+                # Cada resumo já ocupa um grupo inteiro; não há como reduzir mais
+                break
+            partials = await self._map_chunks(groups, force_refresh, max_tokens, unit="resumos parciais")
+        
+        messages = [
+            ChatMessage(role="system", content=system_prompt),
+            ChatMessage(role="user", content="O documento foi analisado por trechos. "
+                        "Consolide as análises parciais abaixo em uma única análise do documento:\n\n"
+                        + "\n\n".join(partials))
+        ]
+        return await self._achat(messages, force_refresh, max_tokens)
+    
     def _analyze_promotor_decision(self, text: str, basic_info: Dict) -> Optional[Dict]:
         """Analisa especificamente a decisão/manifestação do Promotor."""
         if 'ultima_manifestacao_promotor' not in basic_info:
@@ -185,12 +431,14 @@ class MistralAnalyzer:
     def _determine_conclusion_method(self, analysis: Dict) -> Dict:
         """Determina se o documento deve ser processado via portal ou email."""
         # Verifica se é caso para departamento especializado
-        if self._is_specialized_department_case(analysis):
+        candidates = self._route_departments(analysis)
+        if candidates:
             return {
                 "method": "email",
                 "department": analysis.get("departamento_especializado"),
                 "reason": "Caso para departamento especializado",
-                "alerts": self._get_email_alerts(analysis)
+                "alerts": self._get_email_alerts(analysis),
+                "departamentos_candidatos": candidates
             }
         
         # Verifica se é caso fora da capital
@@ -248,30 +496,15 @@ class MistralAnalyzer:
             
         return alerts
 
+    def _route_departments(self, analysis: Dict) -> List[Dict]:
+        """Departamentos especializados em que o tipo penal se enquadra, com as evidências."""
+        if not analysis.get('tipo_penal'):
+            return []
+        return self.compiled_rules.department_router.route(analysis['tipo_penal'])
+    
     def _is_specialized_department_case(self, analysis: Dict) -> bool:
         """Verifica se o caso deve ser encaminhado a departamento especializado."""
-        if not analysis.get('tipo_penal'):
-            return False
-            
-        tipo_penal = analysis['tipo_penal'].lower()
-        
-        # Verifica cada departamento especializado
-        for dep in self.rules['regras_analise']['departamentos_especializados']:
-            # Verifica crimes
-            if 'crimes' in dep and any(crime in tipo_penal for crime in dep['crimes']):
-                return True
-                
-            # Verifica leis específicas
-            if 'leis' in dep and any(lei.lower() in tipo_penal for lei in dep['leis']):
-                return True
-                
-            # Verifica artigos do CP
-            if 'artigos_cp' in dep:
-                for artigo in dep['artigos_cp']:
-                    if re.search(f"art(?:igo)?\\s*{artigo}\\s*(?:do)?\\s*(?:CP|Código\\s*Penal)", tipo_penal, re.IGNORECASE):
-                        return True
-        
-        return False
+        return bool(self._route_departments(analysis))
     
     def _is_outside_capital(self, analysis: Dict) -> bool:
         """Verifica se o local dos fatos é fora da capital."""
@@ -311,27 +544,61 @@ class MistralAnalyzer:
         # Implementa o processamento da resposta
         return {}
     
-    def ask_question(self, text: str, question: str) -> str:
+    def ask_question(self, text: str, question: str, force_refresh: bool = False) -> str:
         """Permite fazer perguntas específicas sobre o documento."""
-        # Obtém conhecimento relevante para a pergunta
-        relevant_knowledge = self._get_relevant_knowledge_for_question(question)
-        
-        messages = [
+        with span("ask_question", characters=len(text)):
+            # Obtém conhecimento relevante para a pergunta
+            with span("knowledge_search"):
+                relevant_knowledge = self._get_relevant_knowledge_for_question(question)
+            document = self._question_context(question, text)
+            return self._chat(self._ask_messages(question, relevant_knowledge, document), force_refresh)
+    
+    def _ask_messages(self, question: str, relevant_knowledge: str, document: str) -> List[ChatMessage]:
+        """Mensagens de `ask_question`."""
+        return [
             ChatMessage(role="system", content=f"""Você é um assistente especializado em análise de documentos jurídicos.
             Use o seguinte conhecimento jurídico e policial para sua resposta:
             {relevant_knowledge}
             
             Responda à pergunta do usuário com base no documento fornecido.
             Seja preciso e objetivo, citando as partes relevantes do documento que fundamentam sua resposta."""),
-            ChatMessage(role="user", content=f"Documento:\n\n{text}\n\nPergunta: {question}")
+            ChatMessage(role="user", content=f"Documento:\n\n{document}\n\nPergunta: {question}")
         ]
-
-        response = self.client.chat(
-            model="mistral-medium",
-            messages=messages
-        )
-
-        return response.choices[0].message.content
+    
+    def passage_index(self, text: str) -> 'PassageIndex':
+        """Índice de trechos do documento, montado uma vez e mantido para as próximas perguntas."""
+        from src.ai_analyzer.passage_index import PassageIndex
+        
+        key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        with self._passage_lock:
+            index = self._passage_indexes.get(key)
+            if index is not None:
+                self._passage_indexes.move_to_end(key)
+                return index
+        
+        words = int(self.rules.get('settings', {}).get('qa_passage_words', 150))
+        index = PassageIndex.from_pages(text.split(PageIndexedText.SEPARATOR), words=words, overlap=words // 5)
+        with self._passage_lock:
+            self._passage_indexes[key] = index
+            while len(self._passage_indexes) > PASSAGE_INDEX_CACHE_SIZE:
+                self._passage_indexes.popitem(last=False)
+        return index
+    
+    def _question_context(self, question: str, text: str) -> str:
+        """Parte do documento enviada junto com uma pergunta.
+        
+        Documentos curtos vão inteiros; nos demais, só os trechos mais
+        relevantes para a pergunta, com a página de cada um.
+        """
+        settings = self.rules.get('settings', {})
+        with span("question_context") as stage:
+            if estimate_tokens(text) <= settings.get('qa_full_context_tokens', 3000):
+                stage.set(excerpts=False, characters=len(text))
+                return text
+            excerpts = self.passage_index(text).excerpts(question, int(settings.get('qa_top_k', 6)))
+            stage.set(excerpts=True, characters=len(excerpts))
+        return ("Trechos do documento mais relevantes para a pergunta, com a página de origem "
+                "(cite as páginas na resposta):\n\n" + excerpts)
     
     def _get_relevant_knowledge_for_question(self, question: str) -> str:
         """Obtém conhecimento relevante para uma pergunta específica."""
@@ -343,32 +610,62 @@ class MistralAnalyzer:
         
         return "\n".join(relevant_info)
 
-    def answer_question(self, question: str, context: str) -> str:
-        """Responde a uma pergunta sobre o documento usando o modelo Mistral."""
-        try:
-            # Prepara o prompt
-            prompt = f"""Com base no seguinte documento, responda à pergunta de forma clara e objetiva.
+    def _question_messages(self, question: str, context: str) -> List[ChatMessage]:
+        """Mensagens de uma pergunta sobre o documento (`answer_question` e `stream_answer`)."""
+        document = self._question_context(question, context)
+        prompt = f"""Com base no seguinte documento, responda à pergunta de forma clara e objetiva.
 
 Documento:
-{context}
+{document}
 
 Pergunta: {question}
 
 Por favor, forneça uma resposta direta e precisa baseada apenas nas informações contidas no documento."""
 
-            # Envia para o Mistral
-            messages = [
-                ChatMessage(role="system", content="Você é um assistente especializado em análise de documentos jurídicos e policiais."),
-                ChatMessage(role="user", content=prompt)
-            ]
-
-            response = self.client.chat(
-                model="mistral-medium",
-                messages=messages
-            )
+        return [
+            ChatMessage(role="system", content="Você é um assistente especializado em análise de documentos jurídicos e policiais."),
+            ChatMessage(role="user", content=prompt)
+        ]
 
-            return response.choices[0].message.content
+    def answer_question(self, question: str, context: str, force_refresh: bool = False) -> str:
+        """Responde a uma pergunta sobre o documento usando o modelo Mistral."""
+        try:
+            # Envia para o Mistral
+            with span("answer_question", characters=len(context)):
+                return self._chat(self._question_messages(question, context), force_refresh)
             
         except Exception as e:
             logger.error(f"Erro ao processar pergunta: {str(e)}")
             raise ValueError(f"Erro ao processar pergunta: {str(e)}")
+
+    async def stream_answer(self, question: str, context: str, force_refresh: bool = False) -> AsyncIterator[str]:
+        """Responde a uma pergunta gerando o texto à medida que o modelo responde.
+        
+        Respostas em cache são entregues de uma vez. Uma resposta só é gravada
+        no cache se chegar completa (não é gravada se a geração for cancelada).
+        """
+        settings = self.rules.get('settings', {})
+        model = settings.get('model', 'mistral-medium')
+        temperature = settings.get('temperature')
+        messages = self._question_messages(question, context)
+        
+        with span("stream_answer", model=model, characters=len(context)) as stage:
+            key = None
+            if self.response_cache:
+                key = LLMResponseCache.make_key(model, temperature, None, messages)
+                cached = self.response_cache.get(key, bypass=force_refresh)
+                if cached is not None:
+                    logger.info("Resposta do LLM obtida do cache")
+                    stage.set(cache_hit=True)
+                    yield cached
+                    return
+            
+            stage.set(cache_hit=False)
+            parts = []
+            async for delta in self.client.stream_chat(model=model, messages=messages, temperature=temperature):
+                parts.append(delta)
+                yield delta
+            stage.set(answer_characters=sum(len(part) for part in parts))
+            
+            if self.response_cache:
+                self.response_cache.put(key, "".join(parts))
@@ -0,0 +1,104 @@
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.text import tokenize
+
+class Passage:
+    """Trecho de uma página do documento."""
+
+    __slots__ = ('page', 'text')
+
+    def __init__(self, page: int, text: str):
+        self.page = page
+        self.text = text
+
+def split_passages(pages: Sequence[str], words: int = 150, overlap: int = 30) -> List[Passage]:
+    """Divide cada página em trechos de até `words` palavras, com `overlap` palavras em comum.
+
+    Os trechos nunca cruzam páginas, para que cada um tenha uma única página
+    de origem (numerada a partir de 1).
+    """
+    step = max(1, words - overlap)
+    passages = []
+    for number, page in enumerate(pages, start=1):
+        tokens = page.split()
+        for start in range(0, max(len(tokens) - overlap, 1), step):
+            chunk = tokens[start:start + words]
+            if chunk:
+                passages.append(Passage(number, " ".join(chunk)))
+    return passages
+
+class PassageIndex:
+    """Índice BM25 dos trechos de um documento, para recuperar só o que importa a uma pergunta.
+
+    As frequências ficam em uma matriz esparsa por termo (formato CSC: para
+    cada termo, os trechos em que aparece e quantas vezes), de modo que uma
+    consulta só toca as listas dos seus próprios termos.
+    """
+
+    def __init__(self, passages: List[Passage], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(len(passages), dtype=np.float32)
+        for doc, passage in enumerate(passages):
+            counts = Counter(tokenize(passage.text))
+            lengths[doc] = sum(counts.values())
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((doc, count))
+
+        self.vocabulary = {term: index for index, term in enumerate(postings)}
+        sizes = [len(entries) for entries in postings.values()]
+        self.indptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self.indptr[1:])
+        flat = [entry for entries in postings.values() for entry in entries]
+        self.doc_ids = np.fromiter((doc for doc, _ in flat), dtype=np.int32, count=len(flat))
+        self.term_freqs = np.fromiter((count for _, count in flat), dtype=np.float32, count=len(flat))
+
+        count = max(len(passages), 1)
+        document_freqs = np.asarray(sizes, dtype=np.float32)
+        self.idf = np.log1p((count - document_freqs + 0.5) / (document_freqs + 0.5))
+        average = float(lengths.mean()) if len(passages) else 0.0
+        # Parte do denominador do BM25 que só depende do tamanho do trecho
+        self.length_norm = k1 * (1 - b + b * lengths / (average or 1.0))
+
+    @classmethod
+    def from_pages(cls, pages: Sequence[str], words: int = 150, overlap: int = 30) -> 'PassageIndex':
+        """Monta o índice a partir do texto de cada página."""
+        return cls(split_passages(pages, words, overlap))
+
+    def _rank(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """(trecho, pontuação) dos `k` trechos mais relevantes, do mais para o menos relevante."""
+        terms = [self.vocabulary[term] for term in set(tokenize(query)) if term in self.vocabulary]
+        if not terms or not self.passages:
+            return []
+
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for term in terms:
+            start, end = self.indptr[term], self.indptr[term + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            scores[docs] += self.idf[term] * tf * (self.k1 + 1) / (tf + self.length_norm[docs])
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(doc), float(scores[doc])) for doc in top]
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, Passage]]:
+        """Os `k` trechos mais relevantes para a consulta, do mais para o menos relevante."""
+        return [(score, self.passages[doc]) for doc, score in self._rank(query, k)]
+
+    def excerpts(self, query: str, k: int = 5) -> str:
+        """Trechos mais relevantes formatados com a página de origem, na ordem do documento.
+
+        Se nenhum termo da consulta aparece no documento, usa os primeiros trechos.
+        """
+        docs = sorted(doc for doc, _ in self._rank(query, k)) or range(min(k, len(self.passages)))
+        return "\n\n".join(f"[Página {self.passages[doc].page}] {self.passages[doc].text}" for doc in docs)
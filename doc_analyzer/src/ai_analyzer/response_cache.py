@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+from src.utils.sqlite_cache import SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache(SQLiteCache):
+    """Cache em disco das respostas do LLM.
+
+    A chave é o modelo, a temperatura, o limite de tokens e um hash da lista
+    completa de mensagens. As entradas expiram após `ttl_seconds` e, quando
+    o tamanho total passa de `max_bytes`, as menos usadas são removidas.
+    Com `bypass` ligado, o cache não é consultado (mas continua sendo
+    atualizado), o que força uma nova análise.
+    """
+
+    def __init__(self,
+                 db_path: str = 'cache/llm/responses.sqlite3',
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 bypass: bool = False):
+        super().__init__(db_path, [
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)"
+        ])
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict]) -> Optional['LLMResponseCache']:
+        """Cria o cache a partir de `settings.llm_cache` do YAML, ou None se desabilitado."""
+        config = (settings or {}).get('llm_cache') or {}
+        if not config.get('enabled', False):
+            return None
+        try:
+            return cls(
+                db_path=config.get('path', 'cache/llm/responses.sqlite3'),
+                ttl_seconds=float(config.get('ttl_hours', 168)) * 3600,
+                max_bytes=int(config.get('max_size_mb', 64)) * 1024 * 1024
+            )
+        except Exception as e:
+            logger.warning(f"Cache de respostas do LLM desabilitado: {str(e)}")
+            return None
+
+    @staticmethod
+    def make_key(model: str, temperature: Optional[float], max_tokens: Optional[int], messages: List) -> str:
+        """Gera a chave a partir dos parâmetros da chamada e das mensagens."""
+        payload = json.dumps({
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'messages': [[m.role, m.content] if hasattr(m, 'role') else [m['role'], m['content']]
+                         for m in messages]
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, bypass: bool = False) -> Optional[str]:
+        """Retorna a resposta armazenada, ou None se ausente, expirada ou ignorada."""
+        if bypass or self.bypass:
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        content = None
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute("SELECT content, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    content = row[0]
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                elif row:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache de respostas: {str(e)}")
+
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return content
+
+    def put(self, key: str, content: str):
+        """Armazena uma resposta e aplica os limites de validade e tamanho."""
+        try:
+            now = time.time()
+            size = len(content.encode('utf-8'))
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, content, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, content, size, now, now)
+                )
+                conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+                self._evict_lru(conn, 'responses', max_bytes=self.max_bytes)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache de respostas: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de acertos, faltas e consultas ignoradas."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'bypassed': self.bypassed}
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
@@ -0,0 +1,271 @@
+"""
+Modo em lote (sem interface gráfica) para processar uma pasta de PDFs.
+
+Uso:
+    python -m src.batch <diretorio> [--output resultados] [--workers N] [--llm-workers N]
+                        [--drafts drafts] [--send]
+
+A extração (PyMuPDF + regex) roda em um pool de processos e as chamadas ao
+Mistral rodam em um pool limitado de threads, em paralelo com a extração dos
+documentos seguintes. Com `--drafts` e/ou `--send`, os documentos cuja
+conclusão é o envio por email geram a requisição ao departamento, gravada
+como rascunho e enviada por SMTP (`settings.smtp`) ao fim do lote,
+reaproveitando as conexões (ver `EmailManager.dispatch`).
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.ai_analyzer.mistral_client import MistralAnalyzer, extract_document
+from src.email_sender.smtp_sender import SMTPSender
+from src.pdf_processor.extraction_cache import ExtractionCache
+from src.pdf_processor.ocr_fallback import OCRFallback
+from src.rules_engine.registry import DEFAULT_RULES_PATH, RulesRegistry, get_registry
+from src.utils.telemetry import configure_telemetry, span
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = str(DEFAULT_RULES_PATH)
+SUMMARY_FILE = "resumo_lote.json"
+DEFAULT_TEMPLATE = "requisicao_padrao"
+
+# Registro das regras, cache de extração e OCR de cada processo do pool de extração
+_worker_registry: Optional[RulesRegistry] = None
+_worker_cache: Optional[ExtractionCache] = None
+_worker_ocr: Optional[OCRFallback] = None
+
+def _init_extraction_worker(rules_path: str):
+    """Carrega as regras uma única vez por processo do pool."""
+    global _worker_registry, _worker_cache, _worker_ocr
+    _worker_registry = get_registry(rules_path)
+    settings = _worker_registry.get().settings
+    _worker_cache = ExtractionCache.from_settings(settings)
+    _worker_ocr = OCRFallback.from_settings(settings)
+    # Os processos do pool só gravam os spans; as métricas ficam com o processo principal
+    configure_telemetry(settings, prometheus=False)
+
+def _extract_worker(file_path: str) -> Dict:
+    """Extrai um documento dentro de um processo do pool."""
+    start = time.perf_counter()
+    rules = _worker_registry.get()
+    with span("extract_document", file=os.path.basename(file_path)) as stage:
+        extracted = extract_document(file_path, rules.field_extractor, cache=_worker_cache,
+                                     rules_version=rules.version, ocr=_worker_ocr)
+        stage.set(cache_hit=extracted['cache_hit'], characters=len(extracted['text']))
+    extracted['extraction_seconds'] = time.perf_counter() - start
+    return extracted
+
+def find_pdfs(directory: str) -> List[Path]:
+    """Lista os PDFs do diretório, em ordem alfabética."""
+    return sorted(p for p in Path(directory).iterdir() if p.is_file() and p.suffix.lower() == '.pdf')
+
+def write_result(output_dir: Path, pdf: Path, result: Dict, include_text: bool = False) -> Path:
+    """Grava o resultado de um documento em `<output_dir>/<nome>.json`."""
+    data = dict(result)
+    if not include_text:
+        data.pop('text', None)
+    data['arquivo'] = pdf.name
+
+    path = Path(output_dir) / f"{pdf.stem}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    return path
+
+def email_request(result: Dict, template: str = DEFAULT_TEMPLATE) -> Optional[Tuple[str, Dict, str]]:
+    """Requisição (template, dados, departamento) do email de um documento, quando a conclusão é o envio por email."""
+    conclusion = result.get('conclusion') or {}
+    if conclusion.get('method') != 'email':
+        return None
+
+    department = conclusion.get('department')
+    if not department and conclusion.get('departamentos_candidatos'):
+        department = conclusion['departamentos_candidatos'][0]['departamento']
+    data = {**result.get('basic_info', {}), **(result.get('analysis') or {})}
+    return template, data, department or ''
+
+class BatchProcessor:
+    """Processa vários PDFs, gravando um JSON por documento e um resumo do lote."""
+
+    def __init__(self,
+                 output_dir: str = 'resultados',
+                 workers: Optional[int] = None,
+                 llm_workers: int = 4,
+                 extract_only: bool = False,
+                 include_text: bool = False,
+                 force_refresh: bool = False,
+                 rules_path: str = RULES_PATH,
+                 drafts_dir: Optional[str] = None,
+                 send: bool = False,
+                 template: str = DEFAULT_TEMPLATE):
+        self.output_dir = Path(output_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.llm_workers = max(1, llm_workers)
+        self.extract_only = extract_only
+        self.include_text = include_text
+        self.force_refresh = force_refresh
+        self.rules_path = rules_path
+        self.analyzer = None if extract_only else MistralAnalyzer(get_registry(rules_path))
+
+        # Emails de requisição (sem análise não há conclusão, nem email)
+        self.drafts_dir = drafts_dir
+        self.template = template
+        self.email_manager = None
+        self.sender = None
+        if self.analyzer and (drafts_dir or send):
+            from src.email_sender.email_manager import EmailManager
+
+            self.email_manager = EmailManager()
+            if template not in self.email_manager.templates:
+                logger.warning(f"Template '{template}' não encontrado; emails de requisição não serão gerados")
+                self.email_manager = None
+        if self.email_manager and send:
+            self.sender = SMTPSender.from_settings(self.analyzer.rules.get('settings'))
+            if self.sender is None:
+                logger.warning("Envio por SMTP desabilitado em settings.smtp; os emails não serão enviados")
+
+    def run(self, directory: str) -> Dict:
+        """Processa todos os PDFs do diretório e retorna o resumo do lote."""
+        pdfs = find_pdfs(directory)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"{len(pdfs)} PDF(s) encontrados em {directory}")
+
+        start = time.perf_counter()
+        failures = []
+        processed = 0
+        extraction_seconds = 0.0
+        llm_seconds = 0.0
+        email_requests = []
+
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_extraction_worker,
+                                 initargs=(self.rules_path,)) as extraction_pool, \
+             ThreadPoolExecutor(max_workers=self.llm_workers) as llm_pool:
+
+            extraction_futures = {extraction_pool.submit(_extract_worker, str(pdf)): pdf for pdf in pdfs}
+            llm_futures = {}
+
+            # Encaminha cada documento ao LLM assim que sua extração termina
+            for future in as_completed(extraction_futures):
+                pdf = extraction_futures[future]
+                try:
+                    extracted = future.result()
+                except Exception as e:
+                    logger.error(f"Erro ao extrair {pdf.name}: {str(e)}")
+                    failures.append({'arquivo': pdf.name, 'etapa': 'extracao', 'erro': str(e)})
+                    continue
+
+                extraction_seconds += extracted.pop('extraction_seconds')
+                if self.extract_only:
+                    self._write_result(pdf, extracted)
+                    processed += 1
+                else:
+                    llm_futures[llm_pool.submit(self._analyze, extracted)] = pdf
+
+            for future in as_completed(llm_futures):
+                pdf = llm_futures[future]
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    logger.error(f"Erro ao analisar {pdf.name}: {str(e)}")
+                    failures.append({'arquivo': pdf.name, 'etapa': 'analise', 'erro': str(e)})
+                    continue
+
+                llm_seconds += seconds
+                self._write_result(pdf, result)
+                processed += 1
+                request = email_request(result, self.template) if self.email_manager else None
+                if request:
+                    email_requests.append(request)
+
+        # Rascunhos e envio de todos os emails do lote, pelas mesmas conexões SMTP
+        report = None
+        if email_requests:
+            report = self.email_manager.dispatch(email_requests, self.drafts_dir, self.sender)
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            'diretorio': str(directory),
+            'data': datetime.now().isoformat(),
+            'total': len(pdfs),
+            'processados': processed,
+            'falhas': failures,
+            'tempo_total_s': round(elapsed, 3),
+            'documentos_por_s': round(processed / elapsed, 3) if elapsed else 0.0,
+            'tempo_extracao_s': round(extraction_seconds, 3),
+            'tempo_llm_s': round(llm_seconds, 3),
+            'workers': self.workers,
+            'llm_workers': self.llm_workers
+        }
+        if self.email_manager:
+            summary['emails'] = len(email_requests)
+            summary['envio'] = report.as_dict() if report else None
+
+        with open(self.output_dir / SUMMARY_FILE, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"Lote concluído: {processed}/{len(pdfs)} documentos em {elapsed:.1f}s "
+                    f"({summary['documentos_por_s']} doc/s), {len(failures)} falha(s)")
+        return summary
+
+    def _analyze(self, extracted: Dict):
+        """Executa a etapa de LLM de um documento já extraído."""
+        start = time.perf_counter()
+        result = self.analyzer.analyze_extracted(extracted, self.force_refresh)
+        return result, time.perf_counter() - start
+
+    def _write_result(self, pdf: Path, result: Dict):
+        write_result(self.output_dir, pdf, result, self.include_text)
+
+def main():
+    parser = argparse.ArgumentParser(description="Processa em lote uma pasta de Notícias de Fato em PDF.")
+    parser.add_argument('directory', help="Diretório com os PDFs")
+    parser.add_argument('--output', default='resultados', help="Diretório de saída dos JSONs")
+    parser.add_argument('--workers', type=int, default=None, help="Processos de extração (padrão: núcleos da CPU)")
+    parser.add_argument('--llm-workers', type=int, default=4, help="Chamadas simultâneas ao Mistral")
+    parser.add_argument('--extract-only', action='store_true', help="Apenas extrai os campos, sem chamar o LLM")
+    parser.add_argument('--include-text', action='store_true', help="Inclui o texto completo no JSON de cada documento")
+    parser.add_argument('--force-refresh', action='store_true', help="Ignora o cache de respostas do LLM")
+    parser.add_argument('--drafts', help="Grava os emails de requisição como rascunhos (.eml) neste diretório")
+    parser.add_argument('--send', action='store_true', help="Envia os emails de requisição por SMTP (settings.smtp)")
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help="Template de email (config/templates)")
+    args = parser.parse_args()
+
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/batch.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    processor = BatchProcessor(
+        output_dir=args.output,
+        workers=args.workers,
+        llm_workers=args.llm_workers,
+        extract_only=args.extract_only,
+        include_text=args.include_text,
+        force_refresh=args.force_refresh,
+        drafts_dir=args.drafts,
+        send=args.send,
+        template=args.template
+    )
+    summary = processor.run(args.directory)
+
+    if summary['falhas'] or (summary.get('envio') or {}).get('falhas'):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,11 @@ import yaml
 import logging
 from pathlib import Path
 from string import Template
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import smtplib
+
+from src.email_sender.smtp_sender import SendReport, SMTPSender
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,14 +20,28 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Emails dos departamentos destinatários
+DEPARTMENT_EMAILS = {
+    'DEIC': 'deic@policiacivil.sp.gov.br',
+    'DEINTER': 'deinter@policiacivil.sp.gov.br',
+    'DECRADI': 'decradi@policiacivil.sp.gov.br',
+    'DECAP': 'decap@policiacivil.sp.gov.br',
+    'DHPP': 'dhpp@policiacivil.sp.gov.br',
+    'DPPC': 'dppc@policiacivil.sp.gov.br'
+}
+
 class EmailManager:
-    def __init__(self, templates_dir: str = 'config/templates'):
+    def __init__(self,
+                 templates_dir: str = 'config/templates',
+                 sender_address: str = "seu_email@mp.sp.gov.br"):  # Configurar email correto
         """Inicializa o gerenciador de emails.
         
         Args:
             templates_dir: Diretório contendo os templates de email
+            sender_address: Remetente dos emails
         """
         self.templates_dir = Path(templates_dir)
+        self.sender_address = sender_address
         self.templates = self._load_templates()
         
     def _load_templates(self) -> Dict[str, Template]:
@@ -62,7 +77,7 @@ class EmailManager:
             # Cria o email
             msg = MIMEMultipart()
             msg['Subject'] = f"Requisição de Instauração - {data.get('numero_nf', 'N/A')}"
-            msg['From'] = "seu_email@mp.sp.gov.br"  # Configurar email correto
+            msg['From'] = self.sender_address
             msg['To'] = self._get_department_email(department)
 
             # Preenche o template
@@ -77,40 +92,104 @@ class EmailManager:
 
     def _get_department_email(self, department: str) -> str:
         """Retorna o email do departamento."""
-        # Carregar de um arquivo de configuração ou usar um dicionário
-        department_emails = {
-            'DEIC': 'deic@policiacivil.sp.gov.br',
-            'DEINTER': 'deinter@policiacivil.sp.gov.br',
-            'DECRADI': 'decradi@policiacivil.sp.gov.br',
-            'DECAP': 'decap@policiacivil.sp.gov.br',
-            'DHPP': 'dhpp@policiacivil.sp.gov.br',
-            'DPPC': 'dppc@policiacivil.sp.gov.br'
-        }
-        return department_emails.get(department, '')
+        return DEPARTMENT_EMAILS.get(department, '')
 
     def save_draft(self, 
                    email: MIMEMultipart, 
-                   output_dir: str = 'drafts') -> bool:
+                   output_dir: str = 'drafts',
+                   department: str = '') -> bool:
         """Salva o email como rascunho.
         
         Args:
             email: Email formatado
             output_dir: Diretório para salvar o rascunho
+            department: Departamento destinatário, incluído no nome do arquivo
             
         Returns:
             True se salvou com sucesso, False caso contrário
         """
         try:
             os.makedirs(output_dir, exist_ok=True)
-            filename = f"draft_{email['Subject'].replace(' ', '_')}.eml"
-            path = os.path.join(output_dir, filename)
-            
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(email.as_string())
-            
+            path = self._write_draft(email, output_dir, department)
             logger.info(f"Rascunho salvo em: {path}")
             return True
 
         except Exception as e:
             logger.error(f"Erro ao salvar rascunho: {str(e)}")
             return False
+
+    def _write_draft(self, email: MIMEMultipart, output_dir: str, department: str = '') -> str:
+        """Grava o rascunho sem sobrescrever outro: nomes repetidos recebem um sufixo (_2, _3, ...)."""
+        name = '_'.join(part for part in (department, email['Subject']) if part)
+        # O número da NF pode ter barras (ex.: "N/A")
+        name = name.replace(' ', '_').replace('/', '-').replace('\\', '-')
+        base = os.path.join(output_dir, f"draft_{name}")
+        path = f"{base}.eml"
+        suffix = 1
+        while True:
+            try:
+                # 'x' falha se o arquivo já existe, mesmo com outra thread gravando o mesmo nome
+                with open(path, 'x', encoding='utf-8') as f:
+                    f.write(email.as_string())
+                return path
+            except FileExistsError:
+                suffix += 1
+                path = f"{base}_{suffix}.eml"
+
+    def create_emails(self,
+                      requests: Iterable[Tuple[str, Dict, str]]) -> Iterator[Tuple[str, MIMEMultipart]]:
+        """Cria os emails de várias requisições, um de cada vez, à medida que são consumidos.
+        
+        Args:
+            requests: Tuplas (template, dados, departamento), como em `create_email`
+            
+        Returns:
+            Iterador de (departamento, email); as requisições com erro são ignoradas (e registradas no log)
+        """
+        for template_name, data, department in requests:
+            email = self.create_email(template_name, data, department)
+            if email is not None:
+                yield department, email
+
+    def save_drafts(self,
+                    emails: Iterable[Tuple[str, MIMEMultipart]],
+                    output_dir: str = 'drafts') -> Iterator[Tuple[str, MIMEMultipart]]:
+        """Grava cada email como rascunho e o repassa adiante (para `send_emails`, por exemplo).
+        
+        Os arquivos são gravados à medida que os emails chegam, sem montar o lote
+        inteiro em memória; um rascunho que falha não interrompe os demais.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        saved = 0
+        for department, email in emails:
+            try:
+                self._write_draft(email, output_dir, department)
+                saved += 1
+            except Exception as e:
+                logger.error(f"Erro ao salvar rascunho: {str(e)}")
+            yield department, email
+        logger.info(f"{saved} rascunho(s) salvos em: {output_dir}")
+
+    def send_emails(self,
+                    emails: Iterable[Tuple[str, MIMEMultipart]],
+                    sender: SMTPSender) -> SendReport:
+        """Envia os emails reaproveitando as conexões SMTP de `sender` (ver `SMTPSender`)."""
+        return sender.send_many(emails)
+
+    def dispatch(self,
+                 requests: Iterable[Tuple[str, Dict, str]],
+                 drafts_dir: Optional[str] = 'drafts',
+                 sender: Optional[SMTPSender] = None) -> Optional[SendReport]:
+        """Cria os emails de um lote, grava os rascunhos e (com `sender`) envia, tudo em fluxo.
+        
+        Returns:
+            Relatório do envio, ou None se não houve envio
+        """
+        emails = self.create_emails(requests)
+        if drafts_dir:
+            emails = self.save_drafts(emails, drafts_dir)
+        if sender is None:
+            for _ in emails:
+                pass
+            return None
+        return self.send_emails(emails, sender)
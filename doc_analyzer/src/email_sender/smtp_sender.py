@@ -0,0 +1,218 @@
+import logging
+import os
+import smtplib
+import ssl
+import threading
+import time
+from email.message import Message
+from queue import Queue
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SMTPServer:
+    """Endereço e credenciais de um servidor SMTP."""
+
+    __slots__ = ('host', 'port', 'starttls', 'use_ssl', 'username', 'password', 'timeout')
+
+    def __init__(self,
+                 host: str,
+                 port: int = 25,
+                 starttls: bool = False,
+                 use_ssl: bool = False,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config: Dict, defaults: Optional['SMTPServer'] = None) -> 'SMTPServer':
+        """Servidor descrito no YAML; o que faltar vem de `defaults` (as credenciais, das variáveis de ambiente)."""
+        def value(key, attribute, default):
+            if key in config:
+                return config[key]
+            return getattr(defaults, attribute) if defaults else default
+
+        username = os.getenv(config['username_env']) if config.get('username_env') else None
+        password = os.getenv(config['password_env']) if config.get('password_env') else None
+        return cls(
+            host=value('host', 'host', 'localhost'),
+            port=int(value('port', 'port', 25)),
+            starttls=bool(value('starttls', 'starttls', False)),
+            use_ssl=bool(value('ssl', 'use_ssl', False)),
+            username=username if username is not None else (defaults.username if defaults else None),
+            password=password if password is not None else (defaults.password if defaults else None),
+            timeout=float(value('timeout_s', 'timeout', 30))
+        )
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.host, self.port
+
+    def connect(self) -> smtplib.SMTP:
+        """Abre uma conexão autenticada (STARTTLS/SSL conforme configurado)."""
+        if self.use_ssl:
+            connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                          context=ssl.create_default_context())
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls and not self.use_ssl:
+                connection.starttls(context=ssl.create_default_context())
+            if self.username:
+                connection.login(self.username, self.password or '')
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+class SendReport:
+    """Resultado de um envio em lote."""
+
+    __slots__ = ('sent', 'failures', 'connections', 'seconds', '_lock')
+
+    def __init__(self):
+        self.sent = 0
+        # [{'para', 'assunto', 'erro'}]
+        self.failures: List[Dict] = []
+        self.connections = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_sent(self):
+        with self._lock:
+            self.sent += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def add_failure(self, email: Message, error: str):
+        logger.error(f"Erro ao enviar '{email['Subject']}' para {email['To'] or '(sem destinatário)'}: {error}")
+        with self._lock:
+            self.failures.append({'para': email['To'], 'assunto': email['Subject'], 'erro': error})
+
+    def as_dict(self) -> Dict:
+        return {'enviados': self.sent, 'falhas': self.failures, 'conexoes': self.connections,
+                'tempo_s': round(self.seconds, 3)}
+
+class SMTPSender:
+    """Envia emails em lote reaproveitando conexões SMTP.
+
+    Cada servidor (o padrão ou o configurado para o departamento) recebe
+    até `connections` conexões persistentes em paralelo; cada conexão envia
+    muitas mensagens seguidas e só é fechada no fim do lote. As mensagens
+    são consumidas à medida que o iterável as produz, com no máximo
+    `queue_size` aguardando envio por servidor. Uma conexão derrubada pelo
+    servidor é reaberta e a mensagem é tentada mais uma vez.
+    """
+
+    def __init__(self,
+                 server: SMTPServer,
+                 servers: Optional[Dict[str, SMTPServer]] = None,
+                 connections: int = 2,
+                 queue_size: int = 100):
+        self.server = server
+        self.servers = servers or {}
+        self.connections = max(1, connections)
+        self.queue_size = queue_size
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict]) -> Optional['SMTPSender']:
+        """Cria o envio a partir de `settings.smtp` do YAML, ou None se desabilitado."""
+        config = (settings or {}).get('smtp') or {}
+        if not config.get('enabled', False):
+            return None
+        try:
+            server = SMTPServer.from_config(config)
+            servers = {department.upper(): SMTPServer.from_config(server_config, server)
+                       for department, server_config in (config.get('servers') or {}).items()}
+            return cls(server, servers, connections=int(config.get('connections', 2)))
+        except Exception as e:
+            logger.warning(f"Envio de emails por SMTP desabilitado: {str(e)}")
+            return None
+
+    def server_for(self, department: str) -> SMTPServer:
+        return self.servers.get((department or '').upper(), self.server)
+
+    def send_many(self, emails: Iterable[Tuple[str, Message]]) -> SendReport:
+        """Envia as mensagens (departamento, email) e espera todas terminarem."""
+        report = SendReport()
+        start = time.perf_counter()
+        # chave do servidor -> (fila, threads)
+        pools: Dict[Tuple[str, int], Tuple[Queue, List[threading.Thread]]] = {}
+
+        try:
+            for department, email in emails:
+                if not email['To']:
+                    report.add_failure(email, "sem destinatário")
+                    continue
+                server = self.server_for(department)
+                queue, threads = pools.setdefault(server.key, (Queue(self.queue_size), []))
+                # Abre outra conexão quando as existentes não dão conta da fila
+                if len(threads) < self.connections and (not threads or queue.qsize() > 0):
+                    thread = threading.Thread(target=self._worker, args=(server, queue, report),
+                                              name=f"smtp-{server.host}-{len(threads)}", daemon=True)
+                    thread.start()
+                    threads.append(thread)
+                queue.put(email)
+        finally:
+            for queue, threads in pools.values():
+                for _ in threads:
+                    queue.put(None)
+            for _, threads in pools.values():
+                for thread in threads:
+                    thread.join()
+
+        report.seconds = time.perf_counter() - start
+        logger.info(f"{report.sent} email(s) enviados, {len(report.failures)} falha(s), "
+                    f"{report.connections} conexão(ões) SMTP em {report.seconds:.1f}s")
+        return report
+
+    def _worker(self, server: SMTPServer, queue: Queue, report: SendReport):
+        """Envia as mensagens da fila por uma única conexão, reaberta se cair."""
+        connection = None
+        try:
+            while True:
+                email = queue.get()
+                if email is None:
+                    break
+                for attempt in (1, 2):
+                    try:
+                        if connection is None:
+                            connection = server.connect()
+                            report.add_connection()
+                        connection.send_message(email)
+                        report.add_sent()
+                        break
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                        # Mensagem recusada: a conexão continua válida
+                        report.add_failure(email, str(e))
+                        break
+                    except OSError as e:
+                        # Conexão perdida ou recusada (as exceções do smtplib são OSError):
+                        # reabre na próxima tentativa
+                        self._close(connection)
+                        connection = None
+                        if attempt == 2:
+                            report.add_failure(email, str(e))
+                    except Exception as e:
+                        report.add_failure(email, str(e))
+                        break
+        finally:
+            self._close(connection)
+
+    @staticmethod
+    def _close(connection: Optional[smtplib.SMTP]):
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
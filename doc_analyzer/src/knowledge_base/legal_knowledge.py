@@ -1,21 +1,56 @@
 import logging
 import requests
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+from src.knowledge_base.search_index import SearchIndex, flatten_text
 
 logger = logging.getLogger(__name__)
 
+# Seções da base indexadas para `search`: seção -> (tipo do resultado, campo com a chave)
+SEARCH_SECTIONS = {
+    'policia': ('departamento', 'nome'),
+    'legislacao': ('legislacao', 'area'),
+}
+# Seção com o conteúdo das fontes remotas (categoria -> nome -> JSON), indexado com o tipo da categoria
+SOURCES_SECTION = 'fontes'
+
+# Validade dos dados locais (`_fetch_legal_data`/`_fetch_police_data`)
+CACHE_TTL = timedelta(days=1)
+
+# Validade de cada fonte remota, por categoria ou "categoria/nome"
+SOURCE_TTLS = {
+    'legislacao': timedelta(days=7),
+    'jurisprudencia': timedelta(days=1),
+    'policia': timedelta(days=1),
+}
+DEFAULT_SOURCE_TTL = timedelta(days=1)
+
 class LegalKnowledgeBase:
     """Base de conhecimento jurídico e policial."""
     
-    def __init__(self):
-        self.cache_dir = Path("cache/knowledge")
+    def __init__(self, cache_dir: str = "cache/knowledge", max_workers: int = 8, timeout: float = 10):
+        self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.knowledge = {}
         self.last_update = None
+        self.index = SearchIndex()
+        
+        # Atualização das fontes remotas: concorrência, prazo por requisição e validade
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.source_ttls = dict(SOURCE_TTLS)
+        # "categoria/nome" -> {'url', 'etag', 'last_modified', 'fetched_at', 'failed_at', 'error'}
+        self.source_state: Dict[str, Dict] = {}
+        self._http: Optional[requests.Session] = None
+        self._lock = threading.RLock()
+        self._refresh_thread: Optional[threading.Thread] = None
         
         # URLs para fontes de dados (exemplo)
         self.sources = {
@@ -95,29 +130,176 @@ class LegalKnowledgeBase:
         }
     
     def initialize(self):
-        """Inicializa a base de conhecimento."""
+        """Inicializa a base de conhecimento.
+        
+        Os dados em cache são usados imediatamente, mesmo vencidos; o que
+        estiver vencido é atualizado em segundo plano (`refresh_async`).
+        Sem cache, os dados locais são montados antes de retornar e só as
+        fontes remotas ficam para o segundo plano.
+        """
         logger.info("Inicializando base de conhecimento jurídica e policial...")
         
         try:
-            # Carrega dados do cache se existirem e forem recentes
             if self._load_from_cache():
                 logger.info("Dados carregados do cache com sucesso")
-                return
-            
-            # Se não houver cache ou estiver desatualizado, busca dados novos
-            self._fetch_legal_data()
-            self._fetch_police_data()
-            self._save_to_cache()
-            
-            logger.info("Base de conhecimento inicializada com sucesso")
-            
+            else:
+                self._fetch_legal_data()
+                self._fetch_police_data()
+                self.last_update = datetime.now()
+                self._save_to_cache()
+                logger.info("Base de conhecimento inicializada com sucesso")
         except Exception as e:
             logger.error(f"Erro ao inicializar base de conhecimento: {str(e)}")
-            # Em caso de erro, tenta usar dados do cache mesmo que antigos
-            self._load_from_cache(force=True)
+        
+        self._refresh_index()
+        if self._is_stale() or self._due_sources():
+            self.refresh_async()
+    
+    def _is_stale(self) -> bool:
+        """Se os dados locais passaram de `CACHE_TTL`."""
+        return self.last_update is None or datetime.now() - self.last_update >= CACHE_TTL
+    
+    def _source_ttl(self, category: str, name: str) -> timedelta:
+        for key in (f"{category}/{name}", category):
+            if key in self.source_ttls:
+                return self.source_ttls[key]
+        return DEFAULT_SOURCE_TTL
+    
+    def _due_sources(self, force: bool = False) -> List[Tuple[str, str, str]]:
+        """Fontes (categoria, nome, url) nunca buscadas, vencidas ou com a URL alterada.
+        
+        Uma fonte que falhou só é tentada de novo depois da mesma validade,
+        contada a partir da falha.
+        """
+        now = datetime.now()
+        due = []
+        for category, urls in self.sources.items():
+            for name, url in urls.items():
+                state = self.source_state.get(f"{category}/{name}") or {}
+                attempts = [state[field] for field in ('fetched_at', 'failed_at') if state.get(field)]
+                if (force or state.get('url') != url or not attempts
+                        or now - datetime.fromisoformat(max(attempts)) >= self._source_ttl(category, name)):
+                    due.append((category, name, url))
+        return due
     
-    def _load_from_cache(self, force=False) -> bool:
-        """Carrega dados do cache se existirem e forem recentes."""
+    def refresh_async(self) -> threading.Thread:
+        """Atualiza a base em uma thread de fundo (uma por vez) e retorna a thread."""
+        with self._lock:
+            if self._refresh_thread is None or not self._refresh_thread.is_alive():
+                self._refresh_thread = threading.Thread(target=self.refresh, name="knowledge-refresh", daemon=True)
+                self._refresh_thread.start()
+            return self._refresh_thread
+    
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a atualização em segundo plano; retorna False se ainda estiver rodando."""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+    
+    def refresh(self, force: bool = False):
+        """Atualiza os dados locais vencidos e busca as fontes remotas vencidas em paralelo.
+        
+        As requisições são condicionais (ETag / If-Modified-Since); uma
+        fonte que falha (ou não responde JSON) mantém os dados anteriores e
+        só é tentada de novo quando a validade vencer.
+        """
+        try:
+            due = self._due_sources(force)
+            results = []
+            if due:
+                logger.info(f"Atualizando {len(due)} fontes da base de conhecimento...")
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(due))) as executor:
+                    results = list(executor.map(lambda source: self._fetch_source(*source), due))
+            
+            with self._lock:
+                if force or self._is_stale():
+                    self._fetch_legal_data()
+                    self._fetch_police_data()
+                    self.last_update = datetime.now()
+                for (category, name, _), (state, payload) in zip(due, results):
+                    self.source_state[f"{category}/{name}"] = state
+                    if payload is not None:
+                        self.knowledge.setdefault(SOURCES_SECTION, {}).setdefault(category, {})[name] = payload
+                self._save_to_cache()
+                self._refresh_index()
+        except Exception as e:
+            logger.error(f"Erro ao atualizar base de conhecimento: {str(e)}")
+    
+    def _session(self) -> requests.Session:
+        """Sessão HTTP compartilhada, com um pool de conexões por host do tamanho do paralelismo."""
+        if self._http is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['Accept'] = 'application/json'
+            self._http = session
+        return self._http
+    
+    def _fetch_source(self, category: str, name: str, url: str) -> Tuple[Dict, Optional[object]]:
+        """Busca uma fonte; retorna o novo estado e o conteúdo (None se não mudou ou falhou)."""
+        key = f"{category}/{name}"
+        previous = self.source_state.get(key) or {}
+        # Com a URL alterada, o ETag e a data da versão anterior não valem mais
+        state = dict(previous) if previous.get('url') == url else {'url': url}
+        
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        
+        try:
+            response = self._session().get(url, headers=headers, timeout=self.timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+                try:
+                    payload = response.json()
+                except ValueError:
+                    raise ValueError(f"resposta não é JSON ({response.headers.get('Content-Type', 'sem Content-Type')})")
+        except Exception as e:
+            logger.warning(f"Erro ao buscar fonte {key}: {str(e)}")
+            state.update(failed_at=datetime.now().isoformat(), error=str(e))
+            return state, None
+        
+        state.pop('failed_at', None)
+        state.pop('error', None)
+        state['fetched_at'] = datetime.now().isoformat()
+        if response.status_code == 304:
+            return state, None
+        
+        state.update(
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+        return state, payload
+    
+    def _search_entries(self):
+        """Entradas do índice de busca: (chave, título, resultado, texto) de cada item das seções."""
+        for section, (tipo, key_field) in SEARCH_SECTIONS.items():
+            for name, info in (self.knowledge.get(section) or {}).items():
+                title = name
+                if isinstance(info, dict) and isinstance(info.get('nome'), str):
+                    title = f"{name} {info['nome']}"
+                result = {'tipo': tipo, key_field: name, 'info': info}
+                yield (section, name), title, result, flatten_text(info)
+        
+        for category, sources in (self.knowledge.get(SOURCES_SECTION) or {}).items():
+            for name, payload in (sources or {}).items():
+                result = {'tipo': category, 'fonte': name, 'info': payload}
+                yield (SOURCES_SECTION, category, name), f"{category} {name}", result, flatten_text(payload)
+    
+    def _refresh_index(self):
+        """Atualiza o índice de busca com o conteúdo atual, reindexando só as entradas alteradas."""
+        with self._lock:
+            changed = self.index.sync(self._search_entries())
+        if changed:
+            logger.info(f"Índice de busca atualizado: {changed} entradas alteradas, {len(self.index)} no total")
+    
+    def _load_from_cache(self) -> bool:
+        """Carrega os dados do cache, mesmo vencidos; retorna False se não houver cache válido."""
         cache_file = self.cache_dir / "legal_knowledge.json"
         
         if not cache_file.exists():
@@ -126,14 +308,12 @@ class LegalKnowledgeBase:
         try:
             with open(cache_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                
-            last_update = datetime.fromisoformat(data.get('last_update', '2000-01-01'))
             
-            # Verifica se o cache é recente (menos de 24h) ou se está sendo forçado
-            if force or (datetime.now() - last_update).days < 1:
+            with self._lock:
                 self.knowledge = data.get('knowledge', {})
-                self.last_update = last_update
-                return True
+                self.last_update = datetime.fromisoformat(data.get('last_update', '2000-01-01'))
+                self.source_state = data.get('sources', {})
+            return True
                 
         except Exception as e:
             logger.error(f"Erro ao carregar cache: {str(e)}")
@@ -147,11 +327,15 @@ class LegalKnowledgeBase:
         try:
             data = {
                 'knowledge': self.knowledge,
-                'last_update': datetime.now().isoformat()
+                'last_update': (self.last_update or datetime.now()).isoformat(),
+                'sources': self.source_state
             }
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
+            # Grava em um arquivo temporário e troca, para nunca deixar o cache pela metade
+            temp_file = cache_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, cache_file)
                 
         except Exception as e:
             logger.error(f"Erro ao salvar cache: {str(e)}")
@@ -188,27 +372,15 @@ class LegalKnowledgeBase:
         """Retorna informações sobre uma área jurídica específica."""
         return self.knowledge.get('legislacao', {}).get(area.lower())
     
-    def search(self, query: str) -> List[Dict]:
-        """Pesquisa na base de conhecimento."""
-        results = []
-        query = query.lower()
-        
-        # Pesquisa em departamentos
-        for dep_name, dep_info in self.knowledge.get('policia', {}).items():
-            if query in dep_name.lower() or query in dep_info.get('nome', '').lower():
-                results.append({
-                    'tipo': 'departamento',
-                    'nome': dep_name,
-                    'info': dep_info
-                })
-        
-        # Pesquisa em legislação
-        for area, info in self.knowledge.get('legislacao', {}).items():
-            if query in area or query in str(info).lower():
-                results.append({
-                    'tipo': 'legislacao',
-                    'area': area,
-                    'info': info
-                })
-        
-        return results
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Dict]:
+        """Pesquisa na base de conhecimento.
+        
+        Ignora acentos e maiúsculas e aceita palavras incompletas ("intoler"
+        encontra "Intolerância"). Os resultados vêm do mais para o menos
+        relevante, com a pontuação em 'score'.
+        """
+        with self._lock:
+            if not len(self.index) and self.knowledge:
+                self._refresh_index()
+            
+            return [dict(result, score=round(score, 4)) for score, result in self.index.search(query, limit)]
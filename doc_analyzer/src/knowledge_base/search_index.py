@@ -0,0 +1,137 @@
+import hashlib
+import json
+import math
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.utils.text import tokenize
+
+# Termos de consulta com pelo menos este tamanho também casam como prefixo
+MIN_PREFIX_LENGTH = 3
+
+# Peso de um termo que só casou como prefixo (ex.: "intoler" -> "intolerancia")
+PREFIX_WEIGHT = 0.5
+
+# Peso dos termos do título (chave e nome) em relação ao restante do conteúdo
+TITLE_WEIGHT = 2.0
+
+def flatten_text(value: Any) -> str:
+    """Junta todos os textos de um valor aninhado (dicts, listas, strings e números)."""
+    if isinstance(value, dict):
+        return " ".join(flatten_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(flatten_text(item) for item in value)
+    return "" if value is None else str(value)
+
+class SearchIndex:
+    """Índice invertido por termo, com acentos e maiúsculas normalizados.
+
+    Cada entrada tem um título e um conteúdo; as listas de ocorrências
+    guardam o peso de cada termo em cada entrada (termos do título valem
+    `TITLE_WEIGHT`). Os termos ficam também em uma lista ordenada, para que
+    consultas por prefixo sejam uma busca binária. `sync` atualiza só as
+    entradas novas, alteradas ou removidas.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, float]] = {}
+        self._entries: Dict[Hashable, Tuple[str, Dict, Counter]] = {}
+        self._terms: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _fingerprint(title: str, payload: Dict) -> str:
+        content = json.dumps([title, payload], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def add(self, key: Hashable, title: str, payload: Dict, text: str = ""):
+        """Indexa (ou reindexa) uma entrada. `payload` é o que `search` retorna para ela."""
+        self.remove(key)
+        weights = Counter()
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(text):
+            weights[term] += 1
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms = None
+            postings[key] = weight
+        self._entries[key] = (self._fingerprint(title, payload), payload, weights)
+
+    def remove(self, key: Hashable):
+        """Remove uma entrada, se existir."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for term in entry[2]:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                self._terms = None
+
+    def sync(self, entries: Iterable[Tuple[Hashable, str, Dict, str]]) -> int:
+        """Deixa o índice igual a `entries` (chave, título, payload, texto), reindexando só o que mudou.
+
+        Returns:
+            Quantas entradas foram adicionadas, alteradas ou removidas
+        """
+        changed = 0
+        seen = set()
+        for key, title, payload, text in entries:
+            seen.add(key)
+            current = self._entries.get(key)
+            if current is None or current[0] != self._fingerprint(title, payload):
+                self.add(key, title, payload, text)
+                changed += 1
+        for key in [key for key in self._entries if key not in seen]:
+            self.remove(key)
+            changed += 1
+        return changed
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Termos do índice que casam com um termo da consulta, com o peso do casamento."""
+        matches = [(term, 1.0)] if term in self._postings else []
+        if len(term) < MIN_PREFIX_LENGTH:
+            return matches
+        if self._terms is None:
+            self._terms = sorted(self._postings)
+        position = bisect_left(self._terms, term)
+        while position < len(self._terms) and self._terms[position].startswith(term):
+            if self._terms[position] != term:
+                matches.append((self._terms[position], PREFIX_WEIGHT))
+            position += 1
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Tuple[float, Dict]]:
+        """Entradas que contêm os termos da consulta (ou termos que começam com eles), por relevância.
+
+        A pontuação soma, por termo, o idf vezes o peso amortecido do termo na
+        entrada; termos que só casaram como prefixo valem `PREFIX_WEIGHT`.
+        """
+        count = len(self._entries)
+        if not count:
+            return []
+
+        scores: Dict[Hashable, float] = {}
+        for term in set(tokenize(query)):
+            best: Dict[Hashable, float] = {}
+            for match, match_weight in self._expand(term):
+                postings = self._postings[match]
+                idf = math.log(1 + count / len(postings))
+                for key, weight in postings.items():
+                    score = match_weight * idf * (1 + math.log(weight))
+                    if score > best.get(key, 0.0):
+                        best[key] = score
+            for key, score in best.items():
+                scores[key] = scores.get(key, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(score, self._entries[key][1]) for key, score in ranked]
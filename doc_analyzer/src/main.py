@@ -1,8 +1,8 @@
 import logging
 import os
+import threading
 from dotenv import load_dotenv
 from src.ui.main_window import MainWindow
-from src.ai_analyzer.mistral_client import MistralAnalyzer
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -20,13 +20,21 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def load_analyzer():
+    """Importa e inicializa o analisador (chamada em segundo plano pela janela).
+    
+    O cliente do Mistral, o PyMuPDF, o YAML das regras e a base de
+    conhecimento só são carregados aqui, depois que a janela aparece.
+    """
+    from src.ai_analyzer.mistral_client import MistralAnalyzer
+    analyzer = MistralAnalyzer()
+    threading.Thread(target=analyzer.warm_up, name="analyzer-warm-up", daemon=True).start()
+    return analyzer
+
 def main():
     try:
-        # Inicializa o analisador
-        analyzer = MistralAnalyzer()
-        
-        # Cria e executa a janela principal
-        app = MainWindow(analyzer)
+        # Cria e executa a janela principal; o analisador fica pronto em segundo plano
+        app = MainWindow(load_analyzer)
         app.run()
         
     except Exception as e:
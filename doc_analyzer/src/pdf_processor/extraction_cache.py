@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Dict, Optional
+
+from src.utils.sqlite_cache import SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos blocos lidos ao calcular o hash do PDF
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+class ExtractionCache(SQLiteCache):
+    """Cache em disco dos resultados de extração de PDFs, endereçado pelo conteúdo.
+
+    A chave é o SHA-256 dos bytes do PDF mais a versão do arquivo de regras.
+    Cada entrada guarda o texto normalizado por página, os offsets, o
+    `basic_info` extraído e os metadados, compactados em um banco SQLite.
+    Quando o tamanho total passa de `max_bytes`, as entradas acessadas há
+    mais tempo são removidas (LRU).
+    """
+
+    def __init__(self, db_path: str = 'cache/extraction/extraction.sqlite3', max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(db_path, [
+            """
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_extractions_access ON extractions (last_access)",
+            # Evita recalcular o hash de arquivos que não mudaram
+            """
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            )"""
+        ])
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict]) -> Optional['ExtractionCache']:
+        """Cria o cache a partir de `settings.extraction_cache` do YAML, ou None se desabilitado."""
+        config = (settings or {}).get('extraction_cache') or {}
+        if not config.get('enabled', False):
+            return None
+        try:
+            return cls(
+                db_path=config.get('path', 'cache/extraction/extraction.sqlite3'),
+                max_bytes=int(config.get('max_size_mb', 512)) * 1024 * 1024
+            )
+        except Exception as e:
+            logger.warning(f"Cache de extração desabilitado: {str(e)}")
+            return None
+
+    def file_hash(self, file_path: str) -> str:
+        """SHA-256 do arquivo, reaproveitado enquanto tamanho e mtime não mudarem."""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+        if row:
+            return row[0]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, sha256)
+            )
+        return sha256
+
+    def key_for(self, file_path: str, rules_version: str) -> str:
+        """Chave do cache para um PDF e uma versão das regras."""
+        return f"{self.file_hash(file_path)}:{rules_version}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retorna a extração armazenada para a chave, ou None."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT data FROM extractions WHERE key = ?", (key,)).fetchone()
+                if not row:
+                    return None
+                conn.execute("UPDATE extractions SET last_access = ? WHERE key = ?", (time.time(), key))
+            return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache de extração: {str(e)}")
+            return None
+
+    def put(self, key: str, data: Dict):
+        """Armazena uma extração e aplica o limite de tamanho."""
+        try:
+            blob = zlib.compress(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'))
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO extractions (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time())
+                )
+                self._evict(conn)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache de extração: {str(e)}")
+
+    def _evict(self, conn):
+        """Remove as entradas menos usadas até caber em `max_bytes`."""
+        removed = self._evict_lru(conn, 'extractions', max_bytes=self.max_bytes)
+        if removed:
+            logger.info(f"Cache de extração: {removed} entrada(s) removida(s) por limite de tamanho")
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM extractions")
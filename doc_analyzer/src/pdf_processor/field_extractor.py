@@ -0,0 +1,228 @@
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Flags globais no início de um padrão, ex.: "(?s)..."
+_GLOBAL_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+
+# Caracteres que o `re` (com IGNORECASE) considera equivalentes a outros além
+# do que `str.lower()` faz, ex.: "ı" ~ "i" e "ſ" ~ "s". Se aparecerem no texto
+# em minúsculas, o pré-filtro por literais não é confiável e é desligado.
+_FOLD_EXCEPTIONS = re.compile(
+    "[\u00b5\u0131\u017f\u0345\u0390\u03b0\u03b2\u03b5\u03b8\u03b9\u03ba\u03bc"
+    "\u03c0\u03c1\u03c2\u03c3\u03c6\u03d0\u03d1\u03d5\u03d6\u03f0\u03f1\u03f5"
+    "\u0432\u0434\u043e\u0441\u0442\u044a\u0463\u1c80-\u1c88\u1e61\u1e9b"
+    "\u1fbe\u1fd3\u1fe3\ua64b\ufb05\ufb06]"
+)
+
+# Metacaracteres que encerram um trecho literal
+_META = set(".^$*+?{}[]|()\\")
+# Escapes que representam o próprio caractere
+_ESCAPED_LITERALS = set(".-/:,;'\"#&%@!=<> ")
+# Quantificadores que tornam opcional o que vem antes
+_QUANTIFIERS = set("?*{")
+
+def normalize_pattern(pattern: str) -> str:
+    """Aplica aos padrões do YAML a mesma simplificação usada por `PDFReader.extract_field`."""
+    pattern = pattern.replace("(?<=", "").replace("(?=", "")
+    if "(" in pattern and ")" not in pattern:
+        pattern += ")"
+    return pattern
+
+def _literal_prefix(source: str, position: int) -> Tuple[str, int]:
+    """Lê o trecho literal que começa em `position` e retorna (literal, posição final)."""
+    chars = []
+    while position < len(source):
+        char = source[position]
+        if char == "\\" and source[position + 1:position + 2] in _ESCAPED_LITERALS:
+            char, size = source[position + 1], 2
+        elif char in _META:
+            break
+        else:
+            size = 1
+
+        # Um quantificador depois do caractere o torna opcional
+        if source[position + size:position + size + 1] in _QUANTIFIERS:
+            break
+        chars.append(char)
+        position += size
+    return "".join(chars), position
+
+def _split_top_level(source: str, position: int = 0) -> Tuple[List[int], int]:
+    """Posições dos "|" de nível zero a partir de `position` e a posição do ")" que fecha o nível."""
+    bars = []
+    depth = 0
+    while position < len(source):
+        char = source[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == "[":
+            # Pula a classe de caracteres inteira
+            position = source.find("]", position + 2)
+            if position < 0:
+                break
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            if depth == 0:
+                return bars, position
+            depth -= 1
+        elif char == "|" and depth == 0:
+            bars.append(position)
+        position += 1
+    return bars, len(source)
+
+def literal_anchors(pattern: str) -> Optional[Tuple[str, ...]]:
+    """Literais (em minúsculas) com que toda ocorrência do padrão começa.
+
+    Reconhece padrões iniciados por um literal ou por um grupo de
+    alternativas literais, ex.: "(Origem|Procedente):". Retorna None quando
+    não é possível garantir o prefixo.
+    """
+    source = pattern
+    flags = _GLOBAL_FLAGS.match(source)
+    if flags:
+        if set(flags.group(1)) - set("ims"):
+            return None
+        source = source[flags.end():]
+
+    # Alternativas no nível zero podem começar por qualquer coisa
+    bars, _ = _split_top_level(source)
+    if bars:
+        return None
+
+    if source.startswith("("):
+        if source.startswith("(?:"):
+            start = 3
+        elif source.startswith("(?"):
+            return None
+        else:
+            start = 1
+
+        bars, end = _split_top_level(source, start)
+        if end >= len(source) or source[end + 1:end + 2] in _QUANTIFIERS:
+            return None
+
+        literals = []
+        for begin in [start] + [bar + 1 for bar in bars]:
+            literal, _ = _literal_prefix(source, begin)
+            literals.append(literal)
+    else:
+        literals = [_literal_prefix(source, 0)[0]]
+
+    if not all(literals) or any(len(literal.lower()) != len(literal) for literal in literals):
+        return None
+
+    anchors = tuple(literal.lower() for literal in literals)
+    # Âncoras com caracteres de equivalência especial não são confiáveis
+    if any(_FOLD_EXCEPTIONS.search(anchor) for anchor in anchors):
+        return None
+    return anchors
+
+class _LoweredText:
+    """Versão em minúsculas do texto, montada sob demanda em blocos crescentes.
+
+    Como os campos costumam aparecer nas primeiras páginas, em geral só o
+    início de documentos longos chega a ser convertido.
+    """
+
+    FIRST_CHUNK = 16384
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lowered = ""
+        self.reliable = True
+
+    def _extend(self) -> bool:
+        start = len(self.lowered)
+        raw = self.text[start:start + max(self.FIRST_CHUNK, start)]
+        chunk = raw.lower()
+        # Offsets só coincidem se a conversão preservar o tamanho
+        if len(chunk) != len(raw) or _FOLD_EXCEPTIONS.search(chunk):
+            self.reliable = False
+            return False
+        self.lowered += chunk
+        return True
+
+    def find_first(self, anchors: Tuple[str, ...]) -> Optional[int]:
+        """Primeira posição de qualquer um dos literais, -1 se ausentes ou None se não for confiável."""
+        longest = max(len(anchor) for anchor in anchors)
+        while self.reliable:
+            found = [p for p in (self.lowered.find(anchor) for anchor in anchors) if p >= 0]
+            complete = len(self.lowered) >= len(self.text)
+            # Um literal cortado no fim do bloco poderia começar antes do encontrado
+            if found and (complete or min(found) <= len(self.lowered) - longest):
+                return min(found)
+            if complete:
+                return -1
+            self._extend()
+        return None
+
+class FieldExtractor:
+    """Extrator de campos compilado uma única vez a partir de `scraping_items`.
+
+    Todos os padrões são pré-compilados e, quando possível, associados aos
+    literais com que toda ocorrência começa. Na extração, o texto é passado
+    para minúsculas (só até onde for preciso) e um padrão só é executado se
+    algum de seus literais aparece no texto, a partir da primeira ocorrência.
+
+    O resultado é o mesmo de `PDFReader.extract_fields`: para cada campo vence
+    o primeiro padrão (na ordem do YAML) que casa em qualquer ponto do texto,
+    na sua primeira ocorrência.
+    """
+
+    FLAGS = re.IGNORECASE | re.MULTILINE
+
+    def __init__(self, scraping_items: List[Dict], fields: Optional[Iterable[str]] = None):
+        """
+        Args:
+            scraping_items: Lista `scraping_items` do `dispatch_rules.yaml`
+            fields: Campos a extrair, na ordem desejada; todos se omitido
+        """
+        self.fields: Dict[str, List[Tuple[re.Pattern, Optional[Tuple[str, ...]]]]] = {}
+
+        wanted = list(fields) if fields is not None else [item['nome'] for item in scraping_items]
+        for field in wanted:
+            compiled = []
+            for item in scraping_items:
+                if item['nome'] != field:
+                    continue
+                for pattern in item['padroes']:
+                    pattern = normalize_pattern(pattern)
+                    try:
+                        compiled.append((re.compile(pattern, self.FLAGS), literal_anchors(pattern)))
+                    except re.error as e:
+                        logger.warning(f"Erro ao processar padrão '{pattern}': {str(e)}")
+            self.fields[field] = compiled
+
+    def extract(self, text: str) -> Dict[str, str]:
+        """Extrai todos os campos configurados de uma só vez."""
+        results = {}
+        if not text:
+            return results
+
+        lowered = _LoweredText(text)
+
+        for field, patterns in self.fields.items():
+            for pattern, anchors in patterns:
+                start = 0
+                if anchors:
+                    position = lowered.find_first(anchors)
+                    if position == -1:
+                        continue
+                    if position is not None:
+                        start = position
+                match = pattern.search(text, start)
+
+                if match:
+                    # Se o padrão tem grupos de captura, pega o último grupo não vazio
+                    groups = [g for g in match.groups() if g]
+                    value = groups[-1].strip() if groups else match.group(0).strip()
+                    if value:
+                        results[field] = value
+                    break
+
+        return results
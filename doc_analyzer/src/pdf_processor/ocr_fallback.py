@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from src.pdf_processor.page_index import normalize_page_text
+from src.utils.sqlite_cache import SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+# Abaixo disto, uma página com imagem é tratada como digitalizada
+MIN_PAGE_CHARS = 20
+
+def scanned_pages(document: fitz.Document, pages: List[str], min_chars: int = MIN_PAGE_CHARS) -> List[int]:
+    """Índices das páginas sem camada de texto: quase nenhum texto extraído e ao menos uma imagem."""
+    return [index for index, text in enumerate(pages)
+            if len(text) < min_chars and document[index].get_images(full=False)]
+
+class OCRPageCache(SQLiteCache):
+    """Cache em disco do texto reconhecido por página.
+
+    A chave é o hash do conteúdo da página (fluxo de desenho e imagens),
+    do DPI e do idioma, então a mesma página digitalizada não passa de
+    novo pelo OCR, mesmo dentro de outro PDF. Quando passa de
+    `max_entries`, as entradas acessadas há mais tempo são removidas.
+    """
+
+    def __init__(self, db_path: str = 'cache/ocr/pages.sqlite3', max_entries: int = 20000):
+        super().__init__(db_path, [
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_pages_access ON pages (last_access)"
+        ])
+        self.max_entries = max_entries
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Textos já reconhecidos para as chaves encontradas."""
+        if not keys:
+            return {}
+        try:
+            with self._connect() as conn:
+                placeholders = ",".join("?" * len(keys))
+                rows = conn.execute(f"SELECT key, text FROM pages WHERE key IN ({placeholders})", keys).fetchall()
+                if rows:
+                    conn.executemany("UPDATE pages SET last_access = ? WHERE key = ?",
+                                     [(time.time(), key) for key, _ in rows])
+            return dict(rows)
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache de OCR: {str(e)}")
+            return {}
+
+    def put(self, key: str, text: str):
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO pages (key, text, last_access) VALUES (?, ?, ?)",
+                             (key, text, time.time()))
+                self._evict_lru(conn, 'pages', max_entries=self.max_entries)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache de OCR: {str(e)}")
+
+class OCRFallback:
+    """OCR das páginas sem camada de texto (digitalizadas) de um PDF.
+
+    Uma página passa pelo OCR quando o texto extraído tem menos de
+    `min_chars` caracteres e ela tem alguma imagem; páginas com texto nativo
+    e páginas em branco não são tocadas. As páginas escolhidas são
+    renderizadas em tons de cinza a `dpi` (sequencialmente, pois o PyMuPDF
+    não é seguro entre threads) e reconhecidas pelo Tesseract em paralelo,
+    em até `workers` threads (cada chamada do pytesseract é um processo
+    separado).
+    """
+
+    def __init__(self,
+                 dpi: int = 300,
+                 lang: str = 'por',
+                 workers: Optional[int] = None,
+                 min_chars: int = MIN_PAGE_CHARS,
+                 cache: Optional[OCRPageCache] = None):
+        self.dpi = dpi
+        self.lang = lang
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.min_chars = min_chars
+        self.cache = cache
+        self._available: Optional[bool] = None
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict]) -> Optional['OCRFallback']:
+        """Cria o OCR a partir de `settings.ocr` do YAML, ou None se desabilitado."""
+        config = (settings or {}).get('ocr') or {}
+        if not config.get('enabled', False):
+            return None
+        try:
+            cache = None
+            if config.get('cache', True):
+                cache = OCRPageCache(db_path=config.get('cache_path', 'cache/ocr/pages.sqlite3'))
+            return cls(
+                dpi=int(config.get('dpi', 300)),
+                lang=config.get('lang', 'por'),
+                workers=config.get('workers'),
+                min_chars=int(config.get('min_chars', MIN_PAGE_CHARS)),
+                cache=cache
+            )
+        except Exception as e:
+            logger.warning(f"OCR de páginas digitalizadas desabilitado: {str(e)}")
+            return None
+
+    @property
+    def available(self) -> bool:
+        """Se o pytesseract está instalado (verificado uma vez)."""
+        if self._available is None:
+            try:
+                import pytesseract  # noqa: F401
+                self._available = True
+            except ImportError:
+                logger.warning("pytesseract não instalado; páginas digitalizadas ficarão sem texto")
+                self._available = False
+        return self._available
+
+    def needs_ocr(self, page: fitz.Page, text: str) -> bool:
+        """Página sem camada de texto: quase nenhum texto extraído e ao menos uma imagem."""
+        return len(text) < self.min_chars and bool(page.get_images(full=False))
+
+    def page_key(self, page: fitz.Page) -> str:
+        """Hash do conteúdo da página (fluxo de desenho e imagens), com DPI e idioma."""
+        digest = hashlib.sha256(f"{self.dpi}:{self.lang}".encode('utf-8'))
+        digest.update(page.read_contents())
+        document = page.parent
+        for image in page.get_images(full=False):
+            digest.update(document.xref_stream_raw(image[0]) or b'')
+        return digest.hexdigest()
+
+    def render(self, page: fitz.Page):
+        """Página em tons de cinza no DPI configurado, como imagem PIL."""
+        from PIL import Image
+
+        pixmap = page.get_pixmap(dpi=self.dpi, colorspace=fitz.csGRAY)
+        image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+        image.info['dpi'] = (self.dpi, self.dpi)
+        return image
+
+    def recognize(self, image) -> str:
+        import pytesseract
+
+        return normalize_page_text(pytesseract.image_to_string(image, lang=self.lang))
+
+    def apply(self, document: fitz.Document, pages: List[str]) -> List[int]:
+        """Substitui, em `pages`, o texto das páginas digitalizadas pelo texto do OCR.
+
+        Returns:
+            Índices (base 0) das páginas que receberam texto do OCR
+        """
+        # Páginas com texto nativo nem são abertas de novo
+        candidates = scanned_pages(document, pages, self.min_chars)
+        if not candidates or not self.available:
+            return []
+
+        keys = {index: self.page_key(document[index]) for index in candidates}
+        cached = self.cache.get_many(list(keys.values())) if self.cache else {}
+        for index in candidates:
+            if keys[index] in cached:
+                pages[index] = cached[keys[index]]
+        missing = [index for index in candidates if keys[index] not in cached]
+
+        start = time.perf_counter()
+        failed = set()
+        if missing:
+            # Renderiza à medida que o OCR avança, com no máximo 2 páginas por thread em memória
+            limit = 2 * self.workers
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as executor:
+                pending = {}
+                for position, index in enumerate(missing):
+                    pending[executor.submit(self.recognize, self.render(document[index]))] = index
+                    if len(pending) < limit and position < len(missing) - 1:
+                        continue
+                    done, _ = wait(pending, return_when=ALL_COMPLETED if position == len(missing) - 1
+                                   else FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        try:
+                            pages[index] = future.result()
+                        except Exception as e:
+                            logger.error(f"Erro no OCR da página {index + 1}: {str(e)}")
+                            failed.add(index)
+                            continue
+                        if self.cache:
+                            self.cache.put(keys[index], pages[index])
+
+        logger.info(f"OCR de {len(candidates)} página(s) sem texto ({len(candidates) - len(missing)} do cache) "
+                    f"em {time.perf_counter() - start:.2f}s")
+        return [index for index in candidates if index not in failed]
@@ -0,0 +1,68 @@
+import re
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+# Sequências de espaços em branco colapsadas na normalização de cada página
+_WHITESPACE = re.compile(r'\s+')
+
+PageRange = Tuple[int, int]
+
+def normalize_page_text(text: str) -> str:
+    """Colapsa espaços em branco de uma página em espaços simples."""
+    return _WHITESPACE.sub(' ', text).strip()
+
+class PageIndexedText:
+    """Texto de um documento mantido por página, com tabela de offsets.
+
+    As páginas são unidas por "\\n" apenas quando o texto completo é pedido,
+    e uma única vez. Buscas em intervalos de páginas não materializam o
+    documento inteiro.
+    """
+
+    SEPARATOR = "\n"
+
+    def __init__(self, pages: Optional[Sequence[str]] = None):
+        self.pages: List[str] = list(pages or [])
+        self.offsets: List[int] = []
+
+        position = 0
+        for page in self.pages:
+            self.offsets.append(position)
+            position += len(page) + len(self.SEPARATOR)
+        self._length = max(position - len(self.SEPARATOR), 0)
+        self._text: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Texto completo do documento, montado na primeira chamada."""
+        if self._text is None:
+            self._text = self.SEPARATOR.join(self.pages)
+        return self._text
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def page_at(self, offset: int) -> int:
+        """Retorna o índice (base 0) da página que contém o offset do texto completo."""
+        if not self.offsets:
+            raise IndexError("Documento sem páginas")
+        return max(bisect_right(self.offsets, offset) - 1, 0)
+
+    def page_span(self, index: int) -> PageRange:
+        """Retorna o intervalo [início, fim) da página no texto completo."""
+        start = self.offsets[index]
+        return start, start + len(self.pages[index])
+
+    def page_range_text(self, pages: PageRange) -> str:
+        """Retorna o texto de um intervalo de páginas [início, fim), base 0."""
+        start, end = pages
+        if start == 0 and end >= len(self.pages):
+            return self.text
+        return self.SEPARATOR.join(self.pages[start:end])
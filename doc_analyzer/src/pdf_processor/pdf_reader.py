@@ -2,32 +2,54 @@ import logging
 import fitz  # PyMuPDF
 from typing import Dict, List, Optional
 import re
+from src.pdf_processor.field_extractor import FieldExtractor
+from src.pdf_processor.ocr_fallback import MIN_PAGE_CHARS, OCRFallback, scanned_pages
+from src.pdf_processor.page_index import PageIndexedText, PageRange, normalize_page_text
 
 logger = logging.getLogger(__name__)
 
 class PDFReader:
-    def __init__(self):
+    def __init__(self, ocr: Optional[OCRFallback] = None):
+        """
+        Args:
+            ocr: OCR das páginas sem camada de texto; sem ele, essas páginas ficam vazias
+        """
         self.current_pdf = None
-        self.text_content = ""
+        self.document = PageIndexedText()
         self.metadata = {}
+        self.ocr = ocr
+        # Índices (base 0) das páginas cujo texto veio do OCR
+        self.ocr_pages: List[int] = []
+        # Páginas digitalizadas que ficaram sem texto (OCR desligado, indisponível ou com erro)
+        self.unread_pages: List[int] = []
+    
+    @property
+    def text_content(self) -> str:
+        """Texto completo do PDF (montado sob demanda a partir das páginas)."""
+        return self.document.text
         
     def load_pdf(self, file_path: str) -> bool:
         """Carrega um arquivo PDF e extrai seu conteúdo."""
         try:
+            if self.current_pdf:
+                self.current_pdf.close()
             self.current_pdf = fitz.open(file_path)
-            self.text_content = ""
+            self.document = PageIndexedText()
             self.metadata = {}
+            self.ocr_pages = []
+            self.unread_pages = []
             
-            # Extrai o texto de cada página com timeout
-            for page in self.current_pdf:
-                # Extrai o texto básico
-                text = page.get_text()
-                # Remove caracteres especiais e espaços extras
-                text = re.sub(r'\s+', ' ', text)
-                self.text_content += text + "\n"
+            # Extrai e normaliza o texto de cada página; o texto completo
+            # só é montado quando alguém o pede
+            pages = [normalize_page_text(page.get_text()) for page in self.current_pdf]
             
-            # Remove espaços extras no final
-            self.text_content = self.text_content.strip()
+            # Páginas digitalizadas (sem camada de texto) passam pelo OCR
+            scanned = scanned_pages(self.current_pdf, pages, self.ocr.min_chars if self.ocr else MIN_PAGE_CHARS)
+            if self.ocr and scanned:
+                self.ocr_pages = self.ocr.apply(self.current_pdf, pages)
+            recognized = set(self.ocr_pages)
+            self.unread_pages = [index for index in scanned if index not in recognized]
+            self.document = PageIndexedText(pages)
             
             # Extrai metadados
             self.metadata = self.current_pdf.metadata
@@ -39,10 +61,29 @@ class PDFReader:
             logger.error(f"Erro ao carregar PDF: {str(e)}")
             return False
         
-    def extract_field(self, field_name: str, patterns: List[str]) -> Optional[str]:
-        """Extrai um campo específico do texto usando uma lista de padrões regex."""
-        if not self.text_content:
+    def load_pages(self, pages: List[str], metadata: Optional[Dict] = None):
+        """Carrega um documento já extraído (ex.: do cache), sem abrir o PDF."""
+        if self.current_pdf:
+            self.current_pdf.close()
+            self.current_pdf = None
+        self.document = PageIndexedText(pages)
+        self.metadata = metadata or {}
+        self.ocr_pages = []
+        self.unread_pages = []
+        
+    def extract_field(self, field_name: str, patterns: List[str],
+                      pages: Optional[PageRange] = None) -> Optional[str]:
+        """Extrai um campo específico do texto usando uma lista de padrões regex.
+        
+        Args:
+            field_name: Nome do campo
+            patterns: Padrões regex, em ordem de prioridade
+            pages: Intervalo de páginas [início, fim), base 0; o documento inteiro se omitido
+        """
+        if not self.document:
             return None
+        
+        text = self.document.text if pages is None else self.document.page_range_text(pages)
             
         for pattern in patterns:
             try:
@@ -50,7 +91,7 @@ class PDFReader:
                 pattern = pattern.replace("(?<=", "").replace("(?=", "")
                 if "(" in pattern and ")" not in pattern:
                     pattern += ")"
-                match = re.search(pattern, self.text_content, re.IGNORECASE | re.MULTILINE)
+                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
                 if match:
                     # Se o padrão tem grupos de captura, pega o último grupo não vazio
                     groups = [g for g in match.groups() if g]
@@ -63,17 +104,17 @@ class PDFReader:
                 
         return None
         
-    def extract_fields(self, fields_config: Dict) -> Dict:
+    def extract_fields(self, fields_config: Dict, pages: Optional[PageRange] = None) -> Dict:
         """Extrai múltiplos campos do PDF baseado em uma configuração."""
         results = {}
         
         for field_name, config in fields_config.items():
             if isinstance(config, list):
                 # Se config é uma lista, são apenas padrões
-                value = self.extract_field(field_name, config)
+                value = self.extract_field(field_name, config, pages)
             elif isinstance(config, dict):
                 # Se config é um dict, pode ter padrões e pós-processamento
-                value = self.extract_field(field_name, config['patterns'])
+                value = self.extract_field(field_name, config['patterns'], pages)
                 if value and 'post_process' in config:
                     value = config['post_process'](value)
             
@@ -82,9 +123,24 @@ class PDFReader:
                 
         return results
         
+    def extract_with(self, extractor: FieldExtractor, pages: Optional[PageRange] = None) -> Dict:
+        """Extrai todos os campos de um `FieldExtractor` pré-compilado."""
+        if not self.document:
+            return {}
+        text = self.document.text if pages is None else self.document.page_range_text(pages)
+        return extractor.extract(text)
+        
     def get_text(self) -> str:
         """Retorna o texto completo do PDF."""
         return self.text_content
+    
+    def get_pages(self) -> List[str]:
+        """Retorna o texto normalizado de cada página."""
+        return self.document.pages
+    
+    def get_page_offsets(self) -> List[int]:
+        """Retorna o offset de início de cada página no texto completo."""
+        return self.document.offsets
         
     def get_metadata(self) -> Dict:
         """Retorna os metadados do PDF."""
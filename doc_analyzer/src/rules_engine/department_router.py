@@ -0,0 +1,105 @@
+import re
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Dict, List, Tuple
+
+# Citação de artigo do Código Penal, ex.: "art. 171 do CP", "artigo 313 Código Penal"
+_ARTICLE_CP = re.compile(r'art(?:igo)?\.?\s*(\d+)\s*(?:do)?\s*(?:CP|Código\s*Penal)', re.IGNORECASE)
+
+# Literal presente em toda citação de artigo; sem ele a regex nem é executada
+_ARTICLE_TRIGGER = "art"
+
+def parse_article_range(article) -> Tuple[int, int]:
+    """Converte "268" em (268, 268) e "312-339" em (312, 339)."""
+    start, _, end = str(article).partition('-')
+    return int(start), int(end or start)
+
+class ArticleIndex:
+    """Índice de intervalos de artigos do CP por departamento."""
+
+    def __init__(self, ranges: List[Tuple[int, int, str]]):
+        self._ranges = sorted(ranges)
+        self._starts = [start for start, _, _ in self._ranges]
+        self._max_span = max((end - start for start, end, _ in self._ranges), default=0)
+
+    def lookup(self, article: int) -> List[str]:
+        """Departamentos cujos intervalos contêm o artigo."""
+        found = []
+        position = bisect_right(self._starts, article) - 1
+        # Só intervalos iniciados até `max_span` antes podem conter o artigo
+        while position >= 0 and self._starts[position] >= article - self._max_span:
+            start, end, department = self._ranges[position]
+            if end >= article:
+                found.append(department)
+            position -= 1
+        return found
+
+class DepartmentRouter:
+    """Roteador compilado a partir de `regras_analise.departamentos_especializados`.
+
+    Os crimes e leis de todos os departamentos são reunidos em uma única
+    tabela de termos, sem repetição (ex.: "racismo" aparece em DECRADI e
+    DECAP, mas é buscado uma vez só), e os artigos do CP, inclusive
+    intervalos como "312-339", vão para um índice de intervalos consultado
+    com uma única regex pré-compilada. `route` retorna todos os
+    departamentos que se enquadram, com as evidências encontradas.
+    """
+
+    def __init__(self, departments: List[Dict]):
+        self.departments = [dep['nome'] for dep in departments]
+
+        # Cada termo em minúsculas aponta para (tipo, termo original, departamentos)
+        terms: Dict[str, Tuple[str, str, List[str]]] = {}
+        ranges = []
+        for dep in departments:
+            for kind, key in (('crime', 'crimes'), ('lei', 'leis')):
+                for term in dep.get(key, []):
+                    entry = terms.setdefault(term.lower(), (kind, term, []))
+                    if dep['nome'] not in entry[2]:
+                        entry[2].append(dep['nome'])
+            for article in dep.get('artigos_cp', []):
+                start, end = parse_article_range(article)
+                ranges.append((start, end, dep['nome']))
+
+        self._terms = [(needle, kind, term, names) for needle, (kind, term, names) in terms.items()]
+        self._articles = ArticleIndex(ranges) if ranges else None
+
+    def route(self, text: str) -> List[Dict]:
+        """Departamentos em que o texto se enquadra, na ordem das regras, com as evidências.
+
+        Returns:
+            Lista de {"departamento": nome, "evidencias": [{"tipo", "termo", "posicao"}]},
+            com as evidências na ordem em que aparecem no texto
+        """
+        if not text:
+            return []
+
+        lowered = text.lower()
+        hits = [(lowered.find(needle), kind, term, names)
+                for needle, kind, term, names in self._terms if needle in lowered]
+
+        if self._articles and _ARTICLE_TRIGGER in lowered:
+            seen = set()
+            for match in _ARTICLE_CP.finditer(lowered):
+                article = int(match.group(1))
+                if article not in seen:
+                    seen.add(article)
+                    names = self._articles.lookup(article)
+                    if names:
+                        hits.append((match.start(), 'artigo', match.group(0), names))
+
+        if not hits:
+            return []
+
+        hits.sort(key=itemgetter(0))
+        evidence: Dict[str, List[Dict]] = {}
+        for position, kind, term, names in hits:
+            item = {'tipo': kind, 'termo': term, 'posicao': position}
+            for name in names:
+                if name in evidence:
+                    evidence[name].append(item)
+                else:
+                    evidence[name] = [item]
+
+        return [{'departamento': name, 'evidencias': evidence[name]}
+                for name in self.departments if name in evidence]
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from src.pdf_processor.field_extractor import FieldExtractor
+from src.rules_engine.department_router import DepartmentRouter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).parent.parent.parent / 'config' / 'rules' / 'dispatch_rules.yaml'
+
+# Campos de `scraping_items` extraídos para `basic_info`
+BASIC_INFO_FIELDS = (
+    'numero_noticia_fato',
+    'orgao_origem',
+    'sujeito_ativo',
+    'sujeito_passivo',
+    'boletim_ocorrencia',
+    'local_fatos',
+    'tipo_penal',
+)
+
+class CompiledRules:
+    """Versão imutável das regras: o YAML carregado e tudo o que é compilado a partir dele.
+
+    Nunca é alterada depois de criada; uma recarga gera uma nova instância,
+    que substitui a anterior no `RulesRegistry` de uma só vez.
+    """
+
+    def __init__(self, raw: bytes, mtime_ns: int = 0):
+        self.data: Dict = yaml.safe_load(raw.decode('utf-8')) or {}
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+        self.mtime_ns = mtime_ns
+        self.settings: Dict = self.data.get('settings') or {}
+
+        self.field_extractor = FieldExtractor(self.data.get('scraping_items', []), BASIC_INFO_FIELDS)
+        self.department_router = DepartmentRouter(
+            (self.data.get('regras_analise') or {}).get('departamentos_especializados', [])
+        )
+
+        # Departamentos de `email_rules`: (nome, email, condições textuais em minúsculas)
+        self.email_departments: List[Tuple[str, Optional[str], List[str]]] = [
+            (dept['name'], dept.get('email'),
+             [condition.lower() for condition in dept.get('conditions', []) if isinstance(condition, str)])
+            for dept in (self.data.get('email_rules') or {}).get('specialized_departments', [])
+        ]
+
+        # Regras de `RuleProcessor.process_rules`: (nome, ação, padrões compilados)
+        self.text_rules: List[Tuple[str, Optional[str], List[re.Pattern]]] = []
+        for rule in self.data.get('rules', []):
+            compiled = []
+            for pattern in rule.get('patterns', []):
+                try:
+                    compiled.append(re.compile(pattern))
+                except re.error as e:
+                    logger.warning(f"Erro ao processar padrão '{pattern}': {str(e)}")
+            self.text_rules.append((rule.get('name'), rule.get('action'), compiled))
+
+class RulesRegistry:
+    """Fonte única das regras de `dispatch_rules.yaml` para todos os consumidores.
+
+    O YAML é lido e compilado uma vez. `get()` devolve a versão atual e, no
+    máximo a cada `check_interval` segundos, confere o mtime do arquivo; se
+    mudou, recarrega e troca a versão inteira de uma vez. Se a nova versão
+    tiver erro, a anterior continua valendo.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 1.0):
+        self.path = Path(path) if path else DEFAULT_RULES_PATH
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._current: Optional[CompiledRules] = None
+        self._failed_mtime_ns: Optional[int] = None
+        self._load()
+
+    def _load(self) -> CompiledRules:
+        """Lê e compila o arquivo, substituindo a versão atual."""
+        with open(self.path, 'rb') as file:
+            mtime_ns = os.fstat(file.fileno()).st_mtime_ns
+            raw = file.read()
+        compiled = CompiledRules(raw, mtime_ns)
+        self._current = compiled
+        logger.info(f"Regras carregadas com sucesso (versão {compiled.version})")
+        return compiled
+
+    def get(self) -> CompiledRules:
+        """Versão atual das regras, recarregada se o arquivo mudou."""
+        current = self._current
+        now = time.monotonic()
+        if now < self._next_check:
+            return current
+
+        with self._lock:
+            if now < self._next_check:
+                return self._current
+            self._next_check = now + self.check_interval
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+                # Uma versão com erro só é tentada de novo se o arquivo mudar outra vez
+                if mtime_ns not in (self._current.mtime_ns, self._failed_mtime_ns):
+                    self._failed_mtime_ns = mtime_ns
+                    return self._load()
+            except Exception as e:
+                logger.error(f"Erro ao recarregar regras, mantendo a versão {self._current.version}: {str(e)}")
+            return self._current
+
+_registries: Dict[Path, RulesRegistry] = {}
+_registries_lock = threading.Lock()
+
+def get_registry(path: Optional[str] = None) -> RulesRegistry:
+    """Registro compartilhado do arquivo de regras (um por caminho, por processo)."""
+    key = Path(path).resolve() if path else DEFAULT_RULES_PATH.resolve()
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = RulesRegistry(key)
+        return registry
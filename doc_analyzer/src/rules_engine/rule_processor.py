@@ -1,11 +1,10 @@
 import os
-import re
-import yaml
 from datetime import datetime
 import logging
-from pathlib import Path
 from typing import Dict, List, Optional, Union
 
+from src.rules_engine.registry import CompiledRules, RulesRegistry, get_registry
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -18,60 +17,60 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class RuleProcessor:
-    def __init__(self):
-        """Inicializa o processador de regras."""
+    def __init__(self, registry: Optional[RulesRegistry] = None):
+        """Inicializa o processador de regras.
+        
+        Args:
+            registry: Registro das regras; usa o registro compartilhado se omitido
+        """
         try:
-            # Obtém o caminho absoluto para o diretório do projeto
-            project_root = Path(__file__).parent.parent.parent
-            rules_path = project_root / 'config' / 'rules' / 'dispatch_rules.yaml'
-            
-            with open(rules_path, 'r', encoding='utf-8') as f:
-                self.rules = yaml.safe_load(f)
-                
-            logger.info("Regras carregadas com sucesso")
-            
+            self.registry = registry or get_registry()
         except Exception as e:
             logger.error(f"Erro ao carregar regras: {str(e)}")
-            self.rules = {'rules': [], 'settings': {}}
+            self.registry = None
+
+    @property
+    def compiled_rules(self) -> Optional[CompiledRules]:
+        """Versão atual das regras compiladas, ou None se não foi possível carregá-las."""
+        return self.registry.get() if self.registry else None
+
+    @property
+    def rules(self) -> dict:
+        """Conteúdo atual do `dispatch_rules.yaml`."""
+        compiled = self.compiled_rules
+        return compiled.data if compiled else {'rules': [], 'settings': {}}
 
     def _load_rules(self) -> dict:
         """Carrega as regras do arquivo YAML."""
-        try:
-            # Obtém o caminho absoluto para o diretório do projeto
-            project_root = Path(__file__).parent.parent.parent
-            rules_path = project_root / 'config' / 'rules' / 'dispatch_rules.yaml'
-            
-            with open(rules_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except Exception as e:
-            logger.error(f"Erro ao carregar regras: {str(e)}")
-            return {}
+        return self.rules if self.registry else {}
 
     def check_specialized_department(self, 
                                   crime: str, 
                                   local: str, 
                                   autoria_conhecida: bool) -> Optional[Dict[str, str]]:
         """Verifica se o caso deve ser enviado para algum departamento especializado."""
-        if not self.rules.get('email_rules', {}).get('specialized_departments'):
+        compiled = self.compiled_rules
+        if not compiled or not compiled.email_departments:
             return None
 
-        for dept in self.rules['email_rules']['specialized_departments']:
+        crime = crime.lower()
+        intolerancia = any(c in crime for c in ['racismo', 'intolerância'])
+
+        for name, email, conditions in compiled.email_departments:
             # Verifica DEINTER (fora da capital)
-            if dept['name'] == 'DEINTER' and 'São Paulo' not in local:
-                return {'department': 'DEINTER', 'email': dept['email']}
+            if name == 'DEINTER' and 'São Paulo' not in local:
+                return {'department': 'DEINTER', 'email': email}
 
             # Verifica DECRADI/DECAP (crimes de intolerância)
-            if any(c.lower() in crime.lower() for c in ['racismo', 'intolerância']):
-                if autoria_conhecida and dept['name'] == 'DECAP':
-                    return {'department': 'DECAP', 'email': dept['email']}
-                if not autoria_conhecida and dept['name'] == 'DECRADI':
-                    return {'department': 'DECRADI', 'email': dept['email']}
+            if intolerancia:
+                if autoria_conhecida and name == 'DECAP':
+                    return {'department': 'DECAP', 'email': email}
+                if not autoria_conhecida and name == 'DECRADI':
+                    return {'department': 'DECRADI', 'email': email}
 
             # Verifica outros departamentos baseado nas condições
-            if 'conditions' in dept:
-                for condition in dept['conditions']:
-                    if isinstance(condition, str) and condition.lower() in crime.lower():
-                        return {'department': dept['name'], 'email': dept['email']}
+            if any(condition in crime for condition in conditions):
+                return {'department': name, 'email': email}
 
         return None
 
@@ -131,16 +130,13 @@ class RuleProcessor:
         try:
             results = {}
             
-            # Processa cada regra
-            for rule in self.rules.get('rules', []):
-                rule_name = rule.get('name')
-                patterns = rule.get('patterns', [])
-                action = rule.get('action')
-                
+            compiled = self.compiled_rules
+            
+            # Processa cada regra, com os padrões já compilados pelo registro
+            for rule_name, action, patterns in (compiled.text_rules if compiled else []):
                 matches = []
                 for pattern in patterns:
-                    found = re.finditer(pattern, text)
-                    matches.extend([m.group() for m in found])
+                    matches.extend(m.group() for m in pattern.finditer(text))
                 
                 if matches:
                     results[rule_name] = matches
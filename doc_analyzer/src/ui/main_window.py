@@ -1,18 +1,35 @@
+import asyncio
 import customtkinter as ctk
 import logging
 from tkinter import filedialog
 from pathlib import Path
-from queue import Queue
+from queue import Empty, Queue
 import threading
 
 logger = logging.getLogger(__name__)
 
+# Intervalo de leitura da fila de mensagens da thread de trabalho
+POLL_INTERVAL_MS = 50
+
 class MainWindow(ctk.CTk):
     def __init__(self, analyzer):
+        """
+        Args:
+            analyzer: O analisador, ou uma função que o cria; a função é chamada
+                em segundo plano depois que a janela aparece, e os botões ficam
+                desabilitados até o analisador ficar pronto
+        """
         super().__init__()
-        self.analyzer = analyzer
+        self.analyzer = None if callable(analyzer) else analyzer
         self.current_text = ""
+        
+        # Mensagens da thread de trabalho para a interface: (tipo, conteúdo)
         self.queue = Queue()
+        # Tarefa em execução na thread de trabalho, para o cancelamento
+        self._job_lock = threading.Lock()
+        self._job_loop = None
+        self._job_task = None
+        self._cancel_event = threading.Event()
         
         # Configuração da janela
         self.title("Analisador de Documentos")
@@ -30,14 +47,27 @@ class MainWindow(ctk.CTk):
         self.select_button = ctk.CTkButton(
             self.top_frame, 
             text="Selecionar Arquivo",
-            command=self.select_file
+            command=self.select_file,
+            state="normal" if self.analyzer else "disabled"
         )
         self.select_button.pack(side="left", padx=5)
         
         # Label para mostrar o arquivo selecionado
-        self.file_path_label = ctk.CTkLabel(self.top_frame, text="Nenhum arquivo selecionado")
+        self.file_path_label = ctk.CTkLabel(
+            self.top_frame,
+            text="Nenhum arquivo selecionado" if self.analyzer else "Carregando analisador..."
+        )
         self.file_path_label.pack(side="left", padx=5)
         
+        # Botão para cancelar a operação em andamento
+        self.cancel_button = ctk.CTkButton(
+            self.top_frame,
+            text="Cancelar",
+            command=self.cancel,
+            state="disabled"
+        )
+        self.cancel_button.pack(side="right", padx=5)
+        
         # Frame para o resultado
         self.result_frame = ctk.CTkFrame(self.main_frame)
         self.result_frame.pack(fill="both", expand=True, padx=5, pady=5)
@@ -65,6 +95,23 @@ class MainWindow(ctk.CTk):
             state="disabled"
         )
         self.ask_button.pack(side="right", padx=5)
+        
+        self.after(POLL_INTERVAL_MS, self._poll_queue)
+        if self.analyzer is None:
+            # Só depois de a janela ser desenhada: a carga disputa o GIL com a interface
+            self.after_idle(self._start_loading, analyzer)
+    
+    def _start_loading(self, load_analyzer):
+        threading.Thread(target=self._load_analyzer, args=(load_analyzer,),
+                         name="analyzer-loader", daemon=True).start()
+    
+    def _load_analyzer(self, load_analyzer):
+        """Cria o analisador (regras, base de conhecimento, cliente da API) em segundo plano."""
+        try:
+            self.queue.put(("ready", load_analyzer()))
+        except Exception as e:
+            logger.error(f"Erro ao carregar o analisador: {str(e)}")
+            self.queue.put(("load_error", f"Erro ao carregar o analisador: {str(e)}"))
     
     def select_file(self):
         """Abre diálogo para selecionar arquivo PDF."""
@@ -87,81 +134,155 @@ class MainWindow(ctk.CTk):
                 self.ask_button.configure(state="disabled")
     
     def process_file(self, file_path):
-        """Processa o arquivo selecionado."""
+        """Processa o arquivo selecionado em segundo plano."""
         if not file_path:
             return
         
-        try:
-            # Mostra mensagem de processamento
-            self.result_text.delete("1.0", "end")
-            self.result_text.insert("end", "Processando arquivo...\n")
-            self.result_text.update()
-            
-            # Processa o arquivo
-            result = self.analyzer.process_document(file_path)
-            
-            # Limpa o widget
-            self.result_text.delete("1.0", "end")
+        # Mostra mensagem de processamento
+        self.current_text = ""
+        self.result_text.delete("1.0", "end")
+        self.result_text.insert("end", "Processando arquivo...\n")
+        
+        self._start_job(self._process_job(file_path), "Erro ao processar arquivo")
+    
+    async def _process_job(self, file_path):
+        """Extrai e analisa o documento (executado na thread de trabalho)."""
+        # A extração não usa o LLM e roda em uma thread à parte
+        extracted = await asyncio.to_thread(self.analyzer.extract_document, file_path)
+        self.queue.put(("text", "Analisando documento...\n"))
+        result = await self.analyzer.aanalyze_extracted(extracted)
+        self.queue.put(("result", result))
+        # Prepara o índice de trechos usado nas perguntas sobre o documento
+        await asyncio.to_thread(self.analyzer.passage_index, result['text'])
+    
+    def _show_result(self, result):
+        """Mostra a análise do documento."""
+        # Limpa o widget
+        self.result_text.delete("1.0", "end")
+        
+        # Mostra o resultado
+        if result:
+            self.result_text.insert("end", "Análise do Documento:\n\n")
             
-            # Mostra o resultado
-            if result:
-                self.result_text.insert("end", "Análise do Documento:\n\n")
-                
-                # Informações básicas
-                if result.get("basic_info"):
-                    self.result_text.insert("end", "Informações Básicas:\n")
-                    for key, value in result["basic_info"].items():
-                        self.result_text.insert("end", f"{key}: {value}\n")
-                    self.result_text.insert("end", "\n")
-                
-                # Análise
-                if result.get("analysis"):
-                    self.result_text.insert("end", "Análise:\n")
-                    for key, value in result["analysis"].items():
-                        self.result_text.insert("end", f"{key}: {value}\n")
-                    self.result_text.insert("end", "\n")
-                
-                # Conclusão
-                if result.get("conclusion"):
-                    self.result_text.insert("end", "Conclusão:\n")
-                    for key, value in result["conclusion"].items():
-                        self.result_text.insert("end", f"{key}: {value}\n")
+            # Informações básicas
+            if result.get("basic_info"):
+                self.result_text.insert("end", "Informações Básicas:\n")
+                for key, value in result["basic_info"].items():
+                    self.result_text.insert("end", f"{key}: {value}\n")
+                self.result_text.insert("end", "\n")
             
-            # Atualiza a interface
-            self.result_text.update()
-            self.current_text = result.get('text', '')
-            self.ask_button.configure(state="normal")
+            # Análise
+            if result.get("analysis"):
+                self.result_text.insert("end", "Análise:\n")
+                for key, value in result["analysis"].items():
+                    self.result_text.insert("end", f"{key}: {value}\n")
+                self.result_text.insert("end", "\n")
             
-        except Exception as e:
-            logger.error(f"Erro ao processar arquivo: {str(e)}")
-            self.result_text.delete("1.0", "end")
-            self.result_text.insert("end", f"Erro ao processar arquivo: {str(e)}")
-            self.ask_button.configure(state="disabled")
+            # Conclusão
+            if result.get("conclusion"):
+                self.result_text.insert("end", "Conclusão:\n")
+                for key, value in result["conclusion"].items():
+                    self.result_text.insert("end", f"{key}: {value}\n")
+        
+        self.current_text = result.get('text', '')
     
     def ask_question(self):
-        """Processa uma pergunta sobre o documento."""
+        """Processa uma pergunta sobre o documento em segundo plano."""
         question = self.question_entry.get()
         if not question:
             return
-            
+        
+        # Limpa o campo de pergunta
+        self.question_entry.delete(0, "end")
+        self.result_text.insert("end", f"\nPergunta: {question}\nResposta: ")
+        self.result_text.see("end")
+        
+        self._start_job(self._question_job(question, self.current_text), "Erro ao processar pergunta")
+    
+    async def _question_job(self, question, context):
+        """Envia a resposta à interface à medida que é gerada (executado na thread de trabalho)."""
+        async for delta in self.analyzer.stream_answer(question, context):
+            self.queue.put(("text", delta))
+        self.queue.put(("text", "\n"))
+    
+    def cancel(self):
+        """Cancela a operação em andamento, interrompendo a chamada ao LLM."""
+        self._cancel_event.set()
+        with self._job_lock:
+            if self._job_task is not None:
+                try:
+                    self._job_loop.call_soon_threadsafe(self._job_task.cancel)
+                except RuntimeError:
+                    # O event loop já terminou
+                    pass
+        self.cancel_button.configure(state="disabled")
+    
+    def _start_job(self, job, error_message):
+        """Executa a corrotina `job` em uma thread de trabalho."""
+        self._cancel_event.clear()
+        self._set_busy(True)
+        threading.Thread(target=self._run_job, args=(job, error_message), daemon=True).start()
+    
+    def _run_job(self, job, error_message):
+        """Corpo da thread de trabalho; o resultado volta pela fila."""
+        async def runner():
+            with self._job_lock:
+                self._job_loop = asyncio.get_running_loop()
+                self._job_task = asyncio.current_task()
+            # Cancelado antes de começar
+            if self._cancel_event.is_set():
+                job.close()
+                raise asyncio.CancelledError()
+            await job
+        
         try:
-            # Mostra mensagem de processamento
-            self.result_text.insert("end", "\nProcessando pergunta...\n")
-            self.result_text.update()
-            
-            # Obtém resposta
-            answer = self.analyzer.answer_question(question, self.current_text)
-            
-            # Mostra a resposta
-            self.result_text.insert("end", f"\nPergunta: {question}\n")
-            self.result_text.insert("end", f"Resposta: {answer}\n")
-            
-            # Limpa o campo de pergunta
-            self.question_entry.delete(0, "end")
-            
+            self.analyzer.client.run(runner())
+        except asyncio.CancelledError:
+            self.queue.put(("cancelled", None))
         except Exception as e:
-            logger.error(f"Erro ao processar pergunta: {str(e)}")
-            self.result_text.insert("end", f"\nErro ao processar pergunta: {str(e)}\n")
+            logger.error(f"{error_message}: {str(e)}")
+            self.queue.put(("error", f"{error_message}: {str(e)}"))
+        finally:
+            with self._job_lock:
+                self._job_loop = None
+                self._job_task = None
+            self.queue.put(("done", None))
+    
+    def _poll_queue(self):
+        """Aplica à interface as mensagens da thread de trabalho."""
+        try:
+            while True:
+                kind, payload = self.queue.get_nowait()
+                if kind == "text":
+                    self.result_text.insert("end", payload)
+                    self.result_text.see("end")
+                elif kind == "result":
+                    self._show_result(payload)
+                elif kind == "error":
+                    self.result_text.insert("end", f"\n{payload}\n")
+                    self.result_text.see("end")
+                elif kind == "cancelled":
+                    self.result_text.insert("end", "\nOperação cancelada.\n")
+                    self.result_text.see("end")
+                elif kind == "done":
+                    self._set_busy(False)
+                elif kind == "ready":
+                    self.analyzer = payload
+                    self.file_path_label.configure(text="Nenhum arquivo selecionado")
+                    self.select_button.configure(state="normal")
+                elif kind == "load_error":
+                    self.file_path_label.configure(text="Analisador indisponível")
+                    self.result_text.insert("end", f"{payload}\n")
+        except Empty:
+            pass
+        
+        self.after(POLL_INTERVAL_MS, self._poll_queue)
+    
+    def _set_busy(self, busy):
+        """Habilita ou desabilita os botões conforme há operação em andamento."""
+        self.select_button.configure(state="disabled" if busy else "normal")
+        self.cancel_button.configure(state="normal" if busy else "disabled")
+        self.ask_button.configure(state="normal" if self.current_text and not busy else "disabled")
     
     def run(self):
         """Inicia a execução da interface."""
@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+class SQLiteCache:
+    """Base dos caches em disco guardados em SQLite.
+
+    Cria o banco (em modo WAL) com as tabelas de `schema`, abre uma conexão
+    por operação e remove as entradas acessadas há mais tempo (LRU, pela
+    coluna `last_access`) quando uma tabela passa do limite.
+    """
+
+    def __init__(self, db_path: str, schema: Iterable[str]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in schema:
+                conn.execute(statement)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma conexão, confirma a transação e fecha ao final."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _evict_lru(conn: sqlite3.Connection,
+                   table: str,
+                   max_bytes: Optional[int] = None,
+                   max_entries: Optional[int] = None) -> int:
+        """Remove as entradas menos usadas de `table` até caber nos limites; retorna quantas saíram.
+
+        `max_bytes` usa a coluna `size` da tabela; `max_entries`, o número de linhas.
+        """
+        removed = 0
+        if max_entries is not None:
+            excess = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] - max_entries
+            if excess > 0:
+                conn.execute(f"DELETE FROM {table} WHERE key IN "
+                             f"(SELECT key FROM {table} ORDER BY last_access LIMIT ?)", (excess,))
+                removed += excess
+
+        if max_bytes is not None:
+            total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+            if total > max_bytes:
+                for key, size in conn.execute(f"SELECT key, size FROM {table} ORDER BY last_access").fetchall():
+                    if total <= max_bytes:
+                        break
+                    conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+                    total -= size
+                    removed += 1
+        return removed
@@ -0,0 +1,232 @@
+"""
+Spans de tempo por etapa e métricas no formato texto do Prometheus.
+
+Cada etapa é medida com `span(nome, **atributos)`; os spans se aninham
+(inclusive entre tarefas asyncio) e, ao terminar, viram uma linha JSON
+com duração, atributos e o span pai. As métricas acumuladas (contagem e
+histograma da duração, somas dos atributos numéricos como páginas,
+caracteres, tokens e acertos de cache) são regravadas no arquivo do
+Prometheus ao fim de cada span raiz.
+
+Desligada (o padrão), `span()` devolve sempre o mesmo objeto vazio, sem
+medir nem gravar nada.
+"""
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "doc_analyzer"
+
+# Limites (em segundos) das faixas do histograma de duração
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current: ContextVar[Optional['Span']] = ContextVar('telemetry_span', default=None)
+_ids = itertools.count(1)
+
+class _NoopSpan:
+    """Span de quando a telemetria está desligada: não mede nada."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, name: str, value: float = 1):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """Uma etapa medida; atributos podem ser definidos até o fim do bloco `with`."""
+
+    __slots__ = ('telemetry', 'name', 'attributes', 'id', 'parent', 'trace', 'start', '_token', '_wall')
+
+    def __init__(self, telemetry: 'Telemetry', name: str, attributes: Dict):
+        self.telemetry = telemetry
+        self.name = name
+        self.attributes = attributes
+        self.id = next(_ids)
+        self.parent: Optional[Span] = None
+        self.trace = self.id
+
+    def __enter__(self) -> 'Span':
+        self.parent = _current.get()
+        if self.parent is not None:
+            self.trace = self.parent.trace
+        self._token = _current.set(self)
+        self._wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.start
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Encerrado em outro contexto (ex.: gerador assíncrono fechado por outra tarefa)
+            pass
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.telemetry._finish(self, duration)
+        return False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, name: str, value: float = 1):
+        """Soma `value` a um atributo numérico (ex.: tokens de várias chamadas)."""
+        self.attributes[name] = self.attributes.get(name, 0) + value
+
+class Telemetry:
+    """Coleta os spans e exporta em JSON lines e no formato texto do Prometheus.
+
+    Args:
+        jsonl_path: Arquivo em que cada span termina como uma linha JSON (None = não grava)
+        prometheus_path: Arquivo das métricas, regravado ao fim de cada span raiz (None = não grava)
+    """
+
+    def __init__(self,
+                 enabled: bool = False,
+                 jsonl_path: Optional[str] = 'logs/spans.jsonl',
+                 prometheus_path: Optional[str] = 'logs/metrics.prom'):
+        self.enabled = enabled
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self._lock = threading.Lock()
+        # nome do span -> [contagem, soma da duração, contagem por faixa do histograma]
+        self._durations: Dict[str, list] = {}
+        # (nome do span, atributo) -> soma
+        self._totals: Dict[Tuple[str, str], float] = {}
+
+        for path in (self.jsonl_path, self.prometheus_path):
+            if enabled and path:
+                path.parent.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict], prometheus: bool = True) -> 'Telemetry':
+        """Cria a telemetria a partir de `settings.telemetry` do YAML (desligada se ausente).
+
+        Args:
+            prometheus: Falso nos processos auxiliares (ex.: pool do lote), que
+                só gravam os spans, para não sobrescrever as métricas do principal
+        """
+        config = (settings or {}).get('telemetry') or {}
+        if not config.get('enabled', False):
+            return cls(enabled=False)
+        try:
+            return cls(
+                enabled=True,
+                jsonl_path=config.get('jsonl_path', 'logs/spans.jsonl'),
+                prometheus_path=config.get('prometheus_path', 'logs/metrics.prom') if prometheus else None
+            )
+        except Exception as e:
+            logger.warning(f"Telemetria desabilitada: {str(e)}")
+            return cls(enabled=False)
+
+    def span(self, name: str, **attributes):
+        """Mede um bloco `with`; desligada, devolve um span vazio."""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def _finish(self, span: Span, duration: float):
+        record = {
+            'ts': round(span._wall, 6),
+            'span': span.name,
+            'duration_s': round(duration, 6),
+            'trace': span.trace,
+            'id': span.id,
+            'parent': span.parent.id if span.parent else None,
+            **span.attributes
+        }
+        with self._lock:
+            self._record_metrics(span, duration)
+            if self.jsonl_path:
+                try:
+                    with open(self.jsonl_path, 'a', encoding='utf-8') as file:
+                        file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                except OSError as e:
+                    logger.warning(f"Erro ao gravar span: {str(e)}")
+            if span.parent is None and self.prometheus_path:
+                self._write_prometheus()
+
+    def _record_metrics(self, span: Span, duration: float):
+        entry = self._durations.get(span.name)
+        if entry is None:
+            entry = self._durations[span.name] = [0, 0.0, [0] * len(DURATION_BUCKETS)]
+        entry[0] += 1
+        entry[1] += duration
+        for position, limit in enumerate(DURATION_BUCKETS):
+            if duration <= limit:
+                entry[2][position] += 1
+        for attribute, value in span.attributes.items():
+            # bool conta como 0/1 (ex.: cache_hit vira o total de acertos)
+            if isinstance(value, (int, float)):
+                key = (span.name, attribute)
+                self._totals[key] = self._totals.get(key, 0) + value
+
+    def prometheus_text(self) -> str:
+        """Métricas acumuladas no formato texto de exposição do Prometheus."""
+        name = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines = [f"# HELP {name} Duração das etapas do processamento.", f"# TYPE {name} histogram"]
+        for span_name, (count, total, buckets) in sorted(self._durations.items()):
+            label = _label(span_name)
+            for limit, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f'{name}_bucket{{span="{label}",le="{limit}"}} {bucket_count}')
+            lines.append(f'{name}_bucket{{span="{label}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{span="{label}"}} {total:.6f}')
+            lines.append(f'{name}_count{{span="{label}"}} {count}')
+
+        for attribute in sorted({attribute for _, attribute in self._totals}):
+            metric = f"{METRIC_PREFIX}_{_metric_name(attribute)}_total"
+            lines.append(f"# HELP {metric} Soma de '{attribute}' nos spans de cada etapa.")
+            lines.append(f"# TYPE {metric} counter")
+            for (span_name, name_), value in sorted(self._totals.items()):
+                if name_ == attribute:
+                    lines.append(f'{metric}{{span="{_label(span_name)}"}} {float(value):g}')
+        return "\n".join(lines) + "\n"
+
+    def _write_prometheus(self):
+        """Regrava o arquivo de métricas de uma vez (para coletores como o textfile do node_exporter)."""
+        temp_path = self.prometheus_path.with_name(self.prometheus_path.name + ".tmp")
+        try:
+            temp_path.write_text(self.prometheus_text(), encoding='utf-8')
+            os.replace(temp_path, self.prometheus_path)
+        except OSError as e:
+            logger.warning(f"Erro ao gravar métricas: {str(e)}")
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _metric_name(value: str) -> str:
+    return "".join(char if char.isalnum() else "_" for char in value).lower()
+
+_telemetry = Telemetry(enabled=False)
+
+def get_telemetry() -> Telemetry:
+    """Telemetria do processo (desligada até `configure_telemetry`)."""
+    return _telemetry
+
+def configure_telemetry(settings: Optional[Dict], prometheus: bool = True) -> Telemetry:
+    """Substitui a telemetria do processo pela configurada em `settings.telemetry`."""
+    global _telemetry
+    _telemetry = Telemetry.from_settings(settings, prometheus)
+    return _telemetry
+
+def span(name: str, **attributes):
+    """Atalho para `get_telemetry().span(...)`."""
+    return _telemetry.span(name, **attributes)
@@ -0,0 +1,30 @@
+import re
+import unicodedata
+from typing import List
+
+# Marcas diacríticas separadas pela decomposição NFD (acentos, cedilha, til)
+_COMBINING = re.compile('[\u0300-\u036f]')
+
+# Sequências de letras e dígitos
+_TOKEN = re.compile(r'\w+')
+
+# Palavras muito frequentes em português, ignoradas na indexação (já sem acentos)
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e ela ele em entre era essa esse esta este foi
+ha isso la lhe mais mas me na nas nao no nos o os ou para pela pelas pelo pelos por
+qual quando que se sem ser seu sua sao tem um uma umas uns
+""".split())
+
+def fold(text: str) -> str:
+    """Converte para minúsculas e remove acentos, ex.: "Intolerância" -> "intolerancia"."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return _COMBINING.sub('', unicodedata.normalize('NFD', text))
+
+def tokenize(text: str, stopwords: bool = True) -> List[str]:
+    """Quebra o texto em termos normalizados por `fold`, sem as stopwords (por padrão)."""
+    tokens = _TOKEN.findall(fold(text))
+    if stopwords:
+        return [token for token in tokens if token not in STOPWORDS]
+    return tokens
@@ -0,0 +1,393 @@
+"""
+Modo serviço: vigia uma pasta de entrada e processa cada PDF novo assim que termina de ser gravado.
+
+Uso:
+    python -m src.watch <pasta_de_entrada> [--output resultados] [--drafts drafts] [--workers 2]
+                        [--archive processados] [--poll] [--interval 2] [--settle 2]
+
+A pasta é vigiada com o inotify (Linux) e, onde ele não existe (Windows,
+pastas de rede), por varredura a cada `--interval` segundos. Um arquivo só
+é processado depois de ficar `--settle` segundos sem mudar de tamanho nem
+de data e terminar com o marcador `%%EOF` do PDF, para não ler cópias pela
+metade. O analisador, as regras e a base de conhecimento são carregados
+uma única vez e reaproveitados por todos os documentos; até `--workers`
+documentos são analisados ao mesmo tempo.
+
+Para cada documento é gravado `<output>/<nome>.json` e, quando a conclusão
+é o envio por email, um rascunho `.eml` em `--drafts`. PDFs que já têm
+resultado mais novo que o arquivo são ignorados ao iniciar.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import shutil
+import signal
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from src.ai_analyzer.mistral_client import MistralAnalyzer
+from src.batch import DEFAULT_TEMPLATE, email_request, find_pdfs, write_result
+from src.email_sender.email_manager import EmailManager
+from src.rules_engine.registry import DEFAULT_RULES_PATH, get_registry
+from src.utils.telemetry import span
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Quanto do fim do arquivo é lido para procurar o marcador de fim do PDF
+EOF_TAIL_BYTES = 2048
+
+def is_pdf(name: str) -> bool:
+    return name.lower().endswith('.pdf')
+
+class InotifyWatcher:
+    """Eventos de arquivos gravados, movidos ou renomeados para dentro da pasta (Linux)."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, directory: Path):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc não encontrada")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify indisponível")
+
+        self.directory = directory
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch falhou para {directory}")
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """Nomes dos arquivos alterados em até `timeout` segundos (None = refazer a varredura)."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            _, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # Eventos perdidos: quem chamou deve olhar a pasta inteira
+                return None
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Varredura periódica da pasta, para onde não há inotify."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        time.sleep(timeout)
+        return None
+
+    def close(self):
+        pass
+
+def make_watcher(directory: Path, poll: bool = False):
+    """inotify quando disponível (e não recusado por `poll`), senão varredura."""
+    if not poll:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify indisponível ({str(e)}); vigiando a pasta por varredura")
+    return PollingWatcher(directory)
+
+class SettlingFiles:
+    """Arquivos que ainda podem estar sendo gravados.
+
+    Um arquivo fica pronto quando passa `settle` segundos sem mudar de
+    tamanho nem de data e termina com `%%EOF`; se o marcador nunca
+    aparecer, fica pronto depois de `max_wait` segundos parado (e o erro,
+    se houver, aparece ao abrir o PDF).
+    """
+
+    def __init__(self, settle: float = 2.0, max_wait: float = 60.0):
+        self.settle = settle
+        self.max_wait = max_wait
+        # caminho -> (assinatura, momento da última mudança)
+        self._files: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, path: Path) -> bool:
+        return path in self._files
+
+    def touch(self, path: Path):
+        """Registra (ou atualiza) um arquivo visto pelo vigia."""
+        signature = file_signature(path)
+        if signature is None:
+            self._files.pop(path, None)
+            return
+        current = self._files.get(path)
+        if current is None or current[0] != signature:
+            self._files[path] = (signature, time.monotonic())
+
+    def ready(self) -> List[Path]:
+        """Retira e devolve os arquivos que terminaram de ser gravados."""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed_at) in list(self._files.items()):
+            current = file_signature(path)
+            if current is None:
+                del self._files[path]
+            elif current != signature:
+                self._files[path] = (current, now)
+            elif current[0] > 0 and now - changed_at >= self.settle and \
+                    (now - changed_at >= self.max_wait or has_pdf_trailer(path)):
+                del self._files[path]
+                ready.append(path)
+        return ready
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Tamanho e data de modificação, ou None se o arquivo sumiu."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def has_pdf_trailer(path: Path) -> bool:
+    """Se o PDF termina com `%%EOF` (a gravação chegou ao fim)."""
+    try:
+        with open(path, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - EOF_TAIL_BYTES))
+            return b'%%EOF' in file.read()
+    except OSError:
+        # Ainda bloqueado por quem está gravando (Windows)
+        return False
+
+class FolderDaemon:
+    """Vigia a pasta de entrada e processa os PDFs novos com um analisador sempre carregado."""
+
+    def __init__(self,
+                 inbox: str,
+                 output_dir: str = 'resultados',
+                 drafts_dir: str = 'drafts',
+                 archive_dir: Optional[str] = None,
+                 workers: int = 2,
+                 poll: bool = False,
+                 interval: float = 2.0,
+                 settle: float = 2.0,
+                 template: str = DEFAULT_TEMPLATE,
+                 include_text: bool = False,
+                 rules_path: str = str(DEFAULT_RULES_PATH),
+                 analyzer: Optional[MistralAnalyzer] = None,
+                 email_manager: Optional[EmailManager] = None):
+        self.inbox = Path(inbox)
+        self.output_dir = Path(output_dir)
+        self.drafts_dir = Path(drafts_dir)
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.workers = max(1, workers)
+        self.poll = poll
+        self.interval = interval
+        self.template = template
+        self.include_text = include_text
+        self.settling = SettlingFiles(settle)
+
+        # Carregados uma única vez: regras, base de conhecimento, caches e cliente da API
+        self.analyzer = analyzer or MistralAnalyzer(get_registry(rules_path))
+        self.email_manager = email_manager or EmailManager()
+        if self.template not in self.email_manager.templates:
+            logger.warning(f"Template '{self.template}' não encontrado; rascunhos de email não serão gerados")
+
+        # O PyMuPDF não é seguro entre threads: a extração é feita uma por vez
+        self._extract_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._queue: deque = deque()
+        self._running: Dict[Future, Path] = {}
+        # Assinatura (tamanho, data) dos arquivos já processados, para não repetir
+        self._done: Dict[Path, Tuple[int, int]] = {}
+        self.processed = 0
+        self.failed = 0
+
+    def stop(self):
+        """Pede o encerramento; os documentos em andamento terminam antes."""
+        self._stop.set()
+
+    def run(self):
+        self.inbox.mkdir(parents=True, exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        watcher = make_watcher(self.inbox, self.poll)
+        logger.info(f"Vigiando {self.inbox} ({type(watcher).__name__}), {self.workers} documento(s) por vez")
+
+        self._scan(startup=True)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while not self._stop.is_set():
+                    self._submit_ready(executor)
+                    # Com arquivos sendo gravados, volta logo para conferir se terminaram
+                    timeout = min(self.interval, self.settling.settle / 2) if self.settling else self.interval
+                    names = watcher.wait(timeout)
+                    if names is None:
+                        self._scan()
+                    else:
+                        for name in names:
+                            if is_pdf(name):
+                                self._consider(self.inbox / name)
+                    self._collect()
+
+                logger.info(f"Encerrando; aguardando {len(self._running)} documento(s) em andamento")
+        finally:
+            watcher.close()
+        # O executor já esperou os documentos em andamento
+        self._collect()
+        logger.info(f"Serviço encerrado: {self.processed} processado(s), {self.failed} falha(s)")
+
+    def _scan(self, startup: bool = False):
+        """Confere a pasta inteira (ao iniciar, na varredura e quando o inotify perde eventos)."""
+        try:
+            pdfs = find_pdfs(str(self.inbox))
+        except OSError as e:
+            logger.error(f"Erro ao listar {self.inbox}: {str(e)}")
+            return
+        for pdf in pdfs:
+            if startup and self._has_result(pdf):
+                self._done[pdf] = file_signature(pdf)
+                continue
+            self._consider(pdf)
+
+    def _consider(self, pdf: Path):
+        if pdf in self.settling:
+            self.settling.touch(pdf)
+            return
+        if pdf in self._queue or pdf in self._running.values():
+            return
+        signature = file_signature(pdf)
+        if signature is not None and self._done.get(pdf) != signature:
+            self.settling.touch(pdf)
+
+    def _has_result(self, pdf: Path) -> bool:
+        result = self.output_dir / f"{pdf.stem}.json"
+        try:
+            return result.stat().st_mtime >= pdf.stat().st_mtime
+        except OSError:
+            return False
+
+    def _submit_ready(self, executor: ThreadPoolExecutor):
+        self._queue.extend(self.settling.ready())
+        # Só `workers` documentos ficam no executor; os demais esperam na fila
+        while self._queue and len(self._running) < self.workers:
+            pdf = self._queue.popleft()
+            self._done[pdf] = file_signature(pdf)
+            self._running[executor.submit(self.process, pdf)] = pdf
+
+    def _collect(self):
+        for future in [future for future in self._running if future.done()]:
+            pdf = self._running.pop(future)
+            try:
+                future.result()
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Erro ao processar {pdf.name}: {str(e)}")
+
+    def process(self, pdf: Path) -> Dict:
+        """Extrai, analisa e grava o resultado (e o rascunho do email) de um PDF."""
+        start = time.perf_counter()
+        with span("process_document", file=pdf.name):
+            with self._extract_lock:
+                extracted = self.analyzer.extract_document(str(pdf))
+            result = self.analyzer.analyze_extracted(extracted)
+
+        write_result(self.output_dir, pdf, result, self.include_text)
+        draft = self._save_draft(result)
+        if self.archive_dir:
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(pdf), str(self.archive_dir / pdf.name))
+
+        conclusion = result.get('conclusion', {})
+        logger.info(f"{pdf.name}: {conclusion.get('method', '?')}"
+                    f"{' (rascunho gerado)' if draft else ''} em {time.perf_counter() - start:.1f}s")
+        return result
+
+    def _save_draft(self, result: Dict) -> bool:
+        """Rascunho do email de requisição, quando a conclusão é o envio por email."""
+        request = email_request(result, self.template)
+        if request is None or self.template not in self.email_manager.templates:
+            return False
+
+        email = self.email_manager.create_email(*request)
+        return bool(email) and self.email_manager.save_draft(email, str(self.drafts_dir), request[2])
+
+def main():
+    parser = argparse.ArgumentParser(description="Vigia uma pasta e processa as Notícias de Fato em PDF que chegarem.")
+    parser.add_argument('inbox', help="Pasta de entrada dos PDFs")
+    parser.add_argument('--output', default='resultados', help="Diretório de saída dos JSONs")
+    parser.add_argument('--drafts', default='drafts', help="Diretório dos rascunhos de email (.eml)")
+    parser.add_argument('--archive', help="Move os PDFs processados para este diretório")
+    parser.add_argument('--workers', type=int, default=2, help="Documentos analisados ao mesmo tempo")
+    parser.add_argument('--poll', action='store_true', help="Vigia por varredura mesmo com inotify (ex.: pastas de rede)")
+    parser.add_argument('--interval', type=float, default=2.0, help="Segundos entre varreduras")
+    parser.add_argument('--settle', type=float, default=2.0, help="Segundos sem mudanças para considerar o arquivo gravado")
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help="Template de email (config/templates)")
+    parser.add_argument('--include-text', action='store_true', help="Inclui o texto completo no JSON de cada documento")
+    args = parser.parse_args()
+
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/watch.log'),
+            logging.StreamHandler()
+        ],
+        force=True
+    )
+
+    daemon = FolderDaemon(
+        args.inbox,
+        output_dir=args.output,
+        drafts_dir=args.drafts,
+        archive_dir=args.archive,
+        workers=args.workers,
+        poll=args.poll,
+        interval=args.interval,
+        settle=args.settle,
+        template=args.template,
+        include_text=args.include_text
+    )
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    daemon.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Os módulos são importados como `src.*` a partir de `doc_analyzer/`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
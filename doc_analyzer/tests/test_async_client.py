@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from mistralai.exceptions import MistralAPIException
+from mistralai.models.chat_completion import ChatMessage
+
+from src.ai_analyzer.async_client import AsyncMistralClient
+
+MAX_IN_FLIGHT = 3
+RETRY_AFTER = 0.3
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """API de chat de teste; a resposta depende do texto da última mensagem.
+
+    `429`: 429 com Retry-After na primeira tentativa, 200 depois; `400`: 400;
+    `lento`: 200 após 2 s; demais: 200 após 50 ms. Com `stream`, responde em SSE.
+    """
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = request['messages'][-1]['content']
+        server = self.server
+        with server.lock:
+            server.attempts[prompt] += 1
+            attempt = server.attempts[prompt]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if prompt == '429' and attempt == 1:
+                self.reply(429, {'object': 'error', 'message': 'rate limit'}, {'Retry-After': str(RETRY_AFTER)})
+            elif prompt == '400':
+                self.reply(400, {'object': 'error', 'message': 'invalid request'})
+            elif request.get('stream'):
+                self.stream(["Resposta ", "em ", "partes"])
+            else:
+                time.sleep(2 if prompt == 'lento' else 0.05)
+                self.reply(200, completion(f"eco: {prompt}"))
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream(self, parts):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        # Linhas sem `data:` (comentários SSE) são ignoradas pelo cliente
+        self.wfile.write(b": keep-alive\n\n")
+        for part in parts:
+            chunk = {'choices': [{'index': 0, 'delta': {'content': part}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+def completion(content):
+    return {
+        'id': 'teste', 'object': 'chat.completion', 'created': 0, 'model': 'mistral-teste',
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+    }
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), ChatHandler)
+    httpd.lock = threading.Lock()
+    httpd.attempts = Counter()
+    httpd.in_flight = httpd.max_in_flight = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def client(server):
+    client = AsyncMistralClient(api_key='teste',
+                                endpoint=f"http://127.0.0.1:{server.server_address[1]}",
+                                max_in_flight=MAX_IN_FLIGHT,
+                                max_retries=2,
+                                timeout=5,
+                                backoff_base=0.01)
+    yield client
+    client.shutdown()
+
+def chat(client, prompt, **kwargs):
+    return client.chat('mistral-teste', [ChatMessage(role='user', content=prompt)], **kwargs)
+
+def free_slots(client):
+    async def value():
+        return client._slots._value
+    return client.run(value())
+
+def test_retries_after_429_respecting_retry_after(client, server):
+    start = time.monotonic()
+    response = client.run(chat(client, '429'))
+
+    assert response.choices[0].message.content == 'eco: 429'
+    assert server.attempts['429'] == 2
+    assert time.monotonic() - start >= RETRY_AFTER
+
+def test_client_errors_are_not_retried(client, server):
+    with pytest.raises(MistralAPIException):
+        client.run(chat(client, '400'))
+
+    assert server.attempts['400'] == 1
+    assert free_slots(client) == MAX_IN_FLIGHT
+
+def test_timeout_covers_the_whole_call(client, server):
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        client.run(chat(client, 'lento', timeout=0.2))
+
+    assert time.monotonic() - start < 1.5
+    assert free_slots(client) == MAX_IN_FLIGHT
+
+def test_max_in_flight_is_never_exceeded(client, server):
+    async def many():
+        return await asyncio.gather(*(chat(client, f"pergunta {i}") for i in range(10)))
+
+    responses = client.run(many())
+
+    assert [r.choices[0].message.content for r in responses] == [f"eco: pergunta {i}" for i in range(10)]
+    assert server.max_in_flight == MAX_IN_FLIGHT
+    assert free_slots(client) == MAX_IN_FLIGHT
+
+def test_stream_chat_parses_sse(client, server):
+    async def collect():
+        return [part async for part in client.stream_chat('mistral-teste',
+                                                          [ChatMessage(role='user', content='stream')])]
+
+    assert client.run(collect()) == ["Resposta ", "em ", "partes"]
+    assert free_slots(client) == MAX_IN_FLIGHT
+
+def test_cancelled_call_releases_its_slot(client, server):
+    started = threading.Event()
+    tasks = []
+
+    async def runner():
+        tasks.append(asyncio.current_task())
+        started.set()
+        await chat(client, 'lento')
+
+    def cancel_soon():
+        started.wait()
+        time.sleep(0.2)
+        client._loop.call_soon_threadsafe(tasks[0].cancel)
+
+    canceller = threading.Thread(target=cancel_soon)
+    canceller.start()
+    with pytest.raises(asyncio.CancelledError):
+        client.run(runner())
+    canceller.join()
+
+    assert server.attempts['lento'] == 1
+    assert free_slots(client) == MAX_IN_FLIGHT
+
+def test_run_rejects_awaitables_that_are_not_coroutines(client):
+    async def noop():
+        return None
+
+    with pytest.raises(TypeError):
+        client.run(asyncio.gather())
+    # O event loop continua atendendo depois do erro
+    assert client.run(noop()) is None
@@ -0,0 +1,114 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.knowledge_base.legal_knowledge import LegalKnowledgeBase
+
+PAYLOAD = {'sumula': 'Súmula 444', 'texto': 'Inquéritos em curso não agravam a pena-base'}
+ETAG = '"v1"'
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """Fontes de teste: `/json` (com ETag), `/html` (200 sem JSON) e `/erro` (500)."""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/json':
+            if self.headers.get('If-None-Match') == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps(PAYLOAD).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('ETag', ETAG)
+        elif self.path == '/html':
+            body = b'<html><body>Manutencao</body></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+        else:
+            body = b''
+            self.send_response(500)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SourceHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def knowledge(tmp_path, server):
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    kb = LegalKnowledgeBase(cache_dir=str(tmp_path), timeout=5)
+    kb.sources = {'legislacao': {'penal': f"{base}/json", 'civil': f"{base}/html"},
+                  'policia': {'contatos': f"{base}/erro"}}
+    return kb
+
+def fetched(server):
+    return [path for path, _ in server.requests]
+
+def test_fetches_json_and_records_failures(knowledge, server):
+    knowledge.refresh()
+
+    assert knowledge.knowledge['fontes'] == {'legislacao': {'penal': PAYLOAD}}
+    assert knowledge.source_state['legislacao/penal']['etag'] == ETAG
+    for key in ('legislacao/civil', 'policia/contatos'):
+        state = knowledge.source_state[key]
+        assert state['failed_at'] and state['error']
+        assert 'fetched_at' not in state
+
+def test_failed_sources_wait_for_the_ttl(knowledge, server):
+    knowledge.refresh()
+    assert sorted(fetched(server)) == ['/erro', '/html', '/json']
+
+    # Dentro da validade, nem as fontes que falharam são buscadas de novo
+    assert knowledge._due_sources() == []
+    knowledge.refresh()
+    assert len(server.requests) == 3
+
+    knowledge.source_ttls['policia'] = timedelta(0)
+    assert [name for _, name, _ in knowledge._due_sources()] == ['contatos']
+
+def test_expired_source_is_revalidated_with_etag(knowledge, server):
+    knowledge.refresh()
+    fetched_at = knowledge.source_state['legislacao/penal']['fetched_at']
+
+    knowledge.source_ttls['legislacao'] = timedelta(0)
+    knowledge.refresh()
+
+    assert ('/json', ETAG) in server.requests
+    assert knowledge.knowledge['fontes']['legislacao']['penal'] == PAYLOAD
+    assert knowledge.source_state['legislacao/penal']['fetched_at'] > fetched_at
+
+def test_state_survives_restart(knowledge, server, tmp_path):
+    knowledge.refresh()
+
+    restarted = LegalKnowledgeBase(cache_dir=str(tmp_path))
+    restarted.sources = knowledge.sources
+    assert restarted._load_from_cache()
+    assert restarted._due_sources() == []
+
+def test_sources_are_searchable(knowledge, server):
+    knowledge.refresh()
+
+    results = knowledge.search('sumula 444')
+    assert [(r['tipo'], r['fonte']) for r in results] == [('legislacao', 'penal')]
+    assert results[0]['info'] == PAYLOAD
+
+    # Só a fonte alterada é reindexada
+    knowledge.knowledge['fontes']['legislacao']['penal'] = {'sumula': 'Súmula 231'}
+    assert knowledge.index.sync(knowledge._search_entries()) == 1
+    assert knowledge.search('inquéritos') == []
+    assert knowledge.search('231')[0]['fonte'] == 'penal'
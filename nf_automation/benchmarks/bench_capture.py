@@ -0,0 +1,71 @@
+"""
+Benchmark do `CapturePipeline` contra a captura antiga (tela inteira no OCR a cada confirmação).
+
+Uso (a partir de `nf_automation/`, com o Tesseract instalado):
+    python -m benchmarks.bench_capture [--screens 5] [--repeat 3] [--images pasta]
+
+Simula uma sessão: cada tela é capturada `--repeat` vezes seguidas (o
+usuário confirma de novo sem a tela mudar) e, no fim, as telas são
+revisitadas. Confere que os dois caminhos encontram as mesmas NFs em cada
+captura e mostra o tempo total e quantas vezes o OCR rodou.
+"""
+import argparse
+import random
+import time
+
+import pytesseract
+
+from benchmarks.fixtures import load_images, random_nf, render_screen
+from src.capture import CapturePipeline
+from src.ocr_extract import process_image, process_text
+
+def session_frames(screens, repeat):
+    """Sequência de capturas: cada tela repetida e depois todas revisitadas uma vez."""
+    frames = [image for image in screens for _ in range(repeat)]
+    return frames + list(screens)
+
+def run(screens: int, repeat: int, images: str, lang: str, seed: int):
+    if images:
+        fixtures = [image for image, _ in load_images(images)]
+    else:
+        rng = random.Random(seed)
+        fixtures = [render_screen(rng, random_nf(rng)) for _ in range(screens)]
+    frames = session_frames(fixtures, repeat)
+
+    def ocr(image):
+        return pytesseract.image_to_string(image, lang=lang)
+
+    start = time.perf_counter()
+    legacy = [process_text(ocr(process_image(frame))) for frame in frames]
+    legacy_seconds = time.perf_counter() - start
+
+    pipeline = CapturePipeline(ocr=ocr, auto_roi=True, preprocess=process_image)
+    start = time.perf_counter()
+    piped = [process_text(pipeline.process(frame).text) for frame in frames]
+    pipeline_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, piped) if a != b)
+    found = sum(1 for nfs in legacy if nfs)
+
+    print(f"{len(frames)} capturas de {len(fixtures)} telas (região detectada: {pipeline.region})")
+    print(f"  tela inteira a cada captura: {legacy_seconds:8.2f} s, {len(frames)} OCRs")
+    print(f"  CapturePipeline:             {pipeline_seconds:8.2f} s, {pipeline.stats['ocr_calls']} OCRs "
+          f"(+1 detecção), {pipeline.stats['unchanged']} sem mudança, {pipeline.stats['cache_hits']} do cache")
+    print(f"  ganho: {legacy_seconds / pipeline_seconds:.2f}x, capturas com NF: {found}/{len(frames)}, "
+          f"divergências: {mismatches}")
+
+    if mismatches:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do CapturePipeline")
+    parser.add_argument('--screens', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--images', help="Pasta com capturas de tela reais em vez das sintéticas")
+    parser.add_argument('--lang', default='por')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.screens, args.repeat, args.images, args.lang, args.seed)
+
+if __name__ == "__main__":
+    main()
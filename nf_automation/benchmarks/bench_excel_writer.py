@@ -0,0 +1,82 @@
+"""
+Benchmark do `ExcelWriter` contra a gravação antiga (abrir, gravar e salvar a planilha a cada captura).
+
+Uso (a partir de `nf_automation/`):
+    python -m benchmarks.bench_excel_writer [--captures 300] [--nfs 2] [--batch-size 100]
+
+A gravação antiga usava o Excel via COM, que só existe no Windows; aqui
+ela é reproduzida com o openpyxl no modo normal (abre, acha a última
+linha, grava as células e salva), o que subestima o custo original.
+Confere que as duas planilhas terminam com as mesmas linhas.
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+from src.excel_writer import DEFAULT_HEADER, ExcelWriter
+
+def legacy_save(nfs, excel_path):
+    """Mesmos passos do `save_to_excel` antigo, com openpyxl no lugar do COM."""
+    try:
+        workbook = load_workbook(excel_path)
+        sheet = workbook.worksheets[0]
+    except FileNotFoundError:
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet["A1"] = DEFAULT_HEADER[0]
+    last_row = sheet.max_row
+    for i, nf in enumerate(nfs, start=1):
+        sheet.cell(row=last_row + i, column=1, value=nf)
+    workbook.save(excel_path)
+
+def read_column(path):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return [row[0] for row in workbook.worksheets[0].iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+def run(captures: int, nfs: int, batch_size: int, seed: int):
+    rng = random.Random(seed)
+    batches = [[str(rng.randrange(10 ** 8, 10 ** 9)) for _ in range(nfs)] for _ in range(captures)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = Path(directory) / "legado.xlsx"
+        start = time.perf_counter()
+        for batch in batches:
+            legacy_save(batch, legacy_path)
+        legacy_seconds = time.perf_counter() - start
+
+        writer_path = Path(directory) / "buffer.xlsx"
+        start = time.perf_counter()
+        with ExcelWriter(writer_path, batch_size=batch_size, flush_interval=None) as writer:
+            for batch in batches:
+                writer.add(batch)
+        writer_seconds = time.perf_counter() - start
+
+        same = read_column(legacy_path) == read_column(writer_path)
+
+    rows = captures * nfs
+    print(f"{captures} capturas x {nfs} NFs ({rows} linhas)")
+    print(f"  salvar a cada captura: {legacy_seconds:8.2f} s ({captures / legacy_seconds:8.1f} capturas/s)")
+    print(f"  ExcelWriter (lote {batch_size}): {writer_seconds:8.2f} s ({captures / writer_seconds:8.1f} capturas/s)")
+    print(f"  ganho: {legacy_seconds / writer_seconds:.1f}x, planilhas iguais: {'sim' if same else 'NÃO'}")
+
+    if not same:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do ExcelWriter")
+    parser.add_argument('--captures', type=int, default=300)
+    parser.add_argument('--nfs', type=int, default=2, help="NFs por captura")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.captures, args.nfs, args.batch_size, args.seed)
+
+if __name__ == "__main__":
+    main()
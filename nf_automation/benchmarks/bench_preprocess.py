@@ -0,0 +1,78 @@
+"""
+Benchmark do pré-processamento (`src.preprocess`) antes do Tesseract.
+
+Uso (a partir de `nf_automation/`, com o Tesseract instalado):
+    python -m benchmarks.bench_preprocess [--pages 10] [--dpi 200] [--images pasta]
+
+Para cada variante (só escala de cinza, o padrão, e as combinações do
+`Preprocessor`, ligado por `--preprocess`), mostra o tempo de pré-processamento, o tempo do OCR e a
+taxa de detecção da NF-e esperada em um conjunto de digitalizações
+sintéticas (ruído, sombra e inclinação) ou de uma pasta de imagens.
+Termina com código 1 se o `--preprocess` padrão detectar menos NFs que a
+imagem só em escala de cinza.
+"""
+import argparse
+import time
+
+import pytesseract
+
+from benchmarks.fixtures import load_images, synthetic_scans
+from src.ocr_extract import process_text
+from src.preprocess import Preprocessor
+
+VARIANTS = [
+    ("escala de cinza (padrão)", None),
+    ("--preprocess (otsu)", Preprocessor()),
+    ("adaptativa", Preprocessor(binarize='adaptive')),
+    ("otsu, sem deskew", Preprocessor(deskew=False)),
+    ("otsu, sem recorte", Preprocessor(crop=False)),
+    ("sem binarização", Preprocessor(binarize=None)),
+]
+
+def run(pages: int, dpi: int, images: str, lang: str, seed: int):
+    if images:
+        fixtures = load_images(images)
+    else:
+        fixtures = synthetic_scans(pages, seed=seed, dpi=dpi)
+        for image, _ in fixtures:
+            image.info['dpi'] = (dpi, dpi)
+
+    print(f"{len(fixtures)} imagens" + ("" if images else f" sintéticas a {dpi} DPI"))
+    print(f"  {'variante':26} {'pré-proc.':>10} {'OCR':>9} {'total':>9} {'detecção':>9}")
+
+    rates = {}
+    for name, preprocessor in VARIANTS:
+        prepare_seconds = ocr_seconds = 0.0
+        detected = expected = 0
+        for image, nf in fixtures:
+            start = time.perf_counter()
+            prepared = preprocessor(image) if preprocessor else image.convert('L')
+            prepare_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            text = pytesseract.image_to_string(prepared, lang=lang)
+            ocr_seconds += time.perf_counter() - start
+
+            if nf:
+                expected += 1
+                detected += nf in process_text(text)
+
+        rates[name] = detected / expected if expected else 1.0
+        print(f"  {name:26} {prepare_seconds:9.2f}s {ocr_seconds:8.2f}s "
+              f"{prepare_seconds + ocr_seconds:8.2f}s {rates[name]:8.0%}")
+
+    if rates[VARIANTS[1][0]] < rates[VARIANTS[0][0]]:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pré-processamento para o OCR")
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--dpi', type=int, default=200, help="Resolução das digitalizações sintéticas")
+    parser.add_argument('--images', help="Pasta com imagens reais em vez das sintéticas")
+    parser.add_argument('--lang', default='por')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.pages, args.dpi, args.images, args.lang, args.seed)
+
+if __name__ == "__main__":
+    main()
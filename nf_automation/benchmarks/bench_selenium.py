@@ -0,0 +1,99 @@
+"""
+Benchmark da extração web (`src.selenium_version.driver_pool`) contra a leitura antiga do `body.text`.
+
+Uso (a partir de `nf_automation/`, com o Chrome e o Selenium instalados):
+    python -m benchmarks.bench_selenium [--pages 20] [--rows 2000] [--nfs 5] [--workers 4] [--show]
+
+As páginas são geradas em uma pasta temporária e abertas do disco
+(`file://`), junto com `web_version/nf_copy.html`. Compara, no mesmo
+Chrome sem janela (ou com janela, com `--show`):
+    - body.text: texto renderizado da página inteira + expressão regular (antes)
+    - execute_script: só o texto dos elementos com NF, numa única chamada
+    - pool: o mesmo, com `--workers` navegadores em paralelo
+Termina com código 1 se algum caminho não encontrar exatamente as NFs esperadas.
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import random_nf, render_page
+from src.selenium_version.driver_pool import DriverPool, extract_nfs, find_nfs, make_driver, to_url
+
+SAMPLE_PAGE = Path(__file__).resolve().parent.parent / "web_version" / "nf_copy.html"
+SAMPLE_NFS = ['352410001', '352410002', '352410003', '352410004', '352410005']
+
+def body_text(driver):
+    from selenium.webdriver.common.by import By
+
+    return find_nfs([driver.find_element(By.TAG_NAME, "body").text])
+
+def sequential(driver, pages, extract):
+    results = {}
+    for path in pages:
+        driver.get(to_url(str(path)))
+        results[str(path)] = extract(driver)
+    return results
+
+def run(pages: int, rows: int, nfs: int, workers: int, headless: bool, seed: int):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        expected = {str(SAMPLE_PAGE): SAMPLE_NFS}
+        for index in range(pages):
+            page_nfs = [random_nf(rng) for _ in range(nfs)]
+            path = Path(directory) / f"pagina_{index}.html"
+            path.write_text(render_page(rng, page_nfs, rows), encoding='utf-8')
+            expected[str(path)] = page_nfs
+        paths = list(expected)
+
+        timings, ok = {}, True
+
+        def check(name, results):
+            nonlocal ok
+            wrong = [path for path in paths if sorted(results.get(path, [])) != sorted(expected[path])]
+            if wrong:
+                ok = False
+                print(f"  {name}: {len(wrong)} páginas com NFs diferentes das esperadas (ex.: {wrong[0]})")
+
+        driver = make_driver(headless=headless)
+        try:
+            # Primeira carga fora da medição (cache do disco, inicialização do renderizador)
+            driver.get(to_url(str(SAMPLE_PAGE)))
+            for name, extract in [("body.text (antes)", body_text), ("execute_script", extract_nfs)]:
+                start = time.perf_counter()
+                results = sequential(driver, paths, extract)
+                timings[name] = time.perf_counter() - start
+                check(name, results)
+        finally:
+            driver.quit()
+
+        name = f"pool de {workers}"
+        start = time.perf_counter()
+        with DriverPool(workers, headless=headless) as pool:
+            results = {page.url: page.nfs for page in pool.crawl(paths)}
+        timings[name] = time.perf_counter() - start
+        check(name, results)
+
+    print(f"{len(paths)} páginas ({rows} linhas, {nfs} NFs cada), Chrome {'sem janela' if headless else 'com janela'}")
+    for name, seconds in timings.items():
+        print(f"  {name:20} {seconds:8.2f} s ({len(paths) / seconds:6.1f} páginas/s)")
+    if workers > 1:
+        print(f"  (o pool inclui a abertura dos {workers} navegadores)")
+
+    if not ok:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração de NFs com Selenium")
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=2000, help="Linhas de tabela por página")
+    parser.add_argument('--nfs', type=int, default=5, help="NFs por página")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--show', action='store_true', help="Chrome com janela")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.pages, args.rows, args.nfs, args.workers, not args.show, args.seed)
+
+if __name__ == "__main__":
+    main()
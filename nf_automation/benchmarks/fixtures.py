@@ -0,0 +1,112 @@
+"""
+Imagens sintéticas de telas e digitalizações com números de NF-e, usadas
+pelos benchmarks de OCR (não dependem de tela nem de arquivos externos),
+e páginas HTML para o benchmark da extração web.
+
+Também lê um conjunto próprio de imagens: o número esperado vem do nome do
+arquivo, até o primeiro "_" (ex.: `123456789_nota.png`; `0_...` = sem NF).
+"""
+import random
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp'}
+
+FILLER = ("Sistema de gestão fiscal emitente destinatário valor total dos produtos "
+          "base de cálculo ICMS transportadora quantidade unidade código descrição "
+          "natureza da operação venda de mercadoria data de emissão protocolo").split()
+
+# Posição fixa do campo da NF na tela simulada, como em um sistema real
+NF_FIELD = (1180, 220)
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+def _filler_line(rng: random.Random, words: int = 8) -> str:
+    return " ".join(rng.choice(FILLER) for _ in range(words))
+
+def render_screen(rng: random.Random, nf: str, size: Tuple[int, int] = (1920, 1080)) -> Image.Image:
+    """Tela de um sistema fiscal: texto variado e o número da NF sempre no mesmo campo."""
+    image = Image.new('RGB', size, (236, 236, 236))
+    draw = ImageDraw.Draw(image)
+    font = _font(18)
+    draw.rectangle((0, 0, size[0], 40), fill=(40, 70, 120))
+    for row in range(60, size[1] - 40, 28):
+        draw.text((30, row), _filler_line(rng, rng.randint(4, 9)), fill=(30, 30, 30), font=font)
+    x, y = NF_FIELD
+    draw.rectangle((x - 20, y - 20, x + 560, y + 60), fill=(255, 255, 255), outline=(120, 120, 120))
+    draw.text((x, y), f"NF-e nº {nf}", fill=(0, 0, 0), font=_font(28))
+    return image
+
+def render_scan(rng: random.Random, nf: str, size: Tuple[int, int] = (2480, 3508), dpi: int = 300,
+                noise: float = 12.0, skew: float = 2.0, shade: bool = True) -> Image.Image:
+    """Página digitalizada (A4 a `dpi`): margens largas, ruído, sombra e leve inclinação."""
+    scale = dpi / 300
+    width, height = int(size[0] * scale), int(size[1] * scale)
+    page = Image.new('L', (width, height), 235)
+    draw = ImageDraw.Draw(page)
+    font = _font(int(34 * scale))
+    margin = int(300 * scale)
+    row = margin
+    nf_row = rng.randint(4, 20)
+    for line in range(32):
+        text = f"DANFE - NF-e nº {nf}  Série 1" if line == nf_row else _filler_line(rng)
+        draw.text((margin, row), text, fill=40, font=font)
+        row += int(60 * scale)
+
+    if skew:
+        page = page.rotate(rng.uniform(-skew, skew), resample=Image.BICUBIC, expand=False, fillcolor=235)
+
+    pixels = np.asarray(page, dtype=np.float32)
+    if shade:
+        # Iluminação desigual, como em um scanner de mesa ou foto
+        pixels = pixels * np.linspace(0.75, 1.0, width, dtype=np.float32)[None, :]
+    if noise:
+        generator = np.random.default_rng(rng.randrange(2 ** 32))
+        pixels = pixels + generator.normal(0, noise, pixels.shape).astype(np.float32)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+def random_nf(rng: random.Random) -> str:
+    return str(rng.randrange(10 ** 8, 10 ** 9))
+
+def synthetic_scans(count: int, seed: int = 42, **options) -> List[Tuple[Image.Image, Optional[str]]]:
+    """`count` digitalizações sintéticas com o número esperado de cada uma."""
+    rng = random.Random(seed)
+    scans = []
+    for _ in range(count):
+        nf = random_nf(rng)
+        scans.append((render_scan(rng, nf, **options), nf))
+    return scans
+
+def render_page(rng: random.Random, nfs: List[str], rows: int = 2000) -> str:
+    """Página HTML de um sistema fiscal: tabela longa de texto variado com as NFs espalhadas.
+
+    Parte das NFs fica com o número em outro elemento (`<b>`), como em muitos sistemas.
+    """
+    positions = dict(zip(rng.sample(range(rows), len(nfs)), nfs))
+    lines = []
+    for row in range(rows):
+        cells = "".join(f"<td>{_filler_line(rng, rng.randint(2, 5))}</td>" for _ in range(4))
+        nf = positions.get(row)
+        if nf:
+            cells += f"<td>NF-e nº <b>{nf}</b></td>" if row % 2 else f"<td>NF-e nº {nf}</td>"
+        lines.append(f"<tr>{cells}</tr>")
+    return ("<!DOCTYPE html><html lang=\"pt-BR\"><head><meta charset=\"UTF-8\"><title>NFs</title></head>"
+            "<body><h1>Sistema de gestão fiscal</h1><table>" + "\n".join(lines) + "</table></body></html>")
+
+def load_images(directory: str) -> List[Tuple[Image.Image, Optional[str]]]:
+    """Imagens de uma pasta com o número esperado tirado do nome do arquivo."""
+    images = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() in IMAGE_SUFFIXES:
+            expected = path.stem.split('_', 1)[0]
+            with Image.open(path) as image:
+                image.load()
+                images.append((image, None if expected == '0' else expected))
+    return images
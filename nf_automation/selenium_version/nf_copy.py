@@ -1,21 +1,64 @@
-import os
-import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-def copy_nf():
+"""
+Copia as NFs de uma página web para a área de transferência, um número por linha.
+
+Uso (a partir de `nf_automation/`):
+    python -m selenium_version.nf_copy [URL ou arquivo HTML] [--selector ".nf"] [--show]
+
+Sem URL, usa a página de teste `web_version/nf_copy.html`.
+"""
+import argparse
+import logging
+from pathlib import Path
+
+from src.selenium_version.driver_pool import extract_nfs, make_driver, to_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE = Path(__file__).resolve().parent.parent / "web_version" / "nf_copy.html"
+
+def copy_to_clipboard(text):
+    """Coloca o texto na área de transferência (via Tk, sem dependências extras)."""
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.withdraw()
+    root.clipboard_clear()
+    root.clipboard_append(text)
+    # Mantém o conteúdo disponível depois que a janela é destruída
+    root.update()
+    root.destroy()
+
+def copy_nf(url=None, headless=True, selector=None, clipboard=True):
+    """Abre a página, extrai as NFs e copia os números para a área de transferência.
+
+    Returns:
+        Lista das NFs encontradas, na ordem da página
+    """
     # Configuração do driver
-    driver = webdriver.Chrome()
-    wait = WebDriverWait(driver, 10)
-    
+    driver = make_driver(headless=headless)
+
     try:
         # Navega para a página
-        driver.get("sua_url_aqui")
-        
+        driver.get(to_url(str(url or DEFAULT_PAGE)))
+
         # Lógica de cópia das NFs
-        pass
-        
+        nfs = extract_nfs(driver, selector)
+        if nfs and clipboard:
+            copy_to_clipboard("\n".join(nfs))
+        logger.info(f"{len(nfs)} NFs copiadas: {', '.join(nfs)}")
+        return nfs
+
     finally:
         driver.quit()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copia as NFs de uma página para a área de transferência")
+    parser.add_argument('url', nargs='?', help="URL ou arquivo HTML (padrão: web_version/nf_copy.html)")
+    parser.add_argument('--selector', help="Seletor CSS dos elementos com a NF")
+    parser.add_argument('--show', action='store_true', help="Mostra a janela do Chrome")
+    args = parser.parse_args(argv)
+    nfs = copy_nf(args.url, headless=not args.show, selector=args.selector)
+    print("\n".join(nfs) if nfs else "Nenhuma NF encontrada")
+
+if __name__ == "__main__":
+    main()
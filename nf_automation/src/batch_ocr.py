@@ -0,0 +1,173 @@
+"""
+OCR em lote de pastas com imagens e PDFs digitalizados, sem interface gráfica.
+
+As páginas são distribuídas entre processos (um por núcleo). Cada processo
+carrega o Tesseract uma única vez: com `tesserocr` instalado, a API e o
+traineddata ficam carregados durante todo o lote; sem ele, usa o
+`pytesseract`, que abre um processo do Tesseract por página. Os resultados
+chegam à medida que cada página termina.
+"""
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+from src.ocr_extract import process_image, process_text
+from src.preprocess import TESSERACT_DPI, Preprocessor
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp'}
+PDF_SUFFIXES = {'.pdf'}
+
+# PDFs mantidos abertos por processo, para não reabrir a cada página
+_OPEN_DOCUMENTS = 4
+
+# (arquivo, índice da página)
+Task = Tuple[str, int]
+
+class PageResult:
+    """NFs encontradas em uma página (ou o erro que impediu o OCR)."""
+
+    __slots__ = ('path', 'page', 'nfs', 'error')
+
+    def __init__(self, path: str, page: int, nfs: List[str], error: Optional[str] = None):
+        self.path = path
+        # Numerada a partir de 1
+        self.page = page
+        self.nfs = nfs
+        self.error = error
+
+def find_files(directory: str) -> List[Path]:
+    """Imagens e PDFs da pasta (e subpastas), em ordem."""
+    suffixes = IMAGE_SUFFIXES | PDF_SUFFIXES
+    return sorted(path for path in Path(directory).rglob('*') if path.is_file() and path.suffix.lower() in suffixes)
+
+def page_tasks(files: Iterable[Path]) -> Iterator[Task]:
+    """Uma tarefa por página: cada página de PDF e cada quadro de TIFF viram uma tarefa."""
+    import fitz
+
+    for path in files:
+        try:
+            if path.suffix.lower() in PDF_SUFFIXES:
+                with fitz.open(path) as document:
+                    count = document.page_count
+            else:
+                with Image.open(path) as image:
+                    count = getattr(image, 'n_frames', 1)
+        except Exception as e:
+            logger.error(f"Erro ao abrir {path}: {str(e)}")
+            continue
+        for page in range(count):
+            yield str(path), page
+
+# Estado de cada processo do pool, criado por `_init_worker`
+_worker = {}
+
+def _init_worker(lang: str, dpi: int, preprocessor: Optional[Preprocessor], tesseract_cmd: Optional[str]):
+    """Prepara o processo: um Tesseract por processo, sem threads próprias, carregado uma vez."""
+    # Vários processos em paralelo: o paralelismo interno do Tesseract só disputaria os núcleos
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+    _worker.update(lang=lang, dpi=dpi, preprocessor=preprocessor, documents=OrderedDict(), api=None)
+    try:
+        import tesserocr
+        _worker['api'] = tesserocr.PyTessBaseAPI(lang=lang)
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"tesserocr indisponível ({str(e)}); usando pytesseract")
+
+    if _worker['api'] is None and tesseract_cmd:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+def _document(path: str):
+    """PDF aberto pelo processo atual (mantém os últimos `_OPEN_DOCUMENTS`)."""
+    import fitz
+
+    documents = _worker['documents']
+    document = documents.get(path)
+    if document is None:
+        document = documents[path] = fitz.open(path)
+        while len(documents) > _OPEN_DOCUMENTS:
+            documents.popitem(last=False)[1].close()
+    else:
+        documents.move_to_end(path)
+    return document
+
+def _render(page, dpi: int) -> Image.Image:
+    import fitz
+
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+    image.info['dpi'] = (dpi, dpi)
+    return image
+
+def load_page(path: str, page: int, dpi: int = TESSERACT_DPI) -> Image.Image:
+    """Imagem de uma página: PDFs são renderizados em tons de cinza no DPI pedido."""
+    if Path(path).suffix.lower() in PDF_SUFFIXES:
+        if _worker:
+            return _render(_document(path)[page], dpi)
+
+        import fitz
+        with fitz.open(path) as document:
+            return _render(document[page], dpi)
+
+    with Image.open(path) as image:
+        image.seek(page)
+        image.load()
+        return image.copy() if getattr(image, 'n_frames', 1) > 1 else image
+
+def _ocr(image: Image.Image) -> str:
+    api = _worker['api']
+    if api is not None:
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+    import pytesseract
+    return pytesseract.image_to_string(image, lang=_worker['lang'])
+
+def _process_task(task: Task) -> PageResult:
+    path, page = task
+    try:
+        image = load_page(path, page, _worker['dpi'])
+        image = process_image(image, _worker['preprocessor'])
+        return PageResult(path, page + 1, process_text(_ocr(image)))
+    except Exception as e:
+        return PageResult(path, page + 1, [], error=str(e))
+
+def batch_extract(directory: str,
+                  workers: Optional[int] = None,
+                  lang: str = 'por',
+                  dpi: int = TESSERACT_DPI,
+                  preprocessor: Optional[Preprocessor] = None,
+                  tesseract_cmd: Optional[str] = None) -> Iterator[PageResult]:
+    """Faz o OCR de todas as páginas da pasta e gera os resultados na ordem em que terminam.
+
+    Args:
+        workers: Número de processos (padrão: um por núcleo)
+        dpi: Resolução em que as páginas de PDF são renderizadas
+        preprocessor: Pré-processamento aplicado a cada página (None = só escala de cinza)
+        tesseract_cmd: Executável do Tesseract para o pytesseract
+    """
+    tasks = list(page_tasks(find_files(directory)))
+    if not tasks:
+        logger.warning(f"Nenhuma imagem ou PDF encontrado em {directory}")
+        return
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    logger.info(f"OCR em lote: {len(tasks)} páginas, {workers} processos")
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                   initargs=(lang, dpi, preprocessor, tesseract_cmd))
+    try:
+        futures = [executor.submit(_process_task, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Se quem consome parar antes do fim, as páginas que faltam não são processadas
+        executor.shutdown(cancel_futures=True)
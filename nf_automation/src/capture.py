@@ -0,0 +1,200 @@
+"""
+Pipeline de captura para o OCR: recorta a região de interesse, pula quadros
+que não mudaram e guarda o texto reconhecido por região.
+
+Funciona tanto com a tela (`grab_screen`) quanto com arquivos de imagem
+(`file_frames`), o que permite medir o desempenho sem interface gráfica.
+"""
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# (left, top, width, height), o mesmo formato de `pyautogui.screenshot(region=...)`
+Region = Tuple[int, int, int, int]
+
+# Palavra que marca o número da nota na tela, usada para achar a região automaticamente
+NF_ANCHOR = re.compile(r'^NF-?e', re.IGNORECASE)
+
+def parse_region(value: str) -> Region:
+    """Converte "x,y,largura,altura" em uma região."""
+    parts = [int(part) for part in value.replace(' ', '').split(',')]
+    if len(parts) != 4 or parts[2] <= 0 or parts[3] <= 0:
+        raise ValueError(f"Região inválida: {value!r} (use x,y,largura,altura)")
+    return tuple(parts)
+
+def grab_screen(region: Optional[Region] = None) -> Image.Image:
+    """Captura a tela inteira ou só a região informada."""
+    import pyautogui
+    return pyautogui.screenshot(region=region)
+
+def file_frames(paths: Iterable[str]) -> Iterator[Image.Image]:
+    """Quadros lidos de arquivos de imagem, na ordem recebida."""
+    for path in paths:
+        with Image.open(path) as image:
+            image.load()
+            yield image
+
+def crop(image: Image.Image, region: Optional[Region]) -> Image.Image:
+    """Recorta a região da imagem (limitada às bordas); sem região, retorna a imagem inteira."""
+    if region is None:
+        return image
+    left, top, width, height = region
+    box = (max(0, left), max(0, top), min(image.width, left + width), min(image.height, top + height))
+    return image.crop(box)
+
+def frame_key(gray: np.ndarray) -> str:
+    """Hash do conteúdo de um quadro em escala de cinza (inclui as dimensões)."""
+    digest = hashlib.blake2b(gray.tobytes(), digest_size=16)
+    digest.update(np.asarray(gray.shape, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+def detect_roi(image: Image.Image, margin: int = 40, scale: float = 0.5) -> Optional[Region]:
+    """Localiza a região com o número da NF-e a partir das palavras reconhecidas na tela.
+
+    Roda o OCR com posições (`image_to_data`) em uma cópia reduzida da
+    imagem, procura a palavra "NF-e" e devolve a área da sua linha,
+    com `margin` pixels de folga. Retorna None se não encontrar.
+    """
+    import pytesseract
+
+    small = image.convert('L')
+    if scale != 1:
+        small = small.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+    data = pytesseract.image_to_data(small, lang='por', output_type=pytesseract.Output.DICT)
+
+    boxes = []
+    for index, word in enumerate(data['text']):
+        if NF_ANCHOR.match(word.strip()):
+            line = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+            for other in range(len(data['text'])):
+                if (data['block_num'][other], data['par_num'][other], data['line_num'][other]) == line \
+                        and data['text'][other].strip():
+                    boxes.append((data['left'][other], data['top'][other],
+                                  data['left'][other] + data['width'][other],
+                                  data['top'][other] + data['height'][other]))
+    if not boxes:
+        return None
+
+    left = int(min(box[0] for box in boxes) / scale) - margin
+    top = int(min(box[1] for box in boxes) / scale) - margin
+    right = int(max(box[2] for box in boxes) / scale) + margin
+    bottom = int(max(box[3] for box in boxes) / scale) + margin
+    left, top = max(0, left), max(0, top)
+    return (left, top, min(image.width, right) - left, min(image.height, bottom) - top)
+
+class CaptureResult:
+    """Resultado de um quadro processado pelo `CapturePipeline`."""
+
+    __slots__ = ('text', 'region', 'key', 'unchanged', 'cached')
+
+    def __init__(self, text: str, region: Optional[Region], key: str, unchanged: bool, cached: bool):
+        self.text = text
+        self.region = region
+        self.key = key
+        # O quadro é igual ao anterior (o OCR nem foi consultado)
+        self.unchanged = unchanged
+        # O texto veio do cache de uma captura anterior desta mesma região
+        self.cached = cached
+
+class CapturePipeline:
+    """Captura com região de interesse, detecção de quadro repetido e cache do OCR.
+
+    - Só a região (`region`, fixa, ou detectada com `detect_roi` quando
+      `auto_roi` está ligado) passa pelo OCR
+    - Se a região não mudou desde a captura anterior, o resultado anterior
+      é reaproveitado; com `diff_threshold` > 0, diferenças médias de até
+      esse valor (0-255 por pixel) também contam como "não mudou"
+    - O texto reconhecido fica em um cache LRU pelo hash da região, de modo
+      que voltar a uma tela já vista não roda o OCR de novo
+    """
+
+    def __init__(self,
+                 ocr: Callable[[Image.Image], str],
+                 region: Optional[Region] = None,
+                 auto_roi: bool = False,
+                 preprocess: Optional[Callable[[Image.Image], Image.Image]] = None,
+                 detector: Callable[[Image.Image], Optional[Region]] = detect_roi,
+                 cache_size: int = 64,
+                 diff_threshold: float = 0.0):
+        self.ocr = ocr
+        self.region = region
+        self.auto_roi = auto_roi
+        self.preprocess = preprocess
+        self.detector = detector
+        self.cache_size = cache_size
+        self.diff_threshold = diff_threshold
+
+        self._cache: OrderedDict = OrderedDict()
+        self._last: Optional[Tuple[np.ndarray, CaptureResult]] = None
+
+        self.stats = {'frames': 0, 'ocr_calls': 0, 'unchanged': 0, 'cache_hits': 0}
+
+    def reset_region(self):
+        """Esquece a região detectada, para que a próxima captura a procure de novo."""
+        if self.auto_roi:
+            self.region = None
+        self._last = None
+
+    def _locate(self, image: Image.Image) -> Optional[Region]:
+        """Região de interesse da imagem inteira (detecta na primeira vez, se `auto_roi`)."""
+        if self.region is None and self.auto_roi:
+            self.region = self.detector(image)
+            if self.region:
+                logger.info(f"Região de interesse detectada: {self.region}")
+            else:
+                logger.warning("Região de interesse não encontrada; usando a imagem inteira")
+        return self.region
+
+    def capture(self, grab: Callable[[Optional[Region]], Image.Image] = grab_screen) -> CaptureResult:
+        """Captura a tela (só a região, quando já conhecida) e processa."""
+        if self.region is not None:
+            return self._process_region(grab(self.region), self.region)
+        return self.process(grab(None))
+
+    def process(self, image: Image.Image) -> CaptureResult:
+        """Processa um quadro inteiro: recorta a região de interesse e reconhece o texto."""
+        region = self._locate(image)
+        return self._process_region(crop(image, region), region)
+
+    def _process_region(self, image: Image.Image, region: Optional[Region]) -> CaptureResult:
+        self.stats['frames'] += 1
+        gray_image = image.convert('L')
+        gray = np.asarray(gray_image)
+
+        if self._last is not None and self._same_frame(self._last[0], gray):
+            self.stats['unchanged'] += 1
+            previous = self._last[1]
+            return CaptureResult(previous.text, region, previous.key, unchanged=True, cached=previous.cached)
+
+        key = frame_key(gray)
+        text = self._cache.get(key)
+        cached = text is not None
+        if cached:
+            self._cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+        else:
+            self.stats['ocr_calls'] += 1
+            text = self.ocr(self.preprocess(gray_image) if self.preprocess else gray_image)
+            self._cache[key] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        result = CaptureResult(text, region, key, unchanged=False, cached=cached)
+        self._last = (gray, result)
+        return result
+
+    def _same_frame(self, previous: np.ndarray, current: np.ndarray) -> bool:
+        """Se o quadro atual é igual ao anterior (ou quase, com `diff_threshold`)."""
+        if previous.shape != current.shape:
+            return False
+        if self.diff_threshold <= 0:
+            return np.array_equal(previous, current)
+        difference = np.abs(previous.astype(np.int16) - current.astype(np.int16))
+        return float(difference.mean()) <= self.diff_threshold
@@ -0,0 +1,141 @@
+"""
+Gravação dos resultados em Excel com openpyxl, sem o Excel instalado.
+
+As linhas ficam em memória e vão para o arquivo em lotes (`batch_size`
+linhas) ou a cada `flush_interval` segundos, em vez de abrir, gravar e
+fechar a planilha a cada captura. Quem precisa saber quando as linhas
+chegaram ao arquivo passa `on_saved`, chamado só depois de uma gravação
+bem-sucedida.
+"""
+import atexit
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from openpyxl import Workbook, load_workbook
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADER = ("Números NF",)
+
+class ExcelWriter:
+    """Acumula linhas e grava na primeira planilha do arquivo em lotes.
+
+    Cada gravação reabre o arquivo, acrescenta as linhas pendentes ao fim
+    da primeira planilha e salva, como o `save_to_excel` antigo fazia a
+    cada captura: o nome da planilha, a formatação, as outras planilhas e
+    o que o usuário editou entre uma gravação e outra são preservados.
+
+    Se a gravação falhar (ex.: planilha aberta no Excel), as linhas
+    continuam no buffer e vão na próxima tentativa.
+    """
+
+    def __init__(self,
+                 path: str = 'resultados.xlsx',
+                 batch_size: int = 100,
+                 flush_interval: Optional[float] = 2.0,
+                 header: Sequence[str] = DEFAULT_HEADER):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.header = tuple(header)
+
+        self._pending: List[tuple] = []
+        # Chamadas a fazer quando as linhas pendentes forem gravadas
+        self._on_saved: List[Callable[[], None]] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'ExcelWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """Linhas ainda não gravadas."""
+        return len(self._pending)
+
+    def add(self, nfs: Iterable[str], on_saved: Optional[Callable[[], None]] = None):
+        """Adiciona uma linha por NF."""
+        self.write_rows(((nf,) for nf in nfs), on_saved)
+
+    def write_rows(self, rows: Iterable[Sequence], on_saved: Optional[Callable[[], None]] = None):
+        """Adiciona linhas; grava se o lote encheu. `on_saved` é chamado depois que elas forem gravadas."""
+        with self._lock:
+            self._pending.extend(tuple(row) for row in rows)
+            if on_saved is not None:
+                self._on_saved.append(on_saved)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._pending:
+                self._start_timer()
+
+    def _start_timer(self):
+        if not self.flush_interval or (self._timer and self._timer.is_alive()):
+            return
+        self._stop.clear()
+        self._timer = threading.Thread(target=self._run_timer, name="excel-writer", daemon=True)
+        self._timer.start()
+
+    def _run_timer(self):
+        while not self._stop.wait(self.flush_interval):
+            with self._lock:
+                if self._pending:
+                    self.flush()
+
+    def flush(self) -> bool:
+        """Grava as linhas pendentes; retorna False se a gravação falhar."""
+        with self._lock:
+            if not self._pending:
+                return True
+            try:
+                self._append(self._pending)
+            except Exception as e:
+                logger.error(f"Erro ao salvar no Excel ({len(self._pending)} linhas pendentes): {str(e)}")
+                return False
+            logger.info(f"{len(self._pending)} linhas salvas em {self.path}")
+            self._pending = []
+            callbacks, self._on_saved = self._on_saved, []
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Erro após salvar no Excel: {str(e)}")
+            return True
+
+    def _append(self, rows: List[tuple]):
+        """Acrescenta as linhas à primeira planilha (cria o arquivo com o cabeçalho se não existir)."""
+        if self.path.exists():
+            workbook = load_workbook(self.path)
+            sheet = workbook.worksheets[0]
+        else:
+            workbook = Workbook()
+            sheet = workbook.active
+            sheet.append(self.header)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(self.path)
+
+    def close(self):
+        """Para o temporizador e grava o que estiver pendente."""
+        self._stop.set()
+        if self._timer and self._timer is not threading.current_thread():
+            self._timer.join()
+        self.flush()
+
+_writers: Dict[Path, ExcelWriter] = {}
+_writers_lock = threading.Lock()
+
+def get_writer(path: str = 'resultados.xlsx') -> ExcelWriter:
+    """Gravador compartilhado do arquivo (um por caminho, fechado ao sair do programa)."""
+    key = Path(path).resolve()
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = ExcelWriter(path)
+            atexit.register(writer.close)
+        return writer
@@ -0,0 +1,163 @@
+"""
+Índice persistente das NFs já gravadas, para não repetir notas entre sessões.
+
+Cada arquivo de resultados (`resultados.xlsx`, o CSV do lote) tem o seu
+índice SQLite ao lado (`resultados.nfs.db`). Os números são carregados em
+um `set` na abertura, então cada consulta é O(1). As NFs novas ficam
+reservadas em memória (`reserve`) enquanto aguardam a gravação e só vão
+para o SQLite (`commit`) depois que chegam ao arquivo de resultados; se a
+gravação falhar ou o programa cair antes, elas não ficam marcadas como
+gravadas.
+
+Se o índice não existir, ele é montado a partir do arquivo de resultados.
+Para reconstruí-lo depois de editar a planilha à mão:
+    python -m src.nf_index resultados.xlsx
+"""
+import argparse
+import atexit
+import csv
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def index_path(results_path: str) -> Path:
+    """Caminho do índice de um arquivo de resultados (`resultados.xlsx` -> `resultados.nfs.db`)."""
+    path = Path(results_path)
+    return path.with_name(f"{path.stem}.nfs.db")
+
+def read_recorded(results_path: str) -> List[str]:
+    """NFs já gravadas no arquivo de resultados: coluna A da planilha ou coluna `nf` do CSV."""
+    path = Path(results_path)
+    if path.suffix.lower() == '.csv':
+        with open(path, newline='', encoding='utf-8') as file:
+            return [row['nf'] for row in csv.DictReader(file, delimiter=';') if row.get('nf')]
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(min_row=2, max_col=1, values_only=True)
+        return [str(row[0]).strip() for row in rows if row and row[0] is not None]
+    finally:
+        workbook.close()
+
+class SeenIndex:
+    """Conjunto persistente de números de NF.
+
+    Args:
+        path: Arquivo SQLite do índice
+        results_path: Arquivo de resultados usado para montar o índice quando ele ainda não existe
+    """
+
+    def __init__(self, path: str, results_path: Optional[str] = None):
+        self.path = Path(path)
+        created = not self.path.exists()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS nfs (nf TEXT PRIMARY KEY, recorded_at REAL)")
+        self._db.commit()
+        self._seen = {row[0] for row in self._db.execute("SELECT nf FROM nfs")}
+        # NFs aceitas mas ainda não gravadas no arquivo de resultados
+        self._reserved = set()
+
+        if created and results_path and Path(results_path).exists():
+            self.rebuild(results_path)
+
+    def __contains__(self, nf: str) -> bool:
+        return nf in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def partition(self, nfs: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Separa as NFs em (novas, já gravadas), na ordem; NFs reservadas contam como já gravadas.
+
+        Repetições dentro de `nfs` são descartadas sem entrar em nenhuma das listas.
+        """
+        new, duplicates = [], []
+        batch = set()
+        for nf in nfs:
+            if nf in batch:
+                continue
+            batch.add(nf)
+            if nf in self._seen or nf in self._reserved:
+                duplicates.append(nf)
+            else:
+                new.append(nf)
+        return new, duplicates
+
+    def reserve(self, nfs: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Reserva as NFs novas até a gravação (`commit`); retorna (novas, já gravadas).
+
+        A verificação e a reserva acontecem juntas, para que duas gravações
+        simultâneas não deixem passar a mesma NF.
+        """
+        with self._lock:
+            new, duplicates = self.partition(nfs)
+            self._reserved.update(new)
+        if duplicates:
+            logger.info(f"{len(duplicates)} NFs já gravadas ignoradas: {', '.join(duplicates)}")
+        return new, duplicates
+
+    def commit(self, nfs: Iterable[str]):
+        """Registra no SQLite as NFs reservadas que já estão no arquivo de resultados."""
+        nfs = list(nfs)
+        with self._lock:
+            now = time.time()
+            self._db.executemany("INSERT OR IGNORE INTO nfs (nf, recorded_at) VALUES (?, ?)",
+                                 [(nf, now) for nf in nfs])
+            self._db.commit()
+            self._seen.update(nfs)
+            self._reserved.difference_update(nfs)
+
+    def rebuild(self, results_path: str) -> int:
+        """Refaz o índice com as NFs do arquivo de resultados; retorna quantas foram indexadas."""
+        nfs = list(dict.fromkeys(read_recorded(results_path)))
+        now = time.time()
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM nfs")
+                self._db.executemany("INSERT INTO nfs (nf, recorded_at) VALUES (?, ?)", [(nf, now) for nf in nfs])
+            self._seen = set(nfs)
+        logger.info(f"Índice {self.path} reconstruído a partir de {results_path}: {len(nfs)} NFs")
+        return len(nfs)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_indexes: Dict[Path, SeenIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_index(results_path: str = 'resultados.xlsx') -> SeenIndex:
+    """Índice compartilhado do arquivo de resultados (um por arquivo, fechado ao sair do programa)."""
+    key = Path(results_path).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = SeenIndex(index_path(results_path), results_path)
+            atexit.register(index.close)
+        return index
+
+def saved_message(new: List[str], duplicates: List[str]) -> str:
+    """Mensagem para o usuário sobre as NFs gravadas e as ignoradas por já estarem no índice."""
+    message = f"NFs encontradas e salvas: {', '.join(new)}" if new else "Nenhuma NF nova encontrada."
+    if duplicates:
+        message += f"\n{len(duplicates)} já gravadas anteriormente e ignoradas: {', '.join(duplicates)}"
+    return message
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói o índice de NFs a partir do arquivo de resultados")
+    parser.add_argument('results', nargs='?', default='resultados.xlsx',
+                        help="Planilha ou CSV de resultados (padrão: %(default)s)")
+    args = parser.parse_args(argv)
+    count = SeenIndex(index_path(args.results)).rebuild(args.results)
+    print(f"{count} NFs indexadas em {index_path(args.results)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 # Copiando do backup
+import argparse
+import csv
 import os
+import shutil
 import re
 import time
 import json
-import win32com.client
-import pyautogui
 import pytesseract
 import numpy as np
 from PIL import Image
@@ -12,7 +13,13 @@ import logging
 import tkinter as tk
 from tkinter import messagebox
 
+from src.capture import CapturePipeline, grab_screen, parse_region
+from src.excel_writer import get_writer
+from src.nf_index import get_index, saved_message
+from src.preprocess import BINARIZE_METHODS, TESSERACT_DPI, Preprocessor
+
 # Configuração de logging
+os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -25,23 +32,27 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 def setup_tesseract():
-    """Configura o caminho do Tesseract."""
+    """Configura o caminho do Tesseract (instalação padrão do Windows ou o PATH)."""
     tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
     if os.path.exists(tesseract_path):
         pytesseract.pytesseract.tesseract_cmd = tesseract_path
         return True
-    return False
+    return shutil.which('tesseract') is not None
 
-def capture_screen():
-    """Captura a tela atual."""
-    screenshot = pyautogui.screenshot()
-    return screenshot
+def capture_screen(region=None):
+    """Captura a tela atual (ou só a região informada)."""
+    return grab_screen(region)
 
-def process_image(image):
-    """Processa a imagem para melhorar o OCR."""
+def process_image(image, preprocessor=None):
+    """Processa a imagem para melhorar o OCR.
+    
+    Por padrão só converte para escala de cinza; o `Preprocessor`
+    (ver `src.preprocess`) é aplicado apenas quando informado.
+    """
+    if preprocessor is not None:
+        return preprocessor(image)
     # Converte para escala de cinza
-    gray = image.convert('L')
-    return gray
+    return image.convert('L')
 
 def extract_text_from_image(image):
     """Extrai texto da imagem usando OCR."""
@@ -58,78 +69,161 @@ def process_text(text):
     nf_pattern = r'NF-e\s*n[º°]?\s*(\d{6,})'
     matches = re.finditer(nf_pattern, text, re.IGNORECASE)
     
-    nfs = []
-    for match in matches:
-        nf = match.group(1)
-        if nf not in nfs:
-            nfs.append(nf)
-    
-    return nfs
+    # dict mantém a ordem e descarta repetições em O(1) cada
+    return list(dict.fromkeys(match.group(1) for match in matches))
 
 def save_to_excel(nfs, excel_path='resultados.xlsx'):
-    """Salva os números de NF no Excel."""
+    """Salva no Excel as NFs que ainda não foram gravadas.
+    
+    As NFs já registradas em sessões anteriores são descartadas pelo índice
+    persistente (`src.nf_index`) antes de gravar. As linhas vão para o
+    gravador compartilhado do arquivo (`src.excel_writer`), que grava em
+    lotes ou a cada poucos segundos, e no fechamento do programa; só então
+    as NFs são registradas no índice.
+    
+    Returns:
+        (novas, já gravadas), ou None se a gravação falhar
+    """
     try:
-        # Inicializa o Excel
-        excel = win32com.client.Dispatch("Excel.Application")
-        excel.Visible = False
-        
-        try:
-            # Tenta abrir o arquivo existente
-            wb = excel.Workbooks.Open(os.path.abspath(excel_path))
-            ws = wb.Sheets(1)
-        except:
-            # Se não existir, cria um novo
-            wb = excel.Workbooks.Add()
-            ws = wb.Sheets(1)
-            ws.Range("A1").Value = "Números NF"
-        
-        # Encontra a última linha preenchida
-        last_row = ws.Cells(ws.Rows.Count, 1).End(-4162).Row
-        
-        # Adiciona os novos números
-        for i, nf in enumerate(nfs, start=1):
-            ws.Cells(last_row + i, 1).Value = nf
-        
-        # Salva e fecha
-        wb.Save()
-        wb.Close()
-        excel.Quit()
-        
-        return True
+        index = get_index(excel_path)
+        new, duplicates = index.reserve(nfs)
+        if new:
+            get_writer(excel_path).add(new, on_saved=lambda: index.commit(new))
+        return new, duplicates
     except Exception as e:
         logger.error(f"Erro ao salvar no Excel: {str(e)}")
-        if 'excel' in locals():
-            excel.Quit()
-        return False
+        return None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extração de números de NF-e da tela via OCR")
+    parser.add_argument('--region', type=parse_region,
+                        help="Região da tela com a NF: x,y,largura,altura (padrão: tela inteira)")
+    parser.add_argument('--auto-roi', action='store_true',
+                        help="Detecta a região da NF na primeira captura e passa a capturar só ela")
+    parser.add_argument('--diff-threshold', type=float, default=0.0,
+                        help="Diferença média por pixel (0-255) tolerada para considerar a tela inalterada")
+    add_preprocess_args(parser)
+
+    batch = parser.add_argument_group("lote (sem interface gráfica)")
+    batch.add_argument('--batch', metavar='PASTA',
+                       help="Faz o OCR de todas as imagens e PDFs digitalizados da pasta")
+    batch.add_argument('--output', default='resultados_lote.csv',
+                       help="CSV em que as NFs do lote são gravadas à medida que aparecem (padrão: %(default)s)")
+    batch.add_argument('--workers', type=int, help="Processos de OCR (padrão: um por núcleo)")
+    batch.add_argument('--lang', default='por', help="Idioma do Tesseract (padrão: %(default)s)")
+    return parser.parse_args(argv)
+
+def add_preprocess_args(parser):
+    """Opções do pré-processamento; sem `--preprocess` nem `--binarize`, a imagem só vai para escala de cinza."""
+    group = parser.add_argument_group("pré-processamento")
+    group.add_argument('--preprocess', action='store_true',
+                       help="Redimensiona, binariza, endireita e recorta a imagem antes do OCR")
+    group.add_argument('--binarize', choices=BINARIZE_METHODS + ('none',),
+                       help="Binarização antes do OCR; liga o pré-processamento (padrão com --preprocess: otsu)")
+    group.add_argument('--dpi', type=int, default=TESSERACT_DPI,
+                       help="DPI para o qual a imagem é redimensionada; 0 desliga (padrão: %(default)s)")
+    group.add_argument('--source-dpi', type=int,
+                       help="DPI da imagem de entrada, quando o arquivo não informa (ex.: 96 para a tela)")
+    group.add_argument('--no-deskew', action='store_true', help="Não corrige a inclinação")
+    group.add_argument('--no-crop', action='store_true', help="Não recorta as margens sem tinta")
 
-def main():
+def preprocessor_from_args(args):
+    """Monta o `Preprocessor` a partir das opções da linha de comando, ou None se desligado."""
+    if not args.preprocess and args.binarize is None:
+        return None
+    binarize = args.binarize or 'otsu'
+    return Preprocessor(
+        target_dpi=args.dpi or None,
+        source_dpi=args.source_dpi,
+        deskew=not args.no_deskew,
+        binarize=None if binarize == 'none' else binarize,
+        crop=not args.no_crop
+    )
+
+def run_batch(args):
+    """Modo lote: grava cada NF no CSV assim que a página em que aparece termina."""
+    from src.batch_ocr import batch_extract
+
+    index = get_index(args.output)
+    pages = found = skipped = errors = 0
+    with open(args.output, 'a', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file, delimiter=';')
+        if file.tell() == 0:
+            writer.writerow(["arquivo", "pagina", "nf"])
+
+        for result in batch_extract(args.batch,
+                                    workers=args.workers,
+                                    lang=args.lang,
+                                    dpi=args.dpi or TESSERACT_DPI,
+                                    preprocessor=preprocessor_from_args(args),
+                                    tesseract_cmd=pytesseract.pytesseract.tesseract_cmd):
+            pages += 1
+            if result.error:
+                errors += 1
+                logger.error(f"Erro no OCR de {result.path} (página {result.page}): {result.error}")
+                continue
+            # NFs já gravadas (nesta ou em execuções anteriores) não se repetem no CSV
+            new, duplicates = index.reserve(result.nfs)
+            for nf in new:
+                writer.writerow([result.path, result.page, nf])
+            file.flush()
+            index.commit(new)
+            found += len(new)
+            skipped += len(duplicates)
+            logger.info(f"{result.path} (página {result.page}): {', '.join(result.nfs) or 'nenhuma NF'}")
+
+    logger.info(f"Lote concluído: {pages} páginas, {found} NFs novas, {skipped} já gravadas ignoradas, "
+                f"{errors} erros; resultados em {args.output}")
+
+def main(argv=None):
     """Função principal."""
+    args = parse_args(argv)
     if not setup_tesseract():
-        messagebox.showerror("Erro", "Tesseract não encontrado!")
+        logger.error("Tesseract não encontrado!")
+        if not args.batch:
+            messagebox.showerror("Erro", "Tesseract não encontrado!")
+        return
+
+    if args.batch:
+        run_batch(args)
         return
 
     # Interface básica
     root = tk.Tk()
     root.withdraw()  # Esconde a janela principal
 
+    pipeline = CapturePipeline(
+        ocr=extract_text_from_image,
+        region=args.region,
+        auto_roi=args.auto_roi,
+        preprocess=preprocessor_from_args(args),
+        diff_threshold=args.diff_threshold
+    )
+
     while True:
         # Aguarda confirmação do usuário
         if not messagebox.askyesno("Continuar", "Posicione o cursor sobre a NF e clique em Sim para capturar."):
             break
 
-        # Captura e processa
-        screenshot = capture_screen()
-        processed_image = process_image(screenshot)
-        text = extract_text_from_image(processed_image)
-        nfs = process_text(text)
+        # Captura só a região de interesse e pula o OCR se a tela não mudou
+        result = pipeline.capture()
+        if result.unchanged:
+            messagebox.showinfo("Aviso", "A tela não mudou desde a última captura.")
+            continue
+
+        nfs = process_text(result.text)
 
         if nfs:
-            # Salva no Excel
-            if save_to_excel(nfs):
-                messagebox.showinfo("Sucesso", f"NFs encontradas e salvas: {', '.join(nfs)}")
+            # Salva no Excel (só as que ainda não foram gravadas)
+            saved = save_to_excel(nfs)
+            # Só confirma depois que as linhas estão de fato no arquivo
+            if saved is not None and get_writer().flush():
+                messagebox.showinfo("Sucesso", saved_message(*saved))
             else:
                 messagebox.showerror("Erro", "Erro ao salvar no Excel!")
         else:
+            # A NF pode ter mudado de lugar; procura a região de novo na próxima captura
+            pipeline.reset_region()
             messagebox.showwarning("Aviso", "Nenhuma NF encontrada na imagem!")
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+"""
+Pré-processamento vetorizado (NumPy) das imagens antes do Tesseract.
+
+Etapas, cada uma configurável no `Preprocessor`:
+    escala (para o DPI ideal do Tesseract) -> binarização (Otsu ou
+    adaptativa) -> correção de inclinação -> recorte das margens sem tinta
+"""
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Resolução em que o Tesseract costuma ter o melhor resultado
+TESSERACT_DPI = 300
+
+BINARIZE_METHODS = ('otsu', 'adaptive')
+
+# DPI informado pelo arquivo só é usado se estiver nesta faixa (alguns TIFFs trazem 1 ou 72 por padrão)
+PLAUSIBLE_DPI = (100, 1200)
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Limiar de Otsu: o que maximiza a variância entre as classes do histograma."""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weights = np.cumsum(histogram)
+    means = np.cumsum(histogram * np.arange(256))
+    total, total_mean = weights[-1], means[-1]
+    background = weights[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    between = np.zeros(255)
+    between[valid] = (total_mean * background[valid] - means[:-1][valid] * total) ** 2 / (
+        background[valid] * foreground[valid])
+    return int(np.argmax(between))
+
+def binarize_otsu(gray: np.ndarray) -> np.ndarray:
+    """Binariza com o limiar global de Otsu (texto preto = 0, fundo branco = 255)."""
+    return np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+
+def box_mean(gray: np.ndarray, window: int) -> np.ndarray:
+    """Média de cada vizinhança `window` x `window`, via imagem integral (tempo constante por pixel)."""
+    radius = window // 2
+    size = 2 * radius + 1
+    padded = np.pad(gray.astype(np.float64), ((radius + 1, radius), (radius + 1, radius)), mode='reflect')
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    height, width = gray.shape
+    sums = (integral[size:size + height, size:size + width]
+            - integral[:height, size:size + width]
+            - integral[size:size + height, :width]
+            + integral[:height, :width])
+    return sums / (size * size)
+
+def binarize_adaptive(gray: np.ndarray, window: int = 31, offset: float = 10) -> np.ndarray:
+    """Binariza comparando cada pixel com a média da sua vizinhança (`window` x `window`).
+
+    Lida bem com iluminação desigual, ao contrário do limiar global. O
+    pixel é comparado já suavizado (média 3x3), e pontos pretos isolados
+    são apagados, para que o ruído do scanner não vire sujeira no fundo.
+    """
+    binary = np.where(box_mean(gray, 3) > box_mean(gray, window) - offset, 255, 0).astype(np.uint8)
+    ink = binary == 0
+    isolated = ink & (box_mean(ink, 5) * 25 < 6.5)
+    binary[isolated] = 255
+    return binary
+
+def estimate_skew(gray: np.ndarray, max_angle: float = 5.0, step: float = 0.25, sample_width: int = 800) -> float:
+    """Ângulo de inclinação do texto, em graus, pelo perfil de projeção horizontal.
+
+    Para cada ângulo candidato, projeta os pixels de tinta (de uma cópia
+    reduzida) nas linhas; as linhas de texto ficam mais nítidas (soma dos
+    quadrados maior) no ângulo que as deixa horizontais.
+    """
+    factor = max(1, gray.shape[1] // sample_width)
+    small = gray[::factor, ::factor]
+    ys, xs = np.nonzero(small < otsu_threshold(small))
+    if len(ys) < 50:
+        return 0.0
+
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    xs = xs.astype(np.float64) - small.shape[1] / 2
+    best_angle, best_score = 0.0, -1.0
+    for angle in angles:
+        rows = np.round(ys - xs * np.tan(np.radians(angle))).astype(np.int64)
+        rows -= rows.min()
+        counts = np.bincount(rows)
+        score = float(np.dot(counts, counts))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def ink_bounds(binary: np.ndarray, block: int = 16, density: float = 0.12) -> Optional[Tuple[int, int, int, int]]:
+    """Caixa (left, top, right, bottom) da área com tinta, ignorando sujeiras e ruído.
+
+    A imagem é dividida em blocos de `block` x `block` pixels; só contam os
+    blocos com pelo menos `density` de pixels pretos. Texto ocupa boa parte
+    do bloco, enquanto pontos de ruído ficam espalhados.
+    """
+    height, width = binary.shape
+    rows, columns = height // block, width // block
+    if not rows or not columns:
+        return None
+    ink = binary[:rows * block, :columns * block] == 0
+    blocks = ink.reshape(rows, block, columns, block).mean(axis=(1, 3)) >= density
+    dense_rows = np.flatnonzero(blocks.any(axis=1))
+    dense_columns = np.flatnonzero(blocks.any(axis=0))
+    if not len(dense_rows):
+        return None
+    return (int(dense_columns[0]) * block, int(dense_rows[0]) * block,
+            min(width, (int(dense_columns[-1]) + 1) * block), min(height, (int(dense_rows[-1]) + 1) * block))
+
+class Preprocessor:
+    """Pipeline de pré-processamento; cada etapa pode ser desligada.
+
+    Args:
+        target_dpi: DPI para o qual a imagem é redimensionada (None = não redimensiona)
+        source_dpi: DPI da imagem de entrada; se omitido, usa o informado no
+            arquivo (`image.info['dpi']`, se plausível) e, sem ele, não redimensiona
+        deskew: Corrige a inclinação de até `max_skew` graus
+        binarize: 'otsu', 'adaptive' ou None
+        crop: Recorta as margens sem tinta, deixando `padding` pixels
+    """
+
+    def __init__(self,
+                 target_dpi: Optional[int] = TESSERACT_DPI,
+                 source_dpi: Optional[int] = None,
+                 deskew: bool = True,
+                 max_skew: float = 5.0,
+                 binarize: Optional[str] = 'otsu',
+                 adaptive_window: int = 31,
+                 adaptive_offset: float = 10,
+                 crop: bool = True,
+                 padding: int = 20):
+        if binarize not in BINARIZE_METHODS + (None,):
+            raise ValueError(f"Binarização inválida: {binarize!r} (use {', '.join(BINARIZE_METHODS)} ou None)")
+        self.target_dpi = target_dpi
+        self.source_dpi = source_dpi
+        self.deskew = deskew
+        self.max_skew = max_skew
+        self.binarize = binarize
+        self.adaptive_window = adaptive_window
+        self.adaptive_offset = adaptive_offset
+        self.crop = crop
+        self.padding = padding
+
+    def _scale(self, image: Image.Image) -> Image.Image:
+        source = self.source_dpi
+        if source is None and image.info.get('dpi'):
+            source = float(image.info['dpi'][0])
+            if not PLAUSIBLE_DPI[0] <= source <= PLAUSIBLE_DPI[1]:
+                source = None
+        if not self.target_dpi or not source:
+            return image
+        factor = self.target_dpi / source
+        if abs(factor - 1) < 0.05:
+            return image
+        size = (max(1, round(image.width * factor)), max(1, round(image.height * factor)))
+        return image.resize(size, Image.LANCZOS if factor < 1 else Image.BICUBIC)
+
+    def _deskew(self, image: Image.Image, binary: bool) -> Image.Image:
+        """Endireita a imagem; os cantos que surgem na rotação recebem a cor do fundo."""
+        pixels = np.asarray(image)
+        angle = estimate_skew(pixels, self.max_skew)
+        if abs(angle) < 0.1:
+            return image
+        if binary:
+            # Imagem já binarizada: vizinho mais próximo mantém só preto e branco
+            return image.rotate(angle, resample=Image.NEAREST, expand=True, fillcolor=255)
+        background = int(np.median(pixels[::4, ::4]))
+        return image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=background)
+
+    def __call__(self, image: Image.Image) -> Image.Image:
+        """Aplica as etapas ligadas e retorna a imagem em escala de cinza (ou binária)."""
+        gray = np.asarray(self._scale(image.convert('L')))
+
+        # Binariza antes de endireitar, para que as bordas da rotação não virem tinta
+        if self.binarize == 'otsu':
+            result = binarize_otsu(gray)
+        elif self.binarize == 'adaptive':
+            result = binarize_adaptive(gray, self.adaptive_window, self.adaptive_offset)
+        else:
+            result = gray
+
+        if self.deskew:
+            result = np.asarray(self._deskew(Image.fromarray(result), binary=self.binarize is not None))
+
+        if self.crop:
+            bounds = ink_bounds(result if self.binarize else binarize_otsu(result))
+            if bounds:
+                left, top, right, bottom = bounds
+                result = result[max(0, top - self.padding):bottom + self.padding,
+                                max(0, left - self.padding):right + self.padding]
+
+        return Image.fromarray(np.ascontiguousarray(result))
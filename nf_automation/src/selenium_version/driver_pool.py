@@ -0,0 +1,183 @@
+"""
+Extração de NFs de páginas web com o Chrome (Selenium), com ou sem janela.
+
+Em vez de ler o texto renderizado da página inteira (`body.text`) e aplicar
+a expressão regular em tudo, um único `execute_script` percorre os nós de
+texto no navegador e devolve só o texto dos elementos que têm uma NF.
+
+O `DriverPool` mantém alguns Chromes abertos e distribui uma lista de URLs
+entre eles. São navegadores separados, não abas: o WebDriver executa um
+comando por vez em cada navegador, então abas do mesmo Chrome não
+carregariam em paralelo.
+
+O Selenium só é importado quando um navegador é criado.
+"""
+import logging
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+NF_PATTERN = re.compile(r'NF-e\s*n[º°]?\s*(\d{6,})', re.IGNORECASE)
+
+# Executado no navegador: arguments[0] = seletor CSS (opcional), arguments[1] = padrão da NF.
+# Sem seletor, procura os nós de texto com "NF-e" e sobe até o elemento que contém o
+# número inteiro (ele pode estar em outro nó, ex.: <b>), no máximo `MAX_DEPTH` níveis e
+# sem chegar ao <body>, para nunca devolver o texto da página inteira.
+EXTRACT_SCRIPT = """
+const selector = arguments[0];
+const full = new RegExp(arguments[1], 'i');
+const MAX_DEPTH = 3;
+const text = el => el.innerText || el.textContent || '';
+if (selector) {
+    return Array.from(document.querySelectorAll(selector), text);
+}
+const skip = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+const seen = new Set();
+const texts = [];
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+    if (!/NF-e/i.test(node.nodeValue)) continue;
+    let el = node.parentElement;
+    if (!el || skip.has(el.tagName)) continue;
+    for (let depth = 0; depth < MAX_DEPTH && !full.test(text(el)) && el.parentElement
+                        && el.parentElement !== document.body; depth++) {
+        el = el.parentElement;
+    }
+    if (seen.has(el)) continue;
+    seen.add(el);
+    const value = text(el);
+    if (full.test(value)) texts.push(value);
+}
+return texts;
+"""
+
+def find_nfs(texts: Iterable[str]) -> List[str]:
+    """Números de NF nos textos, na ordem e sem repetição."""
+    return list(dict.fromkeys(match.group(1) for text in texts for match in NF_PATTERN.finditer(text)))
+
+def to_url(location: str) -> str:
+    """URL da página; caminhos de arquivo (ex.: as páginas de teste) viram `file://`."""
+    if re.match(r'^[a-z][a-z0-9+.-]*://', location, re.IGNORECASE):
+        return location
+    return Path(location).resolve().as_uri()
+
+def make_driver(headless: bool = False, load_images: bool = True, page_load_timeout: float = 30):
+    """Cria um Chrome; com `headless`, sem janela (e, opcionalmente, sem baixar imagens)."""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+        options.add_argument('--disable-gpu')
+    else:
+        options.add_argument('--start-maximized')
+    if not load_images:
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    # Devolve o controle quando o DOM está pronto, sem esperar imagens e folhas de estilo
+    options.page_load_strategy = 'eager'
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(page_load_timeout)
+    return driver
+
+def extract_nfs(driver, selector: Optional[str] = None) -> List[str]:
+    """NFs da página atual, com uma única chamada ao navegador.
+
+    Args:
+        selector: Seletor CSS dos elementos com a NF, quando conhecido;
+            sem ele, procura os textos com "NF-e" na página toda
+    """
+    texts = driver.execute_script(EXTRACT_SCRIPT, selector, NF_PATTERN.pattern)
+    return find_nfs(texts or [])
+
+class PageNFs:
+    """NFs encontradas em uma URL (ou o erro ao carregá-la)."""
+
+    __slots__ = ('url', 'nfs', 'error')
+
+    def __init__(self, url: str, nfs: List[str], error: Optional[str] = None):
+        self.url = url
+        self.nfs = nfs
+        self.error = error
+
+class DriverPool:
+    """Conjunto de navegadores reaproveitados entre as páginas.
+
+    Os navegadores são criados sob demanda, até `size`, e fechados por
+    `close()` (ou ao sair do bloco `with`).
+
+    Args:
+        size: Número máximo de navegadores abertos ao mesmo tempo
+        headless: Navegadores sem janela (e sem baixar imagens)
+        factory: Função que cria um navegador (padrão: `make_driver` com `headless`)
+    """
+
+    def __init__(self, size: int = 4, headless: bool = True, factory: Optional[Callable] = None):
+        self.size = max(1, size)
+        self.factory = factory or (lambda: make_driver(headless=headless, load_images=not headless))
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(self.size)
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'DriverPool':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def driver(self):
+        """Empresta um navegador livre (ou cria um, se ainda couber no pool)."""
+        # Cada vaga corresponde a um navegador: sem vaga, espera alguém devolver o seu
+        self._slots.acquire()
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self.factory()
+                with self._lock:
+                    self._drivers.append(driver)
+            try:
+                yield driver
+            finally:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def fetch(self, url: str, selector: Optional[str] = None) -> PageNFs:
+        """Abre a URL em um navegador do pool e extrai as NFs."""
+        try:
+            with self.driver() as driver:
+                driver.get(to_url(url))
+                return PageNFs(url, extract_nfs(driver, selector))
+        except Exception as e:
+            return PageNFs(url, [], error=str(e))
+
+    def crawl(self, urls: Iterable[str], selector: Optional[str] = None) -> Iterator[PageNFs]:
+        """Extrai as NFs de todas as URLs em paralelo, gerando os resultados na ordem em que terminam."""
+        with ThreadPoolExecutor(self.size, thread_name_prefix="driver-pool") as executor:
+            futures = [executor.submit(self.fetch, url, selector) for url in urls]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def close(self):
+        """Fecha todos os navegadores."""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        self._idle = queue.LifoQueue()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.error(f"Erro ao fechar o navegador: {str(e)}")
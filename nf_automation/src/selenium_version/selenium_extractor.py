@@ -1,35 +1,54 @@
 # Copiando do backup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import pyautogui
-import time
-import re
+import argparse
 import tkinter as tk
 from tkinter import messagebox
 import logging
 import os
 from pathlib import Path
 
+from src.excel_writer import get_writer
+from src.nf_index import get_index, saved_message
+from src.selenium_version.driver_pool import DriverPool, extract_nfs, find_nfs, make_driver
+
 # Configuração de logging
+os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
     filename='logs/selenium_debug.log',
     level=logging.DEBUG,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+def save_to_excel(nf_numbers, excel_path="resultados.xlsx"):
+    """Salva no Excel as NFs ainda não gravadas (em lotes, via `src.excel_writer`).
+
+    As NFs só são registradas no índice depois que o lote é gravado.
+
+    Returns:
+        (novas, já gravadas), ou None se a gravação falhar
+    """
+    try:
+        index = get_index(excel_path)
+        new, duplicates = index.reserve(nf_numbers)
+        if new:
+            get_writer(excel_path).add(new, on_saved=lambda: index.commit(new))
+        logging.info(f"Números enviados para gravação: {new} ({len(duplicates)} já gravados ignorados)")
+        return new, duplicates
+    except Exception as e:
+        logging.error(f"Erro ao salvar no Excel: {str(e)}")
+        return None
+
 class NFExtractor:
-    def __init__(self):
+    def __init__(self, headless=False, selector=None):
+        self.headless = headless
+        # Seletor CSS dos elementos com a NF (None = procura "NF-e" na página toda)
+        self.selector = selector
         self.setup_chrome()
         self.setup_gui()
         
     def setup_chrome(self):
         """Configura o Chrome Driver."""
         try:
-            options = webdriver.ChromeOptions()
-            options.add_argument('--start-maximized')
-            self.driver = webdriver.Chrome(options=options)
+            self.driver = make_driver(headless=self.headless)
             logging.info("Chrome Driver iniciado com sucesso")
         except Exception as e:
             logging.error(f"Erro ao iniciar Chrome Driver: {str(e)}")
@@ -42,43 +61,11 @@ class NFExtractor:
 
     def extract_nf_numbers(self, text):
         """Extrai números de NF do texto."""
-        pattern = r'NF-e\s*n[º°]?\s*(\d{6,})'
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        return [match.group(1) for match in matches]
+        return find_nfs([text])
 
     def save_to_excel(self, nf_numbers):
-        """Salva os números no Excel."""
-        try:
-            import win32com.client
-            excel = win32com.client.Dispatch("Excel.Application")
-            excel.Visible = False
-            
-            file_path = os.path.abspath("resultados.xlsx")
-            
-            try:
-                wb = excel.Workbooks.Open(file_path)
-                ws = wb.Sheets(1)
-            except:
-                wb = excel.Workbooks.Add()
-                ws = wb.Sheets(1)
-                ws.Range("A1").Value = "Números NF"
-
-            last_row = ws.Cells(ws.Rows.Count, 1).End(-4162).Row
-            
-            for i, nf in enumerate(nf_numbers, 1):
-                ws.Cells(last_row + i, 1).Value = nf
-
-            wb.Save()
-            wb.Close()
-            excel.Quit()
-            
-            logging.info(f"Números salvos com sucesso: {nf_numbers}")
-            return True
-        except Exception as e:
-            logging.error(f"Erro ao salvar no Excel: {str(e)}")
-            if 'excel' in locals():
-                excel.Quit()
-            return False
+        """Salva no Excel as NFs ainda não gravadas (ver `save_to_excel`)."""
+        return save_to_excel(nf_numbers)
 
     def run(self):
         """Executa o processo de extração."""
@@ -88,15 +75,14 @@ class NFExtractor:
                     break
 
                 try:
-                    # Captura o texto da página
-                    page_text = self.driver.find_element(By.TAG_NAME, "body").text
-                    
-                    # Extrai os números de NF
-                    nf_numbers = self.extract_nf_numbers(page_text)
+                    # Só o texto dos elementos com NF, numa única chamada ao navegador
+                    nf_numbers = extract_nfs(self.driver, self.selector)
                     
                     if nf_numbers:
-                        if self.save_to_excel(nf_numbers):
-                            messagebox.showinfo("Sucesso", f"NFs encontradas e salvas: {', '.join(nf_numbers)}")
+                        saved = self.save_to_excel(nf_numbers)
+                        # Só confirma depois que as linhas estão de fato no arquivo
+                        if saved is not None and get_writer().flush():
+                            messagebox.showinfo("Sucesso", saved_message(*saved))
                         else:
                             messagebox.showerror("Erro", "Erro ao salvar no Excel!")
                     else:
@@ -117,10 +103,48 @@ class NFExtractor:
         except Exception as e:
             logging.error(f"Erro ao fechar Chrome Driver: {str(e)}")
 
-if __name__ == "__main__":
+def crawl(urls, workers=4, headless=True, selector=None):
+    """Extrai as NFs de uma lista de URLs (ou arquivos HTML) com vários navegadores e salva no Excel."""
+    found = skipped = errors = 0
+    with DriverPool(workers, headless=headless) as pool:
+        for page in pool.crawl(urls, selector):
+            if page.error:
+                errors += 1
+                logging.error(f"Erro ao extrair {page.url}: {page.error}")
+                continue
+            saved = save_to_excel(page.nfs) if page.nfs else ([], [])
+            if saved is None:
+                errors += 1
+                continue
+            found += len(saved[0])
+            skipped += len(saved[1])
+            logging.info(f"{page.url}: {', '.join(page.nfs) or 'nenhuma NF'}")
+    logging.info(f"{len(urls)} páginas: {found} NFs novas, {skipped} já gravadas ignoradas, {errors} erros")
+    return found, skipped, errors
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extração de números de NF-e de páginas web (Selenium)")
+    parser.add_argument('--headless', action='store_true', help="Chrome sem janela")
+    parser.add_argument('--selector', help="Seletor CSS dos elementos com a NF (padrão: procura 'NF-e' na página)")
+    parser.add_argument('--urls', metavar='ARQUIVO',
+                        help="Arquivo com uma URL (ou caminho de HTML) por linha, extraídas sem interação")
+    parser.add_argument('--workers', type=int, default=4, help="Navegadores abertos ao mesmo tempo com --urls")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.urls:
+        urls = [line.strip() for line in Path(args.urls).read_text(encoding='utf-8').splitlines() if line.strip()]
+        found, skipped, errors = crawl(urls, args.workers, headless=args.headless, selector=args.selector)
+        print(f"{len(urls)} páginas: {found} NFs novas, {skipped} já gravadas ignoradas, {errors} erros")
+        return
+
     try:
-        extractor = NFExtractor()
+        extractor = NFExtractor(headless=args.headless, selector=args.selector)
         extractor.run()
     except Exception as e:
         logging.error(f"Erro fatal: {str(e)}")
         messagebox.showerror("Erro Fatal", str(e))
+
+if __name__ == "__main__":
+    main()